@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Analysis Concurrency Limiter for Elysia
+Bounds in-flight Tree runs, serializes each user's requests, queues a limited number of waiters and drains on shutdown
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class AnalysisSaturated(Exception):
+    """Raised when the limiter cannot admit a request"""
+
+    def __init__(self, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AnalysisLimiter:
+    """Admission control for analysis requests
+
+    At most `max_in_flight` requests run at once; up to `max_queue` more
+    wait (for at most `queue_timeout` seconds) and anything beyond that is
+    rejected immediately so callers can back off.
+
+    A user's requests run against one Tree and would only block each
+    other on an executor thread, so they are serialized here first: a
+    request carrying a user id waits for that user's previous request
+    before competing for a slot, and at most `max_queue_per_user` of them
+    may wait at once.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, max_queue_per_user: int = 2):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_queue_per_user = max_queue_per_user
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        # user id -> (lock held by the user's admitted request, requests holding or waiting for it)
+        self._user_turns: Dict[str, List] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.closed = False
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None):
+        """Wait for the user's turn and a free slot; yields the time spent queueing in seconds"""
+        if self.closed:
+            raise AnalysisSaturated("shutting down", retry_after=5)
+
+        started = time.perf_counter()
+        async with self._user_turn(user_id):
+            async with self._global_slot(started) as waited:
+                yield waited
+
+    @asynccontextmanager
+    async def _user_turn(self, user_id: Optional[str]):
+        """Hold the user's turn so their requests run one at a time (anonymous requests pass)"""
+        if not user_id:
+            yield
+            return
+
+        turn = self._user_turns.setdefault(user_id, [asyncio.Lock(), 0])
+        lock = turn[0]
+        if turn[1] > self.max_queue_per_user:
+            self.rejected += 1
+            raise AnalysisSaturated("too many concurrent requests for this user")
+
+        turn[1] += 1
+        try:
+            if lock.locked():
+                self.waiting += 1
+                self._idle.clear()
+                try:
+                    await asyncio.wait_for(lock.acquire(), timeout=self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise AnalysisSaturated("timed out waiting for the user's previous request")
+                finally:
+                    self.waiting -= 1
+                    self._mark_idle()
+            else:
+                await lock.acquire()
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            turn[1] -= 1
+            if turn[1] == 0:
+                del self._user_turns[user_id]
+
+    @asynccontextmanager
+    async def _global_slot(self, started: float):
+        """Wait for one of the `max_in_flight` slots, within what is left of the queue timeout"""
+        if not self._semaphore.locked():
+            # A slot is free: acquire() returns without suspending
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise AnalysisSaturated("analysis queue is full")
+
+            self.waiting += 1
+            self._idle.clear()
+            try:
+                remaining = max(self.queue_timeout - (time.perf_counter() - started), 0.0)
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.waiting -= 1
+                self.rejected += 1
+                self._mark_idle()
+                raise AnalysisSaturated("timed out waiting for an analysis slot")
+            except BaseException:
+                self.waiting -= 1
+                self._mark_idle()
+                raise
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            yield waited
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._mark_idle()
+
+    def _mark_idle(self):
+        """Signal drain waiters once nothing is queued or running"""
+        if self.in_flight == 0 and self.waiting == 0:
+            self._idle.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stop admitting requests and wait for in-flight ones to finish"""
+        self.closed = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Analysis drain timed out with {self.in_flight} requests in flight")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limiter counters"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "max_queue_per_user": self.max_queue_per_user,
+            "users_active": len(self._user_turns),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self.total_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(self.max_wait * 1000, 2),
+            "closed": self.closed,
+        }
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Batch Sync Jobs for Elysia
+Runs user syncs as durable queue jobs (retried per user) and syncs a batch's profiles in bulk once its users finish
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from data_sync import ElysiaDataSync
+from job_queue import JobQueue
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SYNC_USER_JOB = "sync_user"
+SYNC_PROFILES_JOB = "sync_profiles"
+
+SYNC_TYPES = ("all", "transactions", "backfill", "accounts", "profile")
+
+async def run_user_sync(sync: ElysiaDataSync, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one sync described by a request or job payload"""
+    user_id = payload["user_id"]
+    sync_type = payload.get("sync_type", "all")
+
+    if sync_type == "all":
+        return await sync.sync_all_user_data(user_id, include_profile=payload.get("include_profile", True))
+    if sync_type == "transactions":
+        return await sync.sync_user_transactions(
+            user_id, limit=payload.get("limit") or 500, incremental=payload.get("incremental", True)
+        )
+    if sync_type == "backfill":
+        return await sync.backfill_user_transactions(user_id, chunk_size=payload.get("chunk_size"))
+    if sync_type == "accounts":
+        return await sync.sync_user_accounts(user_id)
+    if sync_type == "profile":
+        return await sync.sync_user_profile(user_id)
+    raise ValueError(f"Invalid sync type {sync_type}")
+
+def _failures(result: Dict[str, Any]) -> Dict[str, str]:
+    """Errors of a sync result, per data type"""
+    parts = result.get("results", {"sync": result})
+    return {
+        data_type: part.get("error") or part.get("status", "error")
+        for data_type, part in parts.items()
+        if part.get("status") not in ("success", "no_data")
+    }
+
+def register_sync_jobs(queue: JobQueue, get_sync: Callable[[], Awaitable[ElysiaDataSync]]):
+    """Register the sync job handlers; `get_sync` returns the connected sync service"""
+
+    async def sync_user(job: Dict[str, Any]) -> Dict[str, Any]:
+        sync = await get_sync()
+        payload = job["payload"]
+        result = await run_user_sync(sync, payload)
+
+        failures = _failures(result)
+        if failures:
+            # Raising hands the job back to the queue for a retry with backoff;
+            # the upsert path skips whatever already made it into Weaviate
+            raise RuntimeError(f"Sync of user {payload['user_id']} failed: {failures}")
+
+        if payload.get("sync_type", "all") == "all":
+            # Warm the recurring-charge cache at the freshly synced data version
+            recurring = await sync.get_recurring_charges(payload["user_id"])
+            result["recurring_charges"] = len(recurring["charges"])
+        return result
+
+    async def sync_profiles(job: Dict[str, Any]) -> Dict[str, Any]:
+        sync = await get_sync()
+        batch = queue.get_batch(job["payload"]["batch_id"])
+        # One set-based metrics query and one Weaviate batch for every user that synced
+        user_ids = [member["payload"]["user_id"] for member in batch["jobs"] if member["status"] == "succeeded"]
+        result = await sync.sync_user_profiles_bulk(user_ids)
+        if result.get("status") == "error":
+            raise RuntimeError(f"Bulk profile sync failed: {result.get('error')}")
+        return result
+
+    queue.register(SYNC_USER_JOB, sync_user)
+    queue.register(SYNC_PROFILES_JOB, sync_profiles)
+
+def start_batch(queue: JobQueue, user_ids: List[str]) -> Dict[str, Any]:
+    """Queue a sync job per user, followed by one bulk profile job for the batch"""
+    user_ids = list(dict.fromkeys(user_ids))
+    batch = queue.enqueue_batch(
+        SYNC_USER_JOB,
+        ({"user_id": user_id, "sync_type": "all", "include_profile": False} for user_id in user_ids),
+        finalizer=(SYNC_PROFILES_JOB, {}),
+    )
+    logger.info(f"Batch sync {batch['batch_id']} queued for {len(user_ids)} users ({batch['deduplicated']} already pending)")
+    return {**batch, "user_count": len(user_ids)}
+
+def batch_status(queue: JobQueue, batch_id: str, include_results: bool = True) -> Optional[Dict[str, Any]]:
+    """Progress and per-user outcome of a batch sync"""
+    batch = queue.get_batch(batch_id)
+    if not batch:
+        return None
+
+    summary: Dict[str, int] = {}
+    users: Dict[str, Dict[str, Any]] = {}
+    for job in batch["jobs"]:
+        summary[job["status"]] = summary.get(job["status"], 0) + 1
+        users[job["payload"]["user_id"]] = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "next_run_at": job["next_run_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "error": job["last_error"],
+            "result": job["result"],
+        }
+
+    profiles = batch["finalizer"]
+    if profiles and profiles["result"]:
+        profile_statuses = profiles["result"].get("profiles", {})
+        for user_id, entry in users.items():
+            if entry["status"] == "succeeded":
+                entry["profile"] = profile_statuses.get(user_id, "error")
+
+    finished = sum(summary.get(status, 0) for status in ("succeeded", "failed", "cancelled"))
+    if profiles and profiles["status"] in ("succeeded", "failed", "cancelled"):
+        status = "completed"
+    elif finished or summary.get("running"):
+        status = "running"
+    else:
+        status = "pending"
+
+    data = {
+        "job_id": batch_id,
+        "status": status,
+        "user_count": len(users),
+        "completed": finished,
+        "progress": round(finished / len(users), 4) if users else 1.0,
+        "summary": summary,
+        "created_at": batch["created_at"],
+        "profiles": {
+            "job_id": profiles["id"],
+            "status": profiles["status"],
+            **{key: value for key, value in (profiles["result"] or {}).items() if key != "profiles"},
+        } if profiles else None,
+    }
+    if include_results:
+        data["users"] = users
+    return data
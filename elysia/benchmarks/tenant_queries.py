@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-user Transaction query latency, shared collection vs tenants
+Runs the same filtered fetch and BM25 queries for a set of users against the
+shared Transaction collection (filtered by user_id) and against their tenant
+in TransactionMT, and reports latency percentiles for both layouts.
+
+Usage:
+    python benchmarks/tenant_queries.py --seed-users 200 --per-user 5000 [--mode user|bucket]
+    python benchmarks/tenant_queries.py --user-id USER_ID --user-id USER_ID_2
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Callable, List
+
+import weaviate
+from weaviate.classes.query import Filter
+from weaviate.classes.tenants import Tenant
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health_latency import report
+from tenancy import collection_name, tenant_for
+
+MERCHANTS = ["Starbucks", "Netflix", "Uber", "Whole Foods", "Shell", "Amazon", "Spotify", "Chipotle"]
+
+def seed(client, mode: str, users: List[str], per_user: int):
+    """Insert identical synthetic transactions into both layouts"""
+    shared_name = "Transaction"
+    tenant_name = collection_name("Transaction", mode)
+    tenant_collection = client.collections.get(tenant_name)
+
+    tenants = {tenant_for(user_id, mode) for user_id in users}
+    existing = set(tenant_collection.tenants.get())
+    tenant_collection.tenants.create([Tenant(name=t) for t in tenants - existing])
+
+    with client.batch.dynamic() as batch:
+        for user_id in users:
+            tenant = tenant_for(user_id, mode)
+            for i in range(per_user):
+                merchant = MERCHANTS[i % len(MERCHANTS)]
+                properties = {
+                    "transaction_id": f"{user_id}-{i}",
+                    "user_id": user_id,
+                    "amount": -float(i % 120) - 0.99,
+                    "name": f"{merchant} purchase",
+                    "merchant_name": merchant,
+                    "description_embedding": f"{merchant} purchase {merchant}",
+                }
+                batch.add_object(collection=shared_name, properties=properties)
+                batch.add_object(collection=tenant_name, properties=properties, tenant=tenant)
+    print(f"Seeded {len(users) * per_user} transactions for {len(users)} users into both layouts")
+
+def time_queries(users: List[str], iterations: int, run: Callable[[str], None]) -> List[float]:
+    """Run a query for random users and collect latencies"""
+    samples = []
+    for _ in range(iterations):
+        user_id = random.choice(users)
+        started = time.perf_counter()
+        run(user_id)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("WEAVIATE_HOST", "localhost"))
+    parser.add_argument("--mode", choices=["user", "bucket"], default=os.getenv("WEAVIATE_MULTI_TENANCY", "user"))
+    parser.add_argument("--user-id", action="append", default=[], help="Benchmark an existing user (repeatable)")
+    parser.add_argument("--seed-users", type=int, default=0, help="Seed this many synthetic users first")
+    parser.add_argument("--per-user", type=int, default=1000, help="Synthetic transactions per seeded user")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--query", default="coffee")
+    args = parser.parse_args()
+    if args.mode == "off":
+        parser.error("--mode must be user or bucket")
+
+    client = weaviate.connect_to_local(host=args.host, port=8080, grpc_port=50051)
+    try:
+        if not client.collections.exists(collection_name("Transaction", args.mode)):
+            parser.error("Run `WEAVIATE_MULTI_TENANCY=<mode> python data_sync.py init` first")
+
+        users = list(args.user_id)
+        if args.seed_users:
+            seeded = [f"bench-user-{i:05d}" for i in range(args.seed_users)]
+            seed(client, args.mode, seeded, args.per_user)
+            users += seeded
+        if not users:
+            parser.error("Pass --user-id or --seed-users")
+
+        shared = client.collections.get("Transaction")
+        tenants = client.collections.get(collection_name("Transaction", args.mode))
+
+        def shared_fetch(user_id):
+            shared.query.fetch_objects(filters=Filter.by_property("user_id").equal(user_id), limit=args.limit)
+
+        def shared_bm25(user_id):
+            shared.query.bm25(query=args.query, filters=Filter.by_property("user_id").equal(user_id), limit=args.limit)
+
+        def tenant_filter(user_id):
+            # Buckets still hold several users; per-user tenants need no filter
+            return Filter.by_property("user_id").equal(user_id) if args.mode == "bucket" else None
+
+        def tenant_fetch(user_id):
+            tenants.with_tenant(tenant_for(user_id, args.mode)).query.fetch_objects(
+                filters=tenant_filter(user_id), limit=args.limit
+            )
+
+        def tenant_bm25(user_id):
+            tenants.with_tenant(tenant_for(user_id, args.mode)).query.bm25(
+                query=args.query, filters=tenant_filter(user_id), limit=args.limit
+            )
+
+        total = shared.aggregate.over_all(total_count=True).total_count
+        print(f"Shared Transaction collection: {total} objects; {len(users)} users; tenancy mode {args.mode}")
+
+        # Warm both layouts before measuring
+        for run in (shared_fetch, tenant_fetch, shared_bm25, tenant_bm25):
+            time_queries(users, 20, run)
+
+        report("shared fetch  ", time_queries(users, args.iterations, shared_fetch))
+        report("tenant fetch  ", time_queries(users, args.iterations, tenant_fetch))
+        report("shared bm25   ", time_queries(users, args.iterations, shared_bm25))
+        report("tenant bm25   ", time_queries(users, args.iterations, tenant_bm25))
+    finally:
+        client.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
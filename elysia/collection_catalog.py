@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Collection Catalog for Elysia
+Caches Weaviate collections with object counts, property schemas and preprocessing status for /collections
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from data_sync import ElysiaDataSync
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds between background refreshes of the catalog
+COLLECTIONS_CACHE_TTL = float(os.getenv("COLLECTIONS_CACHE_TTL", "60"))
+
+# Elysia keeps its preprocessing output here
+ELYSIA_METADATA_COLLECTION = "ELYSIA_METADATA__"
+
+def build_snapshot(sync: ElysiaDataSync) -> Dict[str, Any]:
+    """Read every user-facing collection's schema, size and preprocessing status (blocking)"""
+    client = sync.client
+    configs = client.collections.list_all(simple=False)
+
+    preprocessed = set()
+    if ELYSIA_METADATA_COLLECTION in configs:
+        metadata = client.collections.get(ELYSIA_METADATA_COLLECTION)
+        for item in metadata.iterator(return_properties=["name"]):
+            preprocessed.add(item.properties.get("name"))
+
+    collections: Dict[str, Dict[str, Any]] = {}
+    for name, config in sorted(configs.items()):
+        if name.startswith("ELYSIA_"):
+            continue
+
+        collection = client.collections.get(name)
+        multi_tenant = bool(config.multi_tenancy_config and config.multi_tenancy_config.enabled)
+        if multi_tenant:
+            # Counting would mean one aggregate per tenant; report the tenants instead
+            object_count = None
+            tenants = len(collection.tenants.get())
+        else:
+            object_count = collection.aggregate.over_all(total_count=True).total_count or 0
+            tenants = None
+
+        run = sync.state.get_preprocess_run(name)
+        collections[name] = {
+            "object_count": object_count,
+            "multi_tenancy": multi_tenant,
+            "tenants": tenants,
+            "properties": [
+                {"name": prop.name, "data_type": str(prop.data_type.value)}
+                for prop in config.properties
+            ],
+            "preprocessed": name in preprocessed,
+            "preprocessed_at": run["preprocessed_at"] if run else None,
+        }
+
+    return {
+        "collections": list(collections),
+        "preprocessed": [name for name, entry in collections.items() if entry["preprocessed"]],
+        "details": collections,
+        "refreshed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+class CollectionCatalog:
+    """Snapshot of the Weaviate collections, refreshed on a timer and on invalidation
+
+    Reads are served from memory. The snapshot is rebuilt every
+    `refresh_interval` seconds in the background, and on the next read
+    after `invalidate()` (called when schemas are created or collections
+    preprocessed). Concurrent rebuilds are collapsed into one.
+    """
+
+    def __init__(self, get_sync: Callable[[], Awaitable[ElysiaDataSync]], refresh_interval: float = COLLECTIONS_CACHE_TTL):
+        self.get_sync = get_sync
+        self.refresh_interval = refresh_interval
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.refreshed_at = 0.0
+        self.stale = True
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listening: Optional[ElysiaDataSync] = None
+
+        self.hits = 0
+        self.refreshes = 0
+
+    def invalidate(self):
+        """Rebuild the snapshot on the next read (safe to call from any thread)"""
+        self.stale = True
+
+    async def get(self) -> Dict[str, Any]:
+        """The current snapshot, rebuilding it first if it is missing, invalidated or expired"""
+        expired = time.monotonic() - self.refreshed_at > self.refresh_interval
+        if self.snapshot is None or self.stale or expired:
+            await self.refresh()
+            return {**self.snapshot, "cached": False}
+        self.hits += 1
+        return {**self.snapshot, "cached": True}
+
+    async def refresh(self):
+        """Rebuild the snapshot, unless another caller just did"""
+        started = time.monotonic()
+        async with self._lock:
+            if self.snapshot is not None and not self.stale and self.refreshed_at >= started:
+                return
+            sync = await self.get_sync()
+            if self._listening is not sync:
+                # Creating or migrating collections invalidates the catalog
+                sync.schema_listeners.append(self.invalidate)
+                self._listening = sync
+
+            # Clear first so an invalidation during the rebuild triggers another one
+            self.stale = False
+            try:
+                self.snapshot = await sync.run_weaviate(build_snapshot, sync)
+            except Exception:
+                self.stale = True
+                raise
+            self.refreshed_at = time.monotonic()
+            self.refreshes += 1
+
+    async def start(self):
+        """Refresh in the background every `refresh_interval` seconds"""
+        if not self._task:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        """Stop the background refresh"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_periodically(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Failed to refresh collection catalog: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters"""
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "age_seconds": round(time.monotonic() - self.refreshed_at, 1) if self.snapshot else None,
+        }
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Collection Preprocessing for Elysia
+Runs Elysia preprocessing on a dedicated thread pool, one collection per thread, only when a collection changed materially
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from elysia.preprocessing.collection import preprocess_async, preprocessed_collection_exists
+from elysia.util.client import ClientManager
+
+from data_sync import ElysiaDataSync
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Collections preprocessed in parallel (each run is mostly LLM and Weaviate I/O)
+PREPROCESS_MAX_WORKERS = int(os.getenv("PREPROCESS_MAX_WORKERS", "2"))
+
+# Relative change in object count that makes a preprocessed collection stale
+PREPROCESS_CHANGE_THRESHOLD = float(os.getenv("PREPROCESS_CHANGE_THRESHOLD", "0.2"))
+
+def collection_fingerprint(client, collection_name: str) -> Tuple[int, str]:
+    """Object count and a hash of the property schema of a collection
+
+    Multi-tenant collections cannot be aggregated as a whole, so their
+    count is the sum over their tenants.
+    """
+    collection = client.collections.get(collection_name)
+    config = collection.config.get()
+    if config.multi_tenancy_config and config.multi_tenancy_config.enabled:
+        count = sum(
+            collection.with_tenant(tenant).aggregate.over_all(total_count=True).total_count or 0
+            for tenant in collection.tenants.get()
+        )
+    else:
+        count = collection.aggregate.over_all(total_count=True).total_count or 0
+    properties = sorted((p.name, str(p.data_type)) for p in config.properties)
+    schema_hash = hashlib.sha256(json.dumps(properties).encode()).hexdigest()[:16]
+    return count, schema_hash
+
+def change_reason(
+    previous: Dict[str, Any],
+    object_count: int,
+    schema_hash: str,
+    threshold: float = PREPROCESS_CHANGE_THRESHOLD,
+) -> Optional[str]:
+    """Why a preprocessed collection needs preprocessing again, or None if it does not"""
+    if previous["schema_hash"] != schema_hash:
+        return "schema changed"
+    before = previous["object_count"]
+    if abs(object_count - before) / max(before, 1) > threshold:
+        return f"object count changed from {before} to {object_count}"
+    return None
+
+class CollectionPreprocessor:
+    """Preprocesses collections off the event loop and tracks per-collection progress
+
+    A collection is preprocessed when Elysia has no metadata for it, when
+    its property schema changed, or when its object count moved by more
+    than `change_threshold` since the run recorded in the sync state
+    store. Anything else is skipped unless the request forces it.
+    """
+
+    def __init__(self, max_workers: int = PREPROCESS_MAX_WORKERS, change_threshold: float = PREPROCESS_CHANGE_THRESHOLD):
+        self.change_threshold = change_threshold
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="elysia-preprocess")
+        # Live per-collection state of running jobs: job id -> collection -> state
+        self.progress: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    async def run(
+        self,
+        job_id: str,
+        collection_names: List[str],
+        sync: ElysiaDataSync,
+        force: bool = False,
+        on_progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Preprocess collections in parallel; raises if any of them failed"""
+        states = {name: {"status": "pending", "progress": 0.0} for name in collection_names}
+        self.progress[job_id] = states
+
+        def report():
+            if on_progress and states:
+                on_progress(sum(state["progress"] for state in states.values()) / len(states))
+
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(
+                loop.run_in_executor(self.executor, self._process, name, states[name], sync, force, report)
+                for name in collection_names
+            ))
+        finally:
+            self.progress.pop(job_id, None)
+
+        failed = {name: state["error"] for name, state in states.items() if state["status"] == "error"}
+        if failed:
+            # Collections that finished are recorded, so a retry only redoes the failed ones
+            raise RuntimeError(f"Preprocessing failed for {', '.join(failed)}: {failed}")
+        return states
+
+    def _process(self, collection_name: str, state: Dict[str, Any], sync: ElysiaDataSync, force: bool, report: Callable[[], None]):
+        """Check and, if needed, preprocess one collection (runs on a pool thread)"""
+        try:
+            state["status"] = "checking"
+            object_count, schema_hash = collection_fingerprint(sync.client, collection_name)
+            state["object_count"] = object_count
+
+            if force:
+                reason = "forced"
+            elif not preprocessed_collection_exists(collection_name):
+                reason = "not preprocessed"
+            else:
+                previous = sync.state.get_preprocess_run(collection_name)
+                if previous is None:
+                    # Preprocessed before runs were recorded: take the current state as the baseline
+                    sync.state.set_preprocess_run(collection_name, object_count, schema_hash)
+                    reason = None
+                else:
+                    reason = change_reason(previous, object_count, schema_hash, self.change_threshold)
+
+            if reason is None:
+                logger.info(f"Collection already preprocessed and unchanged: {collection_name}")
+                state.update(status="skipped", progress=1.0)
+                report()
+                return
+
+            logger.info(f"Preprocessing collection {collection_name} ({reason})")
+            state.update(status="running", reason=reason)
+            asyncio.run(self._preprocess(collection_name, state, report))
+            sync.state.set_preprocess_run(collection_name, object_count, schema_hash)
+            state.update(status="completed", progress=1.0)
+            logger.info(f"Completed preprocessing: {collection_name}")
+        except Exception as e:
+            logger.error(f"Preprocessing {collection_name} failed: {e}")
+            state.update(status="error", error=str(e))
+        report()
+
+    @staticmethod
+    async def _preprocess(collection_name: str, state: Dict[str, Any], report: Callable[[], None]):
+        """Drive Elysia's preprocessing generator, mirroring its progress updates"""
+        client_manager = ClientManager()
+        try:
+            async for update in preprocess_async(collection_name=collection_name, client_manager=client_manager, force=True):
+                if not update:
+                    continue
+                if update.get("error"):
+                    raise RuntimeError(update["error"])
+                state["progress"] = update.get("progress", state["progress"])
+                state["message"] = update.get("message")
+                report()
+        finally:
+            await client_manager.close_clients()
+
+    def shutdown(self):
+        """Stop the pool without waiting for runs in progress"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -5,22 +5,313 @@ Syncs user accounts and transactions from the main database to Weaviate
 """
 
 import os
+import time
+import asyncio
+import functools
 import logging
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
 import weaviate
 import weaviate.classes as wvc
 from weaviate.classes.config import Property, DataType
+from weaviate.classes.tenants import Tenant
 import asyncpg
 from pydantic import BaseModel, Field
 
+from sync_state import SyncStateStore
+from embeddings import EmbeddingService, create_embedding_service
+from tenancy import base_collection_name, collection_name, resolve_mode, tenant_for
+from spending_analytics import TransactionColumns
+from recurring_charges import detect_recurring_charges
+from metrics import (
+    DB_POOL_WAIT_SECONDS,
+    SYNC_OBJECTS,
+    SYNC_PHASE_SECONDS,
+    SYNC_ROWS,
+    SYNC_ROWS_PER_SECOND,
+    WEAVIATE_BATCH_ERRORS,
+    timed,
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns read for every transaction sync
+TRANSACTION_COLUMNS = """
+    t.id, t.user_id, t.account_id, t.amount, t.name,
+    t.category, t.date, t.pending, t.merchant_name,
+    t.payment_channel, t.location_lat, t.location_lon,
+    t.location_address, t.location_city, t.location_region,
+    t.created_at, t.updated_at
+"""
+
+# Keyset order for incremental syncs and backfills. Rows whose updated_at
+# was never set fall back to created_at and then the (non-null) date, so
+# every row is reachable from the watermark.
+TRANSACTION_SYNC_KEY = "COALESCE(t.updated_at, t.created_at, t.date)"
+
+# Maximum number of objects removed per Weaviate delete_many call
+DELETE_CHUNK_SIZE = 500
+
+# Properties left out of content hashes: they change on every sync or
+# refresh without the object's content changing
+VOLATILE_PROPERTIES = frozenset({"updated_at", "last_updated", "content_hash"})
+
+# Maximum number of ids per content-hash lookup
+HASH_LOOKUP_CHUNK_SIZE = 500
+
+# Property embedded as the object vector, per collection
+EMBEDDED_PROPERTIES = {"Transaction": "description_embedding"}
+
+# Watermark data type of the incremental sync writing each collection
+COLLECTION_WATERMARKS = {"Transaction": "transactions"}
+
+# Weight of the vector score against BM25 in hybrid transaction search
+SEARCH_HYBRID_ALPHA = float(os.getenv("SEARCH_HYBRID_ALPHA", "0.6"))
+
+# Threads embedding search queries; kept apart from the Weaviate I/O
+# executor so a slow embedding API never holds up Weaviate calls
+EMBEDDING_QUERY_THREADS = int(os.getenv("EMBEDDING_QUERY_THREADS", "2"))
+
+# PostgreSQL pool bounds; min_size connections are opened at connect time
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+
+def content_hash(properties: Dict[str, Any], salt: str = "") -> str:
+    """Stable hash of an object's non-volatile properties
+
+    `salt` folds in anything else the stored object depends on (e.g. the
+    embedding model), so changing it marks every object dirty.
+    """
+    stable = {k: v for k, v in properties.items() if k not in VOLATILE_PROPERTIES}
+    payload = salt + json.dumps(stable, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class UpsertStats:
+    """Inserted/updated/skipped/failed counts for one or more upserts"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        # Objects resolved from the local hash index without a Weaviate lookup
+        self.index_hits = 0
+        self.failed_uuids: set = set()
+        # Uuids written by a single upsert; not merged, so long syncs' stats stay small
+        self.written_uuids: set = set()
+
+    @property
+    def failed(self) -> int:
+        return len(self.failed_uuids)
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    def merge(self, other: "UpsertStats") -> "UpsertStats":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.index_hits += other.index_hits
+        self.failed_uuids |= other.failed_uuids
+        return self
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "index_hits": self.index_hits,
+        }
+
+# SQL migrations for tables owned by this service
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Advisory lock key serializing migration runs across processes (service, CLI)
+MIGRATIONS_LOCK_KEY = 0x656C7973  # "elys"
+
+# First line of a migration whose statements must run outside a transaction
+# (CREATE INDEX CONCURRENTLY on tables the app writes to)
+NO_TRANSACTION_DIRECTIVE = "-- elysia:no-transaction"
+
+# A failed CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would then skip
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)",
+    re.IGNORECASE,
+)
+
+# Invalid indexes by name in the current schema
+INVALID_INDEX_QUERY = """
+    SELECT 1 FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = $1 AND c.relnamespace = current_schema()::regnamespace
+    AND NOT i.indisvalid
+"""
+
+# Owner of a Plaid item. The app writes "Item" through Prisma, whose columns
+# keep their model names: Plaid's item id is "ITEM_ID" ("Item".id is the
+# app's own key) and the owner is "userId"
+ITEM_OWNER_QUERY = 'SELECT "userId" FROM "Item" WHERE "ITEM_ID" = $1 LIMIT 1'
+
+# Recompute a user's aggregates for the given months (NULL = every month)
+REFRESH_AGGREGATES_SQL = """
+    INSERT INTO elysia_monthly_spending (
+        user_id, month, category, total, income, spending,
+        count, min_amount, max_amount, updated_at
+    )
+    SELECT
+        t.user_id,
+        DATE_TRUNC('month', t.date)::date AS month,
+        COALESCE(NULLIF(t.category::json->>0, ''), 'Uncategorized') AS category,
+        SUM(t.amount),
+        SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END),
+        SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END),
+        COUNT(*),
+        MIN(t.amount),
+        MAX(t.amount),
+        CURRENT_TIMESTAMP
+    FROM "Transaction" t
+    WHERE t.user_id = $1
+    AND t.date IS NOT NULL
+    AND ($2::date[] IS NULL OR DATE_TRUNC('month', t.date)::date = ANY($2::date[]))
+    GROUP BY 1, 2, 3
+"""
+
+# Profile metrics for a set of users (one row per existing user)
+PROFILE_METRICS_SQL = """
+    WITH users AS (
+        SELECT id, email, created_at
+        FROM "User"
+        WHERE id = ANY($1::text[])
+    ),
+    account_totals AS (
+        SELECT
+            user_id,
+            SUM(CASE WHEN type IN ('depository', 'investment') THEN balance_current ELSE 0 END) as total_assets,
+            SUM(CASE WHEN type IN ('credit', 'loan') THEN balance_current ELSE 0 END) as total_liabilities
+        FROM "Account"
+        WHERE user_id = ANY($1::text[])
+        GROUP BY user_id
+    ),
+    -- Read from the monthly aggregates instead of scanning raw transactions
+    transaction_stats AS (
+        SELECT
+            user_id,
+            SUM(income) / NULLIF(COUNT(DISTINCT month), 0) as avg_income,
+            SUM(spending) / NULLIF(COUNT(DISTINCT month), 0) as avg_expense
+        FROM elysia_monthly_spending
+        WHERE user_id = ANY($1::text[])
+        AND month >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')
+        GROUP BY user_id
+    )
+    SELECT
+        u.id as user_id,
+        u.email,
+        u.created_at,
+        COALESCE(at.total_assets, 0) as total_assets,
+        COALESCE(at.total_liabilities, 0) as total_liabilities,
+        COALESCE(ts.avg_income, 0) as monthly_income,
+        COALESCE(ts.avg_expense, 0) as monthly_expenses,
+        CASE
+            WHEN ts.avg_income > 0 THEN
+                ((ts.avg_income - ts.avg_expense) / ts.avg_income)
+            ELSE 0
+        END as savings_rate
+    FROM users u
+    LEFT JOIN account_totals at ON at.user_id = u.id
+    LEFT JOIN transaction_stats ts ON ts.user_id = u.id
+"""
+
+# Rows fetched per round-trip when streaming bulk profile metrics
+PROFILE_BULK_PREFETCH = int(os.getenv("SYNC_PROFILE_PREFETCH", "500"))
+
+# Weaviate collection schemas by logical collection name
+COLLECTION_SCHEMAS = {
+    "Transaction": [
+        Property(name="transaction_id", data_type=DataType.TEXT),
+        Property(name="user_id", data_type=DataType.TEXT),
+        Property(name="account_id", data_type=DataType.TEXT),
+        Property(name="amount", data_type=DataType.NUMBER),
+        Property(name="name", data_type=DataType.TEXT),
+        Property(name="category", data_type=DataType.TEXT_ARRAY),
+        Property(name="date", data_type=DataType.TEXT),
+        Property(name="pending", data_type=DataType.BOOL),
+        Property(name="merchant_name", data_type=DataType.TEXT),
+        Property(name="payment_channel", data_type=DataType.TEXT),
+        Property(name="month_year", data_type=DataType.TEXT),
+        Property(name="description_embedding", data_type=DataType.TEXT),
+        Property(name="content_hash", data_type=DataType.TEXT),
+    ],
+    "Account": [
+        Property(name="account_id", data_type=DataType.TEXT),
+        Property(name="user_id", data_type=DataType.TEXT),
+        Property(name="name", data_type=DataType.TEXT),
+        Property(name="type", data_type=DataType.TEXT),
+        Property(name="subtype", data_type=DataType.TEXT),
+        Property(name="balance_current", data_type=DataType.NUMBER),
+        Property(name="balance_available", data_type=DataType.NUMBER),
+        Property(name="balance_limit", data_type=DataType.NUMBER),
+        Property(name="currency", data_type=DataType.TEXT),
+        Property(name="institution_name", data_type=DataType.TEXT),
+        Property(name="last_updated", data_type=DataType.TEXT),
+        Property(name="content_hash", data_type=DataType.TEXT),
+    ],
+    "UserProfile": [
+        Property(name="user_id", data_type=DataType.TEXT),
+        Property(name="email", data_type=DataType.TEXT),
+        Property(name="total_assets", data_type=DataType.NUMBER),
+        Property(name="total_liabilities", data_type=DataType.NUMBER),
+        Property(name="monthly_income", data_type=DataType.NUMBER),
+        Property(name="monthly_expenses", data_type=DataType.NUMBER),
+        Property(name="savings_rate", data_type=DataType.NUMBER),
+        Property(name="risk_tolerance", data_type=DataType.TEXT),
+        Property(name="financial_goals", data_type=DataType.TEXT_ARRAY),
+        Property(name="created_at", data_type=DataType.TEXT),
+        Property(name="updated_at", data_type=DataType.TEXT),
+        Property(name="content_hash", data_type=DataType.TEXT),
+    ],
+}
+
+# Seconds a computed /sync/status entry is served before recomputing
+SYNC_STATUS_CACHE_TTL = float(os.getenv("SYNC_STATUS_CACHE_TTL", "30"))
+
+def records_sync(data_type: str):
+    """Record each call's outcome in the sync history (and drop cached status)"""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, user_id: str, *args, **kwargs):
+            result = await method(self, user_id, *args, **kwargs)
+            self._record_sync(user_id, data_type, result)
+            return result
+        return wrapper
+    return decorator
+
+def migration_statements(sql: str) -> List[str]:
+    """Split a migration into statements, dropping comment lines (no semicolons inside statements)"""
+    code = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+    return [statement.strip() for statement in code.split(";") if statement.strip()]
+
+def concurrent_index_name(statement: str) -> Optional[str]:
+    """Name of the index a CREATE INDEX CONCURRENTLY IF NOT EXISTS statement builds"""
+    match = CONCURRENT_INDEX_PATTERN.match(statement)
+    return match.group(1) if match else None
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive timestamps (PostgreSQL timestamp columns) as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 class TransactionData(BaseModel):
     """Transaction data model"""
     transaction_id: str
@@ -66,7 +357,14 @@ class UserFinancialProfile(BaseModel):
 class ElysiaDataSync:
     """Handles data synchronization between PostgreSQL and Weaviate"""
 
-    def __init__(self, weaviate_url: str = None, db_url: str = None):
+    def __init__(
+        self,
+        weaviate_url: str = None,
+        db_url: str = None,
+        state_path: str = None,
+        embeddings: Optional[EmbeddingService] = None,
+        tenancy: str = None,
+    ):
         """Initialize the data sync service"""
         self.weaviate_url = weaviate_url or os.getenv("WCD_URL", "http://weaviate:8080")
         # Use postgres hostname when running inside Docker, localhost otherwise
@@ -76,12 +374,42 @@ class ElysiaDataSync:
         self.db_url = db_url or os.getenv("DATABASE_URL", default_db_url)
         self.client = None
         self.db_pool = None
+        self.connected = False
+        self.state = SyncStateStore(state_path)
+        # Weaviate multi-tenancy mode (off, user or bucket) and tenants known to exist
+        self.tenancy = resolve_mode(tenancy)
+        self._known_tenants: set = set()
+        # Vectors for semantic search; None keeps BM25-only search
+        self.embeddings = embeddings if embeddings is not None else create_embedding_service()
+        # Recurring charges per user, tagged with the data version they were computed at
+        self.recurring_cache: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        # Computed sync status per user with its expiry (monotonic seconds);
+        # entries are dropped whenever a sync for that user finishes
+        self.status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Callbacks run after collections are created or migrated (e.g. the collection catalog)
+        self.schema_listeners: List[Callable[[], None]] = []
+        # The Weaviate client is synchronous; its calls run on a dedicated
+        # executor so they never block the event loop
+        self.weaviate_io_threads = int(os.getenv("WEAVIATE_IO_THREADS", "4"))
+        self._weaviate_executor = ThreadPoolExecutor(
+            max_workers=self.weaviate_io_threads,
+            thread_name_prefix="weaviate-io",
+        )
+        self._embedding_executor = ThreadPoolExecutor(
+            max_workers=EMBEDDING_QUERY_THREADS,
+            thread_name_prefix="embedding",
+        )
 
     async def connect(self):
-        """Connect to Weaviate and PostgreSQL"""
+        """Connect to Weaviate and PostgreSQL
+
+        A failed or cancelled attempt closes whatever it opened, so the
+        same instance can simply try again.
+        """
         try:
             # Connect to Weaviate
-            self.client = weaviate.connect_to_local(
+            self.client = await self.run_weaviate(
+                weaviate.connect_to_local,
                 host=self.weaviate_url.replace("http://", "").replace(":8080", ""),
                 port=8080,
                 grpc_port=50051
@@ -89,172 +417,823 @@ class ElysiaDataSync:
             logger.info(f"Connected to Weaviate at {self.weaviate_url}")
 
             # Connect to PostgreSQL
-            self.db_pool = await asyncpg.create_pool(self.db_url, min_size=1, max_size=10)
-            logger.info("Connected to PostgreSQL database")
+            self.db_pool = await asyncpg.create_pool(
+                self.db_url, min_size=DB_POOL_MIN_SIZE, max_size=max(DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE)
+            )
+            logger.info(f"Connected to PostgreSQL database (pool {DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE})")
+
+            # Apply migrations for our own PostgreSQL tables
+            await self.apply_migrations()
 
             # Initialize schemas
             await self.initialize_schemas()
+            self.connected = True
 
-        except Exception as e:
-            logger.error(f"Failed to connect: {e}")
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                logger.error(f"Failed to connect: {e}")
+            await self._close_connections()
             raise
 
-    async def disconnect(self):
-        """Disconnect from databases"""
+    async def warm_up(self) -> Dict[str, float]:
+        """Exercise every connection path once so the first request does not pay for it
+
+        Opens the gRPC channel with a one-object read per shared collection,
+        runs a query on every idle pool connection and starts the Weaviate
+        I/O threads. Returns the time spent per step in seconds.
+        """
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        await asyncio.gather(*(self.run_weaviate(time.sleep, 0.01) for _ in range(self.weaviate_io_threads)))
+        ready = await self.run_weaviate(self.client.is_ready)
+        if not ready:
+            raise RuntimeError("Weaviate is not ready")
+        if self.tenancy == "off":
+            await asyncio.gather(*(
+                self.run_weaviate(self.client.collections.get(name).query.fetch_objects, limit=1)
+                for name in COLLECTION_SCHEMAS
+            ))
+        timings["weaviate"] = round(time.perf_counter() - started, 4)
+
+        started = time.perf_counter()
+
+        async def ping():
+            async with self.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+
+        await asyncio.gather(*(ping() for _ in range(max(self.db_pool.get_idle_size(), 1))))
+        timings["postgres"] = round(time.perf_counter() - started, 4)
+
+        logger.info(f"Sync service warmed up: {timings}")
+        return timings
+
+    async def _close_connections(self):
+        """Close the Weaviate client and PostgreSQL pool, keeping executors and caches for a reconnect"""
+        self.connected = False
         if self.client:
-            self.client.close()
+            await self.run_weaviate(self.client.close)
+            self.client = None
         if self.db_pool:
             await self.db_pool.close()
+            self.db_pool = None
+
+    async def disconnect(self):
+        """Disconnect from databases and release executors and caches (safe to call more than once)"""
+        await self._close_connections()
+        self._weaviate_executor.shutdown(wait=True)
+        self._embedding_executor.shutdown(wait=True)
+        if self.embeddings and self.embeddings.disk_cache:
+            self.embeddings.disk_cache.close()
+        self.state.close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a pool connection, recording how long the acquire waited"""
+        started = time.perf_counter()
+        async with self.db_pool.acquire() as conn:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+            yield conn
+
+    async def run_weaviate(self, func, *args, **kwargs):
+        """Run a blocking Weaviate client call on the Weaviate I/O executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._weaviate_executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a search query on the embedding executor (the embedder may call a remote API)"""
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(self._embedding_executor, self.embeddings.embed, [text])
+        return vectors[0]
+
+    async def apply_migrations(self):
+        """Apply pending SQL migrations from the migrations directory
+
+        The service and the CLI both migrate on connect; an advisory lock
+        makes a concurrent run wait and then see what the first one applied.
+        The lock is session-level rather than transaction-level so it also
+        covers migrations that cannot run inside a transaction.
+        """
+        async with self.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_KEY)
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS elysia_schema_migrations (
+                        version TEXT PRIMARY KEY,
+                        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                applied = {row["version"] for row in await conn.fetch("SELECT version FROM elysia_schema_migrations")}
+
+                for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+                    if not filename.endswith(".sql") or filename in applied:
+                        continue
+                    with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+                        sql = f.read()
+                    if sql.lstrip().startswith(NO_TRANSACTION_DIRECTIVE):
+                        # One statement at a time: a multi-statement string runs as one implicit transaction
+                        for statement in migration_statements(sql):
+                            index_name = concurrent_index_name(statement)
+                            if index_name and await conn.fetchval(INVALID_INDEX_QUERY, index_name):
+                                logger.warning(f"Dropping invalid index {index_name} left by a failed build")
+                                await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+                            await conn.execute(statement)
+                        await conn.execute("INSERT INTO elysia_schema_migrations (version) VALUES ($1)", filename)
+                    else:
+                        async with conn.transaction():
+                            await conn.execute(sql)
+                            await conn.execute("INSERT INTO elysia_schema_migrations (version) VALUES ($1)", filename)
+                    logger.info(f"Applied migration {filename}")
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_KEY)
 
     async def initialize_schemas(self):
         """Create Weaviate schemas for financial data"""
         try:
             # Check if collections exist
-            existing_collections = self.client.collections.list_all()
-            existing_names = [col.name for col in existing_collections]
-
-            # Create Transaction collection
-            if "Transaction" not in existing_names:
-                self.client.collections.create(
-                    name="Transaction",
-                    properties=[
-                        Property(name="transaction_id", data_type=DataType.TEXT),
-                        Property(name="user_id", data_type=DataType.TEXT),
-                        Property(name="account_id", data_type=DataType.TEXT),
-                        Property(name="amount", data_type=DataType.NUMBER),
-                        Property(name="name", data_type=DataType.TEXT),
-                        Property(name="category", data_type=DataType.TEXT_ARRAY),
-                        Property(name="date", data_type=DataType.TEXT),
-                        Property(name="pending", data_type=DataType.BOOL),
-                        Property(name="merchant_name", data_type=DataType.TEXT),
-                        Property(name="payment_channel", data_type=DataType.TEXT),
-                        Property(name="month_year", data_type=DataType.TEXT),
-                        Property(name="description_embedding", data_type=DataType.TEXT),
-                    ],
-                    vectorizer_config=wvc.config.Configure.Vectorizer.none(),
-                )
-                logger.info("Created Transaction collection")
-
-            # Create Account collection
-            if "Account" not in existing_names:
-                self.client.collections.create(
-                    name="Account",
-                    properties=[
-                        Property(name="account_id", data_type=DataType.TEXT),
-                        Property(name="user_id", data_type=DataType.TEXT),
-                        Property(name="name", data_type=DataType.TEXT),
-                        Property(name="type", data_type=DataType.TEXT),
-                        Property(name="subtype", data_type=DataType.TEXT),
-                        Property(name="balance_current", data_type=DataType.NUMBER),
-                        Property(name="balance_available", data_type=DataType.NUMBER),
-                        Property(name="balance_limit", data_type=DataType.NUMBER),
-                        Property(name="currency", data_type=DataType.TEXT),
-                        Property(name="institution_name", data_type=DataType.TEXT),
-                        Property(name="last_updated", data_type=DataType.TEXT),
-                    ],
-                    vectorizer_config=wvc.config.Configure.Vectorizer.none(),
-                )
-                logger.info("Created Account collection")
-
-            # Create UserProfile collection
-            if "UserProfile" not in existing_names:
-                self.client.collections.create(
-                    name="UserProfile",
-                    properties=[
-                        Property(name="user_id", data_type=DataType.TEXT),
-                        Property(name="email", data_type=DataType.TEXT),
-                        Property(name="total_assets", data_type=DataType.NUMBER),
-                        Property(name="total_liabilities", data_type=DataType.NUMBER),
-                        Property(name="monthly_income", data_type=DataType.NUMBER),
-                        Property(name="monthly_expenses", data_type=DataType.NUMBER),
-                        Property(name="savings_rate", data_type=DataType.NUMBER),
-                        Property(name="risk_tolerance", data_type=DataType.TEXT),
-                        Property(name="financial_goals", data_type=DataType.TEXT_ARRAY),
-                        Property(name="created_at", data_type=DataType.TEXT),
-                        Property(name="updated_at", data_type=DataType.TEXT),
-                    ],
-                    vectorizer_config=wvc.config.Configure.Vectorizer.none(),
-                )
-                logger.info("Created UserProfile collection")
-
+            existing_names = set(await self.run_weaviate(self.client.collections.list_all))
+
+            for base_name, properties in COLLECTION_SCHEMAS.items():
+                name = collection_name(base_name, self.tenancy)
+                if name not in existing_names:
+                    await self.run_weaviate(
+                        self.client.collections.create,
+                        name=name,
+                        properties=properties,
+                        vectorizer_config=wvc.config.Configure.Vectorizer.none(),
+                        multi_tenancy_config=self._multi_tenancy_config(),
+                    )
+                    # Hashes, watermarks and synced objects recorded against a previous
+                    # collection no longer hold: the next sync has to push everything again
+                    self.state.clear_hashes(name)
+                    self.state.clear_objects(base_name)
+                    if base_name in COLLECTION_WATERMARKS:
+                        self.state.clear_watermarks(COLLECTION_WATERMARKS[base_name])
+                    logger.info(f"Created {name} collection")
+                else:
+                    # Collections created before content hashing lack the property
+                    await self.run_weaviate(self._ensure_content_hash_property, name)
+
+            self._notify_schema_listeners()
             logger.info("Schema initialization complete")
 
         except Exception as e:
             logger.error(f"Failed to initialize schemas: {e}")
             raise
 
-    async def sync_user_transactions(self, user_id: str, limit: int = 500) -> Dict[str, Any]:
-        """Sync user transactions from PostgreSQL to Weaviate"""
+    def _notify_schema_listeners(self):
+        """Tell listeners that collections were created or changed"""
+        for listener in self.schema_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.warning(f"Schema listener failed: {e}")
+
+    def _ensure_content_hash_property(self, name: str):
+        """Add the content_hash property to an existing collection if missing"""
+        collection = self.client.collections.get(name)
+        properties = {prop.name for prop in collection.config.get().properties}
+        if "content_hash" not in properties:
+            collection.config.add_property(Property(name="content_hash", data_type=DataType.TEXT))
+            logger.info(f"Added content_hash property to {name}")
+
+    def _multi_tenancy_config(self):
+        """Multi-tenancy settings for new collections (None when tenancy is off)"""
+        if self.tenancy == "off":
+            return None
+        return wvc.config.Configure.multi_tenancy(
+            enabled=True,
+            auto_tenant_creation=True,
+            auto_tenant_activation=True,
+        )
+
+    async def get_collection(self, base_name: str, user_id: str):
+        """Collection handle holding a user's objects of one logical collection
+
+        With multi-tenancy on this is the user's tenant of the multi-tenant
+        collection (created on first use); otherwise the shared collection,
+        which callers filter by user_id.
+        """
+        name = collection_name(base_name, self.tenancy)
+        collection = self.client.collections.get(name)
+        tenant = tenant_for(user_id, self.tenancy)
+        if tenant is None:
+            return collection
+
+        if (name, tenant) not in self._known_tenants:
+            await self.run_weaviate(self._ensure_tenant, collection, tenant)
+            self._known_tenants.add((name, tenant))
+        return collection.with_tenant(tenant)
+
+    def user_filter(self, user_id: str):
+        """Filter restricting a query to one user's objects
+
+        None in per-user tenancy, where the tenant already holds only that
+        user's objects; shared collections and buckets filter on user_id.
+        """
+        if self.tenancy == "user":
+            return None
+        return wvc.query.Filter.by_property("user_id").equal(user_id)
+
+    def _ensure_tenant(self, collection, tenant: str):
+        """Create a tenant if it does not exist yet"""
+        if not collection.tenants.exists(tenant):
+            collection.tenants.create([Tenant(name=tenant)])
+            logger.info(f"Created tenant {tenant} in {collection.name}")
+
+    async def migrate_to_tenants(self) -> Dict[str, Any]:
+        """Copy objects from the shared collections into their tenants
+
+        Objects keep their uuids, properties (including content hashes) and
+        vectors, so the next sync skips them. The shared collections are
+        left in place; drop them once the tenant collections are verified.
+        """
+        if self.tenancy == "off":
+            return {"status": "error", "error": "Set WEAVIATE_MULTI_TENANCY to user or bucket first"}
+
+        started = time.perf_counter()
+        results = {}
+        for base_name in COLLECTION_SCHEMAS:
+            results[base_name] = await self.run_weaviate(self._migrate_collection, base_name)
+            logger.info(f"Migrated {base_name}: {results[base_name]}")
+        self._notify_schema_listeners()
+
+        failed = sum(result["failed"] for result in results.values())
+        return {
+            "status": "success" if not failed else "partial",
+            "mode": self.tenancy,
+            "collections": results,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _migrate_collection(self, base_name: str) -> Dict[str, int]:
+        """Stream one shared collection into the tenants of its multi-tenant twin"""
+        target_name = collection_name(base_name, self.tenancy)
+        if not self.client.collections.exists(base_name):
+            return {"migrated": 0, "skipped": 0, "failed": 0, "tenants": 0}
+
+        source = self.client.collections.get(base_name)
+        target = self.client.collections.get(target_name)
+        tenants = set()
+        migrated = skipped = 0
+
+        with self.client.batch.dynamic() as batch:
+            for obj in source.iterator(include_vector=True):
+                user_id = obj.properties.get("user_id")
+                if not user_id:
+                    skipped += 1
+                    continue
+
+                tenant = tenant_for(user_id, self.tenancy)
+                if tenant not in tenants:
+                    self._ensure_tenant(target, tenant)
+                    tenants.add(tenant)
+                    self._known_tenants.add((target_name, tenant))
+
+                batch.add_object(
+                    collection=target_name,
+                    properties=obj.properties,
+                    uuid=obj.uuid,
+                    vector=(obj.vector or {}).get("default"),
+                    tenant=tenant,
+                )
+                migrated += 1
+
+        failed = len(self.client.batch.failed_objects)
+        if failed:
+            logger.error(f"{failed} objects failed to migrate into {target_name}")
+        return {"migrated": migrated - failed, "skipped": skipped, "failed": failed, "tenants": len(tenants)}
+
+    @records_sync("transactions")
+    async def sync_user_transactions(self, user_id: str, limit: int = 500, incremental: bool = True) -> Dict[str, Any]:
+        """Sync user transactions from PostgreSQL to Weaviate
+
+        Incremental mode only fetches rows changed since the user's stored
+        (sync key, id) watermark, in pages of `limit` rows, and removes
+        rows that were deleted in PostgreSQL. Full mode re-pushes the newest
+        `limit` rows.
+        """
+        if incremental:
+            return await self._sync_transactions_incremental(user_id, limit)
+
+        started = time.perf_counter()
         try:
-            async with self.db_pool.acquire() as conn:
+            async with self.acquire() as conn:
                 # Fetch transactions from PostgreSQL
-                query = """
-                    SELECT
-                        t.id, t.user_id, t.account_id, t.amount, t.name,
-                        t.category, t.date, t.pending, t.merchant_name,
-                        t.payment_channel, t.location_lat, t.location_lon,
-                        t.location_address, t.location_city, t.location_region,
-                        t.created_at, t.updated_at
+                query = f"""
+                    SELECT {TRANSACTION_COLUMNS}
                     FROM "Transaction" t
                     WHERE t.user_id = $1
                     ORDER BY t.date DESC
                     LIMIT $2
                 """
-                rows = await conn.fetch(query, user_id, limit)
+                rows = await self._fetch_transaction_rows(conn.fetch, query, user_id, limit)
 
                 if not rows:
                     logger.info(f"No transactions found for user {user_id}")
                     return {"synced": 0, "status": "no_data"}
 
                 # Prepare transactions for Weaviate
-                transaction_collection = self.client.collections.get("Transaction")
-                transactions_to_sync = []
-
-                for row in rows:
-                    # Create transaction object
-                    transaction_data = {
-                        "transaction_id": row["id"],
-                        "user_id": row["user_id"],
-                        "account_id": row["account_id"] or "",
-                        "amount": float(row["amount"]),
-                        "name": row["name"],
-                        "category": json.loads(row["category"]) if row["category"] else [],
-                        "date": row["date"].isoformat() if row["date"] else "",
-                        "pending": row["pending"],
-                        "merchant_name": row["merchant_name"] or "",
-                        "payment_channel": row["payment_channel"] or "",
-                        "month_year": row["date"].strftime("%Y-%m") if row["date"] else "",
-                        "description_embedding": f"{row['name']} {row['merchant_name'] or ''} {' '.join(json.loads(row['category']) if row['category'] else [])}",
-                    }
+                transaction_collection = await self.get_collection("Transaction", user_id)
+                transactions_to_sync = self._build_transaction_objects(rows)
+
+                # Upsert into Weaviate, skipping unchanged transactions
+                stats = await self.run_weaviate(self._upsert_objects, transaction_collection, transactions_to_sync)
+                self.state.add_objects(user_id, "Transaction", [row["id"] for row in rows])
+
+            aggregate_rows = await self.refresh_monthly_aggregates(user_id, self._touched_months(user_id, rows))
+            self._record_months(user_id, rows)
+
+            self._record_throughput("Transaction", len(rows), started)
+            logger.info(f"Synced {len(transactions_to_sync)} transactions for user {user_id}: {stats.to_dict()}")
+            if stats.written:
+                self._bump_data_version(user_id)
+
+            return {
+                "synced": len(transactions_to_sync),
+                "status": "success" if not stats.failed else "partial",
+                "mode": "full",
+                **stats.to_dict(),
+                "aggregate_rows": aggregate_rows,
+                "last_sync": datetime.now().isoformat()
+            }
 
-                    # Generate UUID for Weaviate
-                    uuid = self._generate_uuid(f"transaction_{row['id']}")
-                    transactions_to_sync.append((uuid, transaction_data))
+        except Exception as e:
+            logger.error(f"Failed to sync transactions: {e}")
+            return {"synced": 0, "status": "error", "error": str(e)}
 
-                # Batch import to Weaviate
-                with transaction_collection.batch.dynamic() as batch:
-                    for uuid, data in transactions_to_sync:
-                        batch.add_object(
-                            properties=data,
-                            uuid=uuid
+    async def _sync_transactions_incremental(self, user_id: str, page_size: int) -> Dict[str, Any]:
+        """Sync only transactions changed since the last watermark"""
+        started = time.perf_counter()
+        synced = 0
+        aggregate_rows = 0
+        stats = UpsertStats()
+        try:
+            async with self.acquire() as conn:
+                transaction_collection = await self.get_collection("Transaction", user_id)
+                watermark = self.state.get_watermark(user_id, "transactions")
+                had_watermark = watermark is not None
+
+                while True:
+                    if watermark:
+                        query = f"""
+                            SELECT {TRANSACTION_COLUMNS}, {TRANSACTION_SYNC_KEY} AS sync_key
+                            FROM "Transaction" t
+                            WHERE t.user_id = $1
+                            AND ({TRANSACTION_SYNC_KEY}, t.id) > ($2, $3)
+                            ORDER BY {TRANSACTION_SYNC_KEY}, t.id
+                            LIMIT $4
+                        """
+                        rows = await self._fetch_transaction_rows(
+                            conn.fetch, query, user_id, watermark[0], watermark[1], page_size
                         )
+                    else:
+                        query = f"""
+                            SELECT {TRANSACTION_COLUMNS}, {TRANSACTION_SYNC_KEY} AS sync_key
+                            FROM "Transaction" t
+                            WHERE t.user_id = $1
+                            ORDER BY {TRANSACTION_SYNC_KEY}, t.id
+                            LIMIT $2
+                        """
+                        rows = await self._fetch_transaction_rows(conn.fetch, query, user_id, page_size)
+
+                    if not rows:
+                        break
+
+                    transactions_to_sync = self._build_transaction_objects(rows)
+                    page_stats = await self.run_weaviate(
+                        self._upsert_objects, transaction_collection, transactions_to_sync
+                    )
+                    if page_stats.failed:
+                        # Keep the watermark where it is so the page is retried
+                        raise RuntimeError(f"{page_stats.failed} transactions failed to import")
+                    stats.merge(page_stats)
+                    self.state.add_objects(user_id, "Transaction", [row["id"] for row in rows])
+                    if page_stats.written:
+                        self._bump_data_version(user_id)
+
+                    # Aggregates are brought up to date before the watermark moves past
+                    # the page, so a failure on a later page cannot leave them stale
+                    aggregate_rows += await self.refresh_monthly_aggregates(
+                        user_id, self._touched_months(user_id, rows), conn
+                    )
+                    self._record_months(user_id, rows)
+                    watermark = (rows[-1]["sync_key"], rows[-1]["id"])
+                    self.state.set_watermark(user_id, "transactions", *watermark)
+                    synced += len(rows)
 
-                logger.info(f"Synced {len(transactions_to_sync)} transactions for user {user_id}")
+                    if len(rows) < page_size:
+                        break
 
-                return {
-                    "synced": len(transactions_to_sync),
-                    "status": "success",
-                    "last_sync": datetime.now().isoformat()
-                }
+                deleted = await self._reconcile_deleted_transactions(conn, user_id, transaction_collection)
+
+            if not had_watermark and synced == 0 and deleted == 0:
+                logger.info(f"No transactions found for user {user_id}")
+                return {"synced": 0, "deleted": 0, "status": "no_data", "mode": "incremental"}
+
+            # Deleted rows are gone from PostgreSQL, so a deletion rebuilds every month
+            if deleted:
+                aggregate_rows = await self.refresh_monthly_aggregates(user_id)
+                self._bump_data_version(user_id)
+
+            self._record_throughput("Transaction", synced, started)
+            logger.info(
+                f"Incrementally synced {synced} transactions ({deleted} deleted) for user {user_id}: {stats.to_dict()}"
+            )
+
+            return {
+                "synced": synced,
+                "deleted": deleted,
+                "status": "success",
+                "mode": "incremental",
+                **stats.to_dict(),
+                "aggregate_rows": aggregate_rows,
+                "last_sync": datetime.now().isoformat()
+            }
 
         except Exception as e:
-            logger.error(f"Failed to sync transactions: {e}")
-            return {"synced": 0, "status": "error", "error": str(e)}
+            logger.error(f"Failed to sync transactions incrementally: {e}")
+            return {"synced": synced, "status": "error", "mode": "incremental", "error": str(e)}
+
+    @records_sync("transactions")
+    async def backfill_user_transactions(self, user_id: str, chunk_size: int = None) -> Dict[str, Any]:
+        """Stream a user's full transaction history from PostgreSQL to Weaviate
+
+        Rows are read through a server-side cursor and written to Weaviate
+        one chunk at a time, so memory stays flat regardless of history size.
+        The incremental watermark is advanced to the newest row seen.
+        """
+        chunk_size = chunk_size or int(os.getenv("SYNC_BACKFILL_CHUNK_SIZE", "1000"))
+        started = time.perf_counter()
+        synced = 0
+        chunks = 0
+        stats = UpsertStats()
+
+        try:
+            async with self.acquire() as conn:
+                transaction_collection = await self.get_collection("Transaction", user_id)
+                query = f"""
+                    SELECT {TRANSACTION_COLUMNS}, {TRANSACTION_SYNC_KEY} AS sync_key
+                    FROM "Transaction" t
+                    WHERE t.user_id = $1
+                    ORDER BY {TRANSACTION_SYNC_KEY}, t.id
+                """
+
+                # Server-side cursors only exist inside a transaction
+                async with conn.transaction():
+                    cursor = await conn.cursor(query, user_id)
+                    while True:
+                        rows = await self._fetch_transaction_rows(cursor.fetch, chunk_size)
+                        if not rows:
+                            break
+
+                        chunk_stats = await self.run_weaviate(
+                            self._upsert_objects,
+                            transaction_collection,
+                            self._build_transaction_objects(rows),
+                        )
+                        if chunk_stats.failed:
+                            raise RuntimeError(f"{chunk_stats.failed} transactions failed to import")
+                        stats.merge(chunk_stats)
+                        if chunk_stats.written:
+                            self._bump_data_version(user_id)
+
+                        self.state.add_objects(user_id, "Transaction", [row["id"] for row in rows])
+                        self._record_months(user_id, rows)
+                        watermark = (rows[-1]["sync_key"], rows[-1]["id"])
+                        self.state.set_watermark(user_id, "transactions", *watermark)
+
+                        synced += len(rows)
+                        chunks += 1
+                        elapsed = time.perf_counter() - started
+                        logger.info(
+                            f"Backfill for user {user_id}: {synced} rows in {elapsed:.1f}s "
+                            f"({synced / elapsed:.0f} rows/s)"
+                        )
 
+                deleted = await self._reconcile_deleted_transactions(conn, user_id, transaction_collection)
+
+            elapsed = time.perf_counter() - started
+            if synced == 0:
+                logger.info(f"No transactions found for user {user_id}")
+                return {"synced": 0, "deleted": deleted, "status": "no_data", "mode": "backfill"}
+
+            aggregate_rows = await self.refresh_monthly_aggregates(user_id)
+
+            self._record_throughput("Transaction", synced, started)
+            logger.info(f"Backfilled {synced} transactions for user {user_id} in {elapsed:.1f}s: {stats.to_dict()}")
+            if deleted:
+                self._bump_data_version(user_id)
+
+            return {
+                "synced": synced,
+                "deleted": deleted,
+                "status": "success",
+                "mode": "backfill",
+                **stats.to_dict(),
+                "aggregate_rows": aggregate_rows,
+                "chunk_size": chunk_size,
+                "chunks": chunks,
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(synced / elapsed, 1) if elapsed > 0 else None,
+                "last_sync": datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to backfill transactions: {e}")
+            if stats.written:
+                # Chunks before the failure are written and watermarked; rebuild their aggregates now
+                try:
+                    await self.refresh_monthly_aggregates(user_id)
+                except Exception as refresh_error:
+                    logger.error(f"Failed to refresh aggregates after backfill error: {refresh_error}")
+            return {"synced": synced, "status": "error", "mode": "backfill", "error": str(e)}
+
+    async def refresh_monthly_aggregates(
+        self, user_id: str, months: Optional[Iterable[date]] = None, conn: Optional[asyncpg.Connection] = None
+    ) -> int:
+        """Recompute a user's monthly aggregates for the given months, or all months
+
+        Runs on `conn` when the caller already holds a connection. Returns
+        the number of aggregate rows written.
+        """
+        month_list = sorted(set(months)) if months is not None else None
+        if month_list == []:
+            return 0
+
+        if conn is None:
+            async with self.acquire() as conn:
+                return await self.refresh_monthly_aggregates(user_id, month_list, conn)
+
+        async with conn.transaction():
+            await conn.execute(
+                """
+                DELETE FROM elysia_monthly_spending
+                WHERE user_id = $1
+                AND ($2::date[] IS NULL OR month = ANY($2::date[]))
+                """,
+                user_id, month_list
+            )
+            status = await conn.execute(REFRESH_AGGREGATES_SQL, user_id, month_list)
+
+        written = int(status.split()[-1])
+        logger.info(f"Refreshed {written} monthly aggregate rows for user {user_id}")
+        return written
+
+    async def get_monthly_aggregates(
+        self,
+        user_id: str,
+        start_month: Optional[date] = None,
+        end_month: Optional[date] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Read a user's monthly aggregates, optionally bounded by month and category"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT month, category, total, income, spending, count, min_amount, max_amount
+                FROM elysia_monthly_spending
+                WHERE user_id = $1
+                AND ($2::date IS NULL OR month >= $2)
+                AND ($3::date IS NULL OR month <= $3)
+                AND ($4::text IS NULL OR LOWER(category) = LOWER($4))
+                ORDER BY month, category
+                """,
+                user_id, start_month, end_month, category
+            )
+
+        return [
+            {
+                "month": row["month"].strftime("%Y-%m"),
+                "category": row["category"],
+                "total": float(row["total"]),
+                "income": float(row["income"]),
+                "spending": float(row["spending"]),
+                "count": row["count"],
+                "min_amount": float(row["min_amount"]),
+                "max_amount": float(row["max_amount"]),
+            }
+            for row in rows
+        ]
+
+    def _row_months(self, rows) -> Dict[str, date]:
+        """First-of-month date of each transaction row that has a date"""
+        months = {}
+        for row in rows:
+            value = row["date"]
+            if value is None:
+                continue
+            if isinstance(value, datetime):
+                value = value.date()
+            months[row["id"]] = value.replace(day=1)
+        return months
+
+    def _touched_months(self, user_id: str, rows) -> set:
+        """Months whose aggregates a batch of rows changes
+
+        That is each row's month plus, for rows whose date moved to another
+        month, the month recorded when the row was last synced.
+        """
+        previous = self.state.get_object_months(user_id, "Transaction", [row["id"] for row in rows])
+        return set(self._row_months(rows).values()) | {date.fromisoformat(month) for month in previous.values()}
+
+    def _record_months(self, user_id: str, rows):
+        """Remember the month each row was synced in, for _touched_months"""
+        self.state.set_object_months(
+            user_id, "Transaction", {object_id: month.isoformat() for object_id, month in self._row_months(rows).items()}
+        )
+
+    async def _reconcile_deleted_transactions(self, conn, user_id: str, transaction_collection) -> int:
+        """Remove transactions from Weaviate that no longer exist in PostgreSQL"""
+        # Cheap count check first; only diff ids when the counts disagree.
+        # Incremental pages reach every row (see TRANSACTION_SYNC_KEY), so
+        # the counts match unless rows were deleted.
+        pg_count = await conn.fetchval(
+            'SELECT COUNT(*) FROM "Transaction" WHERE user_id = $1', user_id
+        )
+        if pg_count == self.state.count_objects(user_id, "Transaction"):
+            return 0
+
+        rows = await conn.fetch('SELECT id FROM "Transaction" WHERE user_id = $1', user_id)
+        live_ids = {row["id"] for row in rows}
+        tombstones = [
+            object_id for object_id in self.state.list_object_ids(user_id, "Transaction")
+            if object_id not in live_ids
+        ]
+
+        for start in range(0, len(tombstones), DELETE_CHUNK_SIZE):
+            chunk = tombstones[start:start + DELETE_CHUNK_SIZE]
+            uuids = [self._generate_uuid(f"transaction_{object_id}") for object_id in chunk]
+            await self.run_weaviate(
+                transaction_collection.data.delete_many,
+                where=wvc.query.Filter.by_id().contains_any(uuids)
+            )
+            self.state.remove_objects(user_id, "Transaction", chunk)
+            self.state.remove_hashes(user_id, transaction_collection.name, uuids)
+
+        if tombstones:
+            logger.info(f"Removed {len(tombstones)} deleted transactions for user {user_id}")
+        return len(tombstones)
+
+    async def _fetch_transaction_rows(self, fetch, *args) -> list:
+        """Run a transaction fetch, recording its duration and the rows read"""
+        with timed(SYNC_PHASE_SECONDS, collection="Transaction", phase="postgres_fetch"):
+            rows = await fetch(*args)
+        SYNC_ROWS.labels(collection="Transaction").inc(len(rows))
+        return rows
+
+    def _build_transaction_objects(self, rows) -> List[Tuple[str, Dict[str, Any]]]:
+        """Transform transaction rows into Weaviate objects, recording the time spent"""
+        with timed(SYNC_PHASE_SECONDS, collection="Transaction", phase="transform"):
+            return [self._build_transaction_object(row) for row in rows]
+
+    @staticmethod
+    def _record_throughput(base_name: str, rows: int, started: float):
+        """Publish the rows per second of a finished sync run"""
+        elapsed = time.perf_counter() - started
+        if rows and elapsed > 0:
+            SYNC_ROWS_PER_SECOND.labels(collection=base_name).set(rows / elapsed)
+
+    def _build_transaction_object(self, row) -> Tuple[str, Dict[str, Any]]:
+        """Convert a PostgreSQL transaction row into a Weaviate (uuid, properties) pair"""
+        category = json.loads(row["category"]) if row["category"] else []
+        transaction_data = {
+            "transaction_id": row["id"],
+            "user_id": row["user_id"],
+            "account_id": row["account_id"] or "",
+            "amount": float(row["amount"]),
+            "name": row["name"],
+            "category": category,
+            "date": row["date"].isoformat() if row["date"] else "",
+            "pending": row["pending"],
+            "merchant_name": row["merchant_name"] or "",
+            "payment_channel": row["payment_channel"] or "",
+            "month_year": row["date"].strftime("%Y-%m") if row["date"] else "",
+            "description_embedding": f"{row['name']} {row['merchant_name'] or ''} {' '.join(category)}",
+        }
+
+        # Generate UUID for Weaviate
+        uuid = self._generate_uuid(f"transaction_{row['id']}")
+        return uuid, transaction_data
+
+    def _write_batch(
+        self,
+        collection,
+        objects: Iterable[Tuple[str, Dict[str, Any]]],
+        vectors: Optional[List[List[float]]] = None,
+    ) -> set:
+        """Batch import (uuid, properties) pairs, returning the uuids that failed
+
+        Batch imports replace any existing object with the same uuid.
+        """
+        objects = list(objects)
+        vectors = vectors or [None] * len(objects)
+        base_name = base_collection_name(collection.name)
+        with timed(SYNC_PHASE_SECONDS, collection=base_name, phase="weaviate_flush"):
+            with collection.batch.dynamic() as batch:
+                for (uuid, data), vector in zip(objects, vectors):
+                    batch.add_object(
+                        properties=data,
+                        uuid=uuid,
+                        vector=vector
+                    )
+
+        failed = {str(obj.object_.uuid) for obj in collection.batch.failed_objects}
+        if failed:
+            WEAVIATE_BATCH_ERRORS.labels(collection=base_name).inc(len(failed))
+            logger.error(f"{len(failed)} objects failed to import into {collection.name}")
+        return failed
+
+    def _fetch_content_hashes(self, collection, uuids: List[str]) -> Dict[str, Optional[str]]:
+        """Stored content hashes for the given uuids (objects that exist only)"""
+        hashes: Dict[str, Optional[str]] = {}
+        for i in range(0, len(uuids), HASH_LOOKUP_CHUNK_SIZE):
+            chunk = uuids[i:i + HASH_LOOKUP_CHUNK_SIZE]
+            response = collection.query.fetch_objects(
+                filters=wvc.query.Filter.by_id().contains_any(chunk),
+                limit=len(chunk),
+                return_properties=["content_hash"],
+            )
+            for obj in response.objects:
+                hashes[str(obj.uuid)] = obj.properties.get("content_hash")
+        return hashes
+
+    def _upsert_objects(self, collection, objects: List[Tuple[str, Dict[str, Any]]]) -> UpsertStats:
+        """Insert new objects, replace changed ones and skip unchanged ones
+
+        Each object is stamped with a content hash of its non-volatile
+        properties. Hashes are first checked against the local index in the
+        state store; only objects it has never seen are looked up in
+        Weaviate, and only dirty objects are written.
+        """
+        stats = UpsertStats()
+        if not objects:
+            return stats
+
+        base_name = base_collection_name(collection.name)
+        embedded_property = EMBEDDED_PROPERTIES.get(base_name) if self.embeddings else None
+        salt = self.embeddings.name if embedded_property else ""
+
+        hashed = []
+        by_user: Dict[str, List[str]] = {}
+        for uuid, properties in objects:
+            hashed.append((uuid, {**properties, "content_hash": content_hash(properties, salt)}))
+            by_user.setdefault(properties["user_id"], []).append(uuid)
+
+        known: Dict[str, str] = {}
+        with timed(SYNC_PHASE_SECONDS, collection=base_name, phase="hash_lookup"):
+            for user_id, uuids in by_user.items():
+                known.update(self.state.get_hashes(user_id, collection.name, uuids))
+
+            unknown = [uuid for uuid, _ in hashed if uuid not in known]
+            existing = self._fetch_content_hashes(collection, unknown) if unknown else {}
+        stats.index_hits = len(hashed) - len(unknown)
+
+        to_write = []
+        new_uuids = set()
+        verified: Dict[str, Dict[str, str]] = {}
+        for uuid, properties in hashed:
+            stored = known.get(uuid, existing.get(uuid))
+            if uuid not in known and uuid not in existing:
+                new_uuids.add(uuid)
+                to_write.append((uuid, properties))
+            elif stored != properties["content_hash"]:
+                to_write.append((uuid, properties))
+            else:
+                stats.skipped += 1
+                if uuid not in known:
+                    verified.setdefault(properties["user_id"], {})[uuid] = properties["content_hash"]
+
+        if to_write:
+            # Only dirty objects are embedded; the service caches repeated texts
+            vectors = None
+            if embedded_property:
+                with timed(SYNC_PHASE_SECONDS, collection=base_name, phase="embed"):
+                    vectors = self.embeddings.embed([properties[embedded_property] for _, properties in to_write])
+            stats.failed_uuids = self._write_batch(collection, to_write, vectors)
+        for uuid, properties in to_write:
+            if uuid not in stats.failed_uuids:
+                verified.setdefault(properties["user_id"], {})[uuid] = properties["content_hash"]
+        for user_id, hashes in verified.items():
+            self.state.set_hashes(user_id, collection.name, hashes)
+
+        written = {uuid for uuid, _ in to_write} - stats.failed_uuids
+        stats.written_uuids = written
+        stats.inserted = len(written & new_uuids)
+        stats.updated = len(written - new_uuids)
+        for outcome in ("inserted", "updated", "skipped", "failed"):
+            count = getattr(stats, outcome)
+            if count:
+                SYNC_OBJECTS.labels(collection=base_name, outcome=outcome).inc(count)
+        return stats
+
+    @records_sync("accounts")
     async def sync_user_accounts(self, user_id: str) -> Dict[str, Any]:
         """Sync user accounts from PostgreSQL to Weaviate"""
         try:
-            async with self.db_pool.acquire() as conn:
+            async with self.acquire() as conn:
                 # Fetch accounts from PostgreSQL
                 query = """
                     SELECT
@@ -273,7 +1252,7 @@ class ElysiaDataSync:
                     return {"synced": 0, "status": "no_data"}
 
                 # Prepare accounts for Weaviate
-                account_collection = self.client.collections.get("Account")
+                account_collection = await self.get_collection("Account", user_id)
                 accounts_to_sync = []
 
                 for row in rows:
@@ -294,19 +1273,17 @@ class ElysiaDataSync:
                     uuid = self._generate_uuid(f"account_{row['id']}")
                     accounts_to_sync.append((uuid, account_data))
 
-                # Batch import to Weaviate
-                with account_collection.batch.dynamic() as batch:
-                    for uuid, data in accounts_to_sync:
-                        batch.add_object(
-                            properties=data,
-                            uuid=uuid
-                        )
+                # Upsert into Weaviate, skipping unchanged accounts
+                stats = await self.run_weaviate(self._upsert_objects, account_collection, accounts_to_sync)
 
-                logger.info(f"Synced {len(accounts_to_sync)} accounts for user {user_id}")
+                logger.info(f"Synced {len(accounts_to_sync)} accounts for user {user_id}: {stats.to_dict()}")
+                if stats.written:
+                    self._bump_data_version(user_id)
 
                 return {
                     "synced": len(accounts_to_sync),
-                    "status": "success",
+                    "status": "success" if not stats.failed else "partial",
+                    **stats.to_dict(),
                     "last_sync": datetime.now().isoformat()
                 }
 
@@ -314,81 +1291,36 @@ class ElysiaDataSync:
             logger.error(f"Failed to sync accounts: {e}")
             return {"synced": 0, "status": "error", "error": str(e)}
 
+    @records_sync("profile")
     async def sync_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Create/update user financial profile in Weaviate"""
         try:
-            async with self.db_pool.acquire() as conn:
-                # Fetch user data
-                user_query = """
-                    SELECT id, email, created_at, updated_at
-                    FROM "User"
-                    WHERE id = $1
-                """
-                user = await conn.fetchrow(user_query, user_id)
+            async with self.acquire() as conn:
+                # User lookup and financial metrics in a single round-trip
+                row = await conn.fetchrow(PROFILE_METRICS_SQL, [user_id])
 
-                if not user:
+                if not row:
                     return {"status": "user_not_found"}
 
-                # Calculate financial metrics
-                metrics_query = """
-                    WITH account_totals AS (
-                        SELECT
-                            SUM(CASE WHEN type IN ('depository', 'investment') THEN balance_current ELSE 0 END) as total_assets,
-                            SUM(CASE WHEN type IN ('credit', 'loan') THEN balance_current ELSE 0 END) as total_liabilities
-                        FROM "Account"
-                        WHERE user_id = $1
-                    ),
-                    transaction_stats AS (
-                        SELECT
-                            AVG(CASE WHEN amount > 0 THEN amount ELSE 0 END) as avg_income,
-                            AVG(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as avg_expense,
-                            COUNT(DISTINCT DATE_TRUNC('month', date)) as months_of_data
-                        FROM "Transaction"
-                        WHERE user_id = $1
-                        AND date >= CURRENT_DATE - INTERVAL '6 months'
-                    )
-                    SELECT
-                        COALESCE(at.total_assets, 0) as total_assets,
-                        COALESCE(at.total_liabilities, 0) as total_liabilities,
-                        COALESCE(ts.avg_income * 30, 0) as monthly_income,
-                        COALESCE(ts.avg_expense * 30, 0) as monthly_expenses,
-                        CASE
-                            WHEN ts.avg_income > 0 THEN
-                                ((ts.avg_income - ts.avg_expense) / ts.avg_income)
-                            ELSE 0
-                        END as savings_rate
-                    FROM account_totals at, transaction_stats ts
-                """
-                metrics = await conn.fetchrow(metrics_query, user_id)
-
-                # Create user profile
-                profile_data = {
-                    "user_id": user_id,
-                    "email": user["email"],
-                    "total_assets": float(metrics["total_assets"]),
-                    "total_liabilities": float(metrics["total_liabilities"]),
-                    "monthly_income": float(metrics["monthly_income"]),
-                    "monthly_expenses": float(metrics["monthly_expenses"]),
-                    "savings_rate": float(metrics["savings_rate"]),
-                    "risk_tolerance": "moderate",  # Default, can be updated based on user preferences
-                    "financial_goals": [],  # Can be populated from user settings
-                    "created_at": user["created_at"].isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                }
+                uuid, profile_data = self._build_profile_object(row)
 
                 # Save to Weaviate
-                profile_collection = self.client.collections.get("UserProfile")
-                uuid = self._generate_uuid(f"profile_{user_id}")
+                profile_collection = await self.get_collection("UserProfile", user_id)
 
-                profile_collection.data.insert(
-                    properties=profile_data,
-                    uuid=uuid
+                # Upsert: deterministic UUIDs make plain inserts fail after the first sync
+                stats = await self.run_weaviate(
+                    self._upsert_objects, profile_collection, [(uuid, profile_data)]
                 )
+                if stats.failed:
+                    return {"status": "error", "error": "Profile failed to import", **stats.to_dict()}
 
-                logger.info(f"Synced profile for user {user_id}")
+                logger.info(f"Synced profile for user {user_id}: {stats.to_dict()}")
+                if stats.written:
+                    self._bump_data_version(user_id)
 
                 return {
                     "status": "success",
+                    **stats.to_dict(),
                     "profile": profile_data,
                     "last_sync": datetime.now().isoformat()
                 }
@@ -397,7 +1329,88 @@ class ElysiaDataSync:
             logger.error(f"Failed to sync user profile: {e}")
             return {"status": "error", "error": str(e)}
 
-    async def sync_all_user_data(self, user_id: str) -> Dict[str, Any]:
+    async def sync_user_profiles_bulk(self, user_ids: List[str], prefetch: int = None) -> Dict[str, Any]:
+        """Create/update the financial profiles of many users at once
+
+        Metrics for every user come from one set-based query whose rows are
+        streamed through a server-side cursor, and all profiles are written
+        in a single Weaviate batch (one per tenant with multi-tenancy on).
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        prefetch = prefetch or PROFILE_BULK_PREFETCH
+        profiles: Dict[str, str] = {user_id: "user_not_found" for user_id in user_ids}
+        if not user_ids:
+            return {"status": "no_data", "synced": 0, "failed": 0, "profiles": profiles}
+
+        started = time.monotonic()
+        try:
+            objects = []
+            async with self.acquire() as conn:
+                async with conn.transaction():
+                    async for row in conn.cursor(PROFILE_METRICS_SQL, user_ids, prefetch=prefetch):
+                        objects.append(self._build_profile_object(row))
+
+            # One batch per tenant; a single batch when multi-tenancy is off
+            groups: Dict[Optional[str], List[Tuple[str, Dict[str, Any]]]] = {}
+            for obj in objects:
+                groups.setdefault(tenant_for(obj[1]["user_id"], self.tenancy), []).append(obj)
+
+            stats = UpsertStats()
+            written_uuids = set()
+            for group in groups.values():
+                profile_collection = await self.get_collection("UserProfile", group[0][1]["user_id"])
+                group_stats = await self.run_weaviate(self._upsert_objects, profile_collection, group)
+                written_uuids |= group_stats.written_uuids
+                stats.merge(group_stats)
+
+            for uuid, props in objects:
+                if uuid in stats.failed_uuids:
+                    profiles[props["user_id"]] = "error"
+                else:
+                    profiles[props["user_id"]] = "success"
+                    # Only users whose profile changed lose their cached answers
+                    if uuid in written_uuids:
+                        self._bump_data_version(props["user_id"])
+            for user_id, status in profiles.items():
+                self._record_sync(user_id, "profile", {"status": status})
+
+            synced = sum(1 for status in profiles.values() if status == "success")
+            elapsed = time.monotonic() - started
+            logger.info(f"Bulk synced {synced}/{len(user_ids)} profiles in {elapsed:.2f}s: {stats.to_dict()}")
+
+            return {
+                "status": "success" if not stats.failed else "partial",
+                "synced": synced,
+                **stats.to_dict(),
+                "missing": sum(1 for status in profiles.values() if status == "user_not_found"),
+                "elapsed_seconds": round(elapsed, 3),
+                "profiles": profiles,
+                "last_sync": datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to bulk sync user profiles: {e}")
+            return {"status": "error", "synced": 0, "error": str(e), "profiles": {u: "error" for u in user_ids}}
+
+    def _build_profile_object(self, row) -> Tuple[str, Dict[str, Any]]:
+        """Convert a profile metrics row into a (uuid, properties) pair"""
+        user_id = row["user_id"]
+        properties = {
+            "user_id": user_id,
+            "email": row["email"],
+            "total_assets": float(row["total_assets"]),
+            "total_liabilities": float(row["total_liabilities"]),
+            "monthly_income": float(row["monthly_income"]),
+            "monthly_expenses": float(row["monthly_expenses"]),
+            "savings_rate": float(row["savings_rate"]),
+            "risk_tolerance": "moderate",  # Default, can be updated based on user preferences
+            "financial_goals": [],  # Can be populated from user settings
+            "created_at": row["created_at"].isoformat(),
+            "updated_at": datetime.now().isoformat(),
+        }
+        return self._generate_uuid(f"profile_{user_id}"), properties
+
+    async def sync_all_user_data(self, user_id: str, include_profile: bool = True) -> Dict[str, Any]:
         """Sync all user data (profile, accounts, transactions)"""
         results = {
             "user_id": user_id,
@@ -405,17 +1418,17 @@ class ElysiaDataSync:
             "results": {}
         }
 
-        # Sync profile
-        profile_result = await self.sync_user_profile(user_id)
-        results["results"]["profile"] = profile_result
-
-        # Sync accounts
-        accounts_result = await self.sync_user_accounts(user_id)
+        # Accounts and transactions touch separate collections and each use
+        # their own pool connection, so they can run concurrently. The profile
+        # reads the monthly aggregates the transaction sync refreshes, so it runs after.
+        accounts_result, transactions_result = await asyncio.gather(
+            self.sync_user_accounts(user_id),
+            self.sync_user_transactions(user_id),
+        )
         results["results"]["accounts"] = accounts_result
-
-        # Sync transactions
-        transactions_result = await self.sync_user_transactions(user_id)
         results["results"]["transactions"] = transactions_result
+        if include_profile:
+            results["results"]["profile"] = await self.sync_user_profile(user_id)
 
         # Overall status
         all_success = all(
@@ -426,6 +1439,153 @@ class ElysiaDataSync:
 
         return results
 
+    async def load_transaction_columns(self, user_id: str, since: Optional[datetime] = None) -> TransactionColumns:
+        """Load a user's transactions from PostgreSQL as columnar arrays for analytics"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT t.amount, t.date, t.category, t.merchant_name, t.name
+                FROM "Transaction" t
+                WHERE t.user_id = $1
+                AND ($2::timestamp IS NULL OR t.date >= $2)
+                """,
+                user_id, since
+            )
+
+        def primary_category(raw: Optional[str]) -> str:
+            category = json.loads(raw) if raw else []
+            return category[0] if category else "Uncategorized"
+
+        return TransactionColumns.from_arrays(
+            amounts=[row["amount"] for row in rows],
+            dates=[row["date"].date() if row["date"] else "NaT" for row in rows],
+            categories=[primary_category(row["category"]) for row in rows],
+            merchants=[row["merchant_name"] or row["name"] or "Unknown" for row in rows],
+        )
+
+    async def get_user_for_item(self, item_id: str) -> Optional[str]:
+        """Resolve the owner of a Plaid item (webhooks identify items, not users)"""
+        async with self.acquire() as conn:
+            return await conn.fetchval(ITEM_OWNER_QUERY, item_id)
+
+    async def get_recurring_charges(self, user_id: str) -> Dict[str, Any]:
+        """Detect a user's recurring charges, cached until their data changes"""
+        version = await asyncio.to_thread(self.get_data_version, user_id)
+        cached = self.recurring_cache.get(user_id)
+        if cached and cached[0] == version:
+            return {"user_id": user_id, "cached": True, "charges": cached[1]}
+
+        # Thirteen months of history is enough to see annual charges twice
+        since = datetime.now() - timedelta(days=400)
+        columns = await self.load_transaction_columns(user_id, since=since)
+        charges = detect_recurring_charges(columns)
+        self.recurring_cache[user_id] = (version, charges)
+
+        return {"user_id": user_id, "cached": False, "charges": charges}
+
+    def get_data_version(self, user_id: str) -> int:
+        """Current data version for a user
+
+        The version is bumped whenever a sync writes the user's data and
+        lives in the state store, so syncs run by the CLI or another
+        process invalidate this process's caches keyed on it.
+        """
+        return self.state.get_data_version(user_id)
+
+    def _bump_data_version(self, user_id: str):
+        """Mark a user's synced data as changed"""
+        self.state.bump_data_version(user_id)
+
+    def _record_sync(self, user_id: str, data_type: str, result: Dict[str, Any]):
+        """Persist a sync outcome and invalidate the user's cached status"""
+        self.state.record_sync(user_id, data_type, result.get("status", "error"), result.get("error"))
+        self.status_cache.pop(user_id, None)
+
+    async def get_sync_status(self, user_id: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Object counts, last successful syncs and lag behind PostgreSQL
+
+        Counts come from Weaviate aggregate queries and source freshness
+        from one PostgreSQL round-trip. Results are cached per user for
+        SYNC_STATUS_CACHE_TTL seconds and dropped whenever a sync for the
+        user finishes, so polling dashboards rarely reach Weaviate.
+        """
+        if use_cache:
+            cached = self.status_cache.get(user_id)
+            if cached and cached[0] > time.monotonic():
+                return {**cached[1], "cached": True}
+
+        user_filter = self.user_filter(user_id)
+
+        async def count(base_name: str) -> int:
+            collection = await self.get_collection(base_name, user_id)
+            result = await self.run_weaviate(
+                collection.aggregate.over_all, total_count=True, filters=user_filter
+            )
+            return result.total_count or 0
+
+        async def source_stats():
+            async with self.acquire() as conn:
+                return await conn.fetchrow(
+                    """
+                    SELECT
+                        (SELECT COUNT(*) FROM "Transaction" WHERE user_id = $1) AS transaction_count,
+                        (SELECT MAX(updated_at) FROM "Transaction" WHERE user_id = $1) AS transaction_updated_at,
+                        (SELECT COUNT(*) FROM "Account" WHERE user_id = $1) AS account_count,
+                        (SELECT MAX(updated_at) FROM "Account" WHERE user_id = $1) AS account_updated_at
+                    """,
+                    user_id
+                )
+
+        transactions, accounts, profiles, source = await asyncio.gather(
+            count("Transaction"), count("Account"), count("UserProfile"), source_stats()
+        )
+        history = self.state.get_sync_history(user_id)
+
+        def last_success(data_type: str) -> Optional[datetime]:
+            value = history.get(data_type, {}).get("last_success")
+            return datetime.fromisoformat(value) if value else None
+
+        def lag_seconds(source_updated_at: Optional[datetime], synced_through: Optional[datetime]) -> Optional[float]:
+            """How far PostgreSQL's newest change is ahead of what has been synced"""
+            source_updated_at = _as_utc(source_updated_at)
+            if source_updated_at is None:
+                return 0.0
+            if synced_through is None:
+                return None
+            return max(0.0, (source_updated_at - _as_utc(synced_through)).total_seconds())
+
+        # Transactions are synced through their watermark; accounts through the last successful sync
+        watermark = self.state.get_watermark(user_id, "transactions")
+        transactions_synced_through = watermark[0] if watermark else last_success("transactions")
+
+        successes = [t for t in (last_success(d) for d in ("transactions", "accounts", "profile")) if t]
+        status = {
+            "user_id": user_id,
+            "last_sync": max(successes).isoformat() if successes else None,
+            "counts": {
+                "transactions": transactions,
+                "accounts": accounts,
+                "profile": profiles,
+            },
+            "source_counts": {
+                "transactions": source["transaction_count"],
+                "accounts": source["account_count"],
+            },
+            "last_success": {
+                data_type: history.get(data_type, {}).get("last_success")
+                for data_type in ("transactions", "accounts", "profile")
+            },
+            "last_status": {data_type: entry["last_status"] for data_type, entry in history.items()},
+            "lag_seconds": {
+                "transactions": lag_seconds(source["transaction_updated_at"], transactions_synced_through),
+                "accounts": lag_seconds(source["account_updated_at"], last_success("accounts")),
+            },
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        self.status_cache[user_id] = (time.monotonic() + SYNC_STATUS_CACHE_TTL, status)
+        return {**status, "cached": False}
+
     def _generate_uuid(self, seed: str) -> str:
         """Generate deterministic UUID from seed string"""
         hash_object = hashlib.md5(seed.encode())
@@ -434,21 +1594,49 @@ class ElysiaDataSync:
         return f"{hex_dig[:8]}-{hex_dig[8:12]}-4{hex_dig[13:16]}-{hex_dig[16:20]}-{hex_dig[20:32]}"
 
     async def search_transactions(self, user_id: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search user transactions using Weaviate"""
+        """Search a user's transactions by meaning and keywords
+
+        Uses hybrid (vector + BM25) search when an embedder is configured
+        and BM25 keyword search otherwise; results are always restricted to
+        the user's own transactions.
+        """
         try:
-            transaction_collection = self.client.collections.get("Transaction")
-
-            # Search with filters
-            results = transaction_collection.query.fetch_objects(
-                where=(
-                    wvc.query.Filter.by_property("user_id").equal(user_id)
-                ),
-                limit=limit
-            )
+            transaction_collection = await self.get_collection("Transaction", user_id)
+            user_filter = self.user_filter(user_id)
+            metadata = wvc.query.MetadataQuery(score=True)
+
+            if not query or not query.strip():
+                results = await self.run_weaviate(
+                    transaction_collection.query.fetch_objects,
+                    filters=user_filter,
+                    limit=limit
+                )
+            elif self.embeddings:
+                vector = await self.embed_query(query)
+                results = await self.run_weaviate(
+                    transaction_collection.query.hybrid,
+                    query=query,
+                    vector=vector,
+                    alpha=SEARCH_HYBRID_ALPHA,
+                    filters=user_filter,
+                    limit=limit,
+                    return_metadata=metadata
+                )
+            else:
+                results = await self.run_weaviate(
+                    transaction_collection.query.bm25,
+                    query=query,
+                    filters=user_filter,
+                    limit=limit,
+                    return_metadata=metadata
+                )
 
             transactions = []
             for obj in results.objects:
-                transactions.append(obj.properties)
+                transaction = dict(obj.properties)
+                if obj.metadata and obj.metadata.score is not None:
+                    transaction["score"] = obj.metadata.score
+                transactions.append(transaction)
 
             return transactions
 
@@ -458,17 +1646,17 @@ class ElysiaDataSync:
 
 # CLI for testing
 if __name__ == "__main__":
-    import asyncio
     import sys
 
     async def main():
         if len(sys.argv) < 2:
-            print("Usage: python data_sync.py <command> [user_id]")
-            print("Commands: init, sync-all, sync-transactions, sync-accounts, sync-profile")
+            print("Usage: python data_sync.py <command> [user_id] [chunk_size | query]")
+            print("Commands: init, sync-all, sync-transactions, sync-transactions-full, backfill-transactions, refresh-aggregates, sync-accounts, sync-profile, sync-profiles, search, migrate-tenants")
             return
 
         command = sys.argv[1]
         user_id = sys.argv[2] if len(sys.argv) > 2 else None
+        chunk_size = int(sys.argv[3]) if command == "backfill-transactions" and len(sys.argv) > 3 else None
 
         sync = ElysiaDataSync()
         await sync.connect()
@@ -489,6 +1677,23 @@ if __name__ == "__main__":
                 result = await sync.sync_user_transactions(user_id)
                 print(json.dumps(result, indent=2))
 
+            elif command == "sync-transactions-full" and user_id:
+                print(f"Re-syncing full transaction history for user {user_id}...")
+                sync.state.clear_watermark(user_id, "transactions")
+                sync.state.clear_hashes(collection_name("Transaction", sync.tenancy), user_id)
+                result = await sync.sync_user_transactions(user_id)
+                print(json.dumps(result, indent=2))
+
+            elif command == "backfill-transactions" and user_id:
+                print(f"Backfilling transaction history for user {user_id}...")
+                result = await sync.backfill_user_transactions(user_id, chunk_size=chunk_size)
+                print(json.dumps(result, indent=2))
+
+            elif command == "refresh-aggregates" and user_id:
+                print(f"Rebuilding monthly aggregates for user {user_id}...")
+                rows = await sync.refresh_monthly_aggregates(user_id)
+                print(json.dumps({"user_id": user_id, "aggregate_rows": rows}, indent=2))
+
             elif command == "sync-accounts" and user_id:
                 print(f"Syncing accounts for user {user_id}...")
                 result = await sync.sync_user_accounts(user_id)
@@ -499,6 +1704,23 @@ if __name__ == "__main__":
                 result = await sync.sync_user_profile(user_id)
                 print(json.dumps(result, indent=2))
 
+            elif command == "sync-profiles" and user_id:
+                user_ids = [u for u in user_id.split(",") if u]
+                print(f"Bulk syncing profiles for {len(user_ids)} users...")
+                result = await sync.sync_user_profiles_bulk(user_ids)
+                print(json.dumps(result, indent=2))
+
+            elif command == "search" and user_id and len(sys.argv) > 3:
+                query = " ".join(sys.argv[3:])
+                print(f"Searching transactions for user {user_id}: {query}")
+                results = await sync.search_transactions(user_id, query)
+                print(json.dumps(results, indent=2, default=str))
+
+            elif command == "migrate-tenants":
+                print(f"Migrating shared collections to multi-tenant collections ({sync.tenancy})...")
+                result = await sync.migrate_to_tenants()
+                print(json.dumps(result, indent=2))
+
             else:
                 print("Invalid command or missing user_id")
 
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Embedding Service for Elysia
+Pluggable text embedders with batching and a two-tier (memory + SQLite) cache keyed on normalized text
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from sync_state import default_data_dir
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Embedding configuration: none | openai | sentence-transformers
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "none").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_DISK_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_DISK_CACHE_MAX_ENTRIES", "200000"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a description: lowercased with collapsed whitespace"""
+    return _WHITESPACE.sub(" ", (text or "").strip().lower())
+
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "sentence-transformers": "all-MiniLM-L6-v2",
+}
+
+class Embedder(ABC):
+    """Turns a batch of texts into vectors"""
+
+    name = "none"
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """One vector per text, in input order"""
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from the OpenAI embeddings API"""
+
+    def __init__(self, model: str = None):
+        from openai import OpenAI
+
+        self.model = model or DEFAULT_MODELS["openai"]
+        self.name = f"openai/{self.model}"
+        self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeddings from a local sentence-transformers model"""
+
+    def __init__(self, model: str = None):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = model or DEFAULT_MODELS["sentence-transformers"]
+        self.name = f"sentence-transformers/{self.model}"
+        self._model = SentenceTransformer(self.model)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+        return vectors.tolist()
+
+EMBEDDERS = {
+    "openai": OpenAIEmbedder,
+    "sentence-transformers": SentenceTransformerEmbedder,
+}
+
+class EmbeddingDiskCache:
+    """SQLite-backed, size-bounded store of normalized text -> vector
+
+    Vectors are stored as float32 blobs per embedder, so switching models
+    never serves stale vectors. When the store grows past `max_entries`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = EMBEDDING_DISK_CACHE_MAX_ENTRIES):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", os.path.join(default_data_dir(), "embeddings.db"))
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache ready at {self.path} ({self._count} entries)")
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Look up vectors for texts, refreshing their recency"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for i in range(0, len(texts), 500):
+                chunk = texts[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchall()
+                for text, blob in rows:
+                    found[text] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text = ?",
+                    ((now, model, text) for text in found),
+                )
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        """Store vectors, evicting the least recently used beyond the size bound"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text, vector, last_used) VALUES (?, ?, ?, ?)",
+                (
+                    (model, text, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for text, vector in vectors.items()
+                ),
+            )
+            self._count += self._conn.total_changes - before
+
+            overflow = self._count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE (model, text) IN (
+                        SELECT model, text FROM embeddings ORDER BY last_used LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self._count -= overflow
+            self._conn.execute("COMMIT")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and bytes used on disk"""
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            entries = self._count
+        wal_path = f"{self.path}-wal"
+        wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "bytes_on_disk": page_count * page_size + wal_bytes,
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+class EmbeddingService:
+    """Batched embedding behind a two-tier cache keyed on normalized text
+
+    Transaction descriptions repeat heavily (the same merchant every week,
+    differing only in casing and whitespace), so each distinct normalized
+    text is embedded once. Lookups go to an in-memory LRU first, then the
+    optional disk cache, and only the remaining misses reach the embedder.
+    Safe to call from several executor threads.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        disk_cache: Optional[EmbeddingDiskCache] = None,
+    ):
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.disk_cache = disk_cache
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    @property
+    def name(self) -> str:
+        return self.embedder.name
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in order, calling the embedder only for uncached ones"""
+        keys = [normalize_text(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    vectors[key] = cached
+                    self.hits += 1
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing and self.disk_cache:
+            from_disk = self.disk_cache.get_many(self.name, missing)
+            if from_disk:
+                vectors.update(from_disk)
+                self._remember(from_disk)
+                with self._lock:
+                    self.disk_hits += len(from_disk)
+                missing = [key for key in missing if key not in from_disk]
+
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            embedded = dict(zip(batch, self.embedder.embed_batch(batch)))
+            vectors.update(embedded)
+            self._remember(embedded)
+            if self.disk_cache:
+                self.disk_cache.put_many(self.name, embedded)
+            with self._lock:
+                self.batches += 1
+                self.misses += len(batch)
+
+        return [vectors[key] for key in keys]
+
+    def _remember(self, vectors: Dict[str, List[float]]):
+        """Add vectors to the in-memory LRU"""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._cache[key] = vector
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and batching counters"""
+        with self._lock:
+            size = len(self._cache)
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "embedder": self.name,
+            "cache_size": size,
+            "max_cache_size": self.cache_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "batches": self.batches,
+            "memory_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk": self.disk_cache.stats() if self.disk_cache else None,
+        }
+
+def create_embedding_service(provider: str = None, model: str = None) -> Optional[EmbeddingService]:
+    """Build the configured embedding service, or None when embeddings are disabled"""
+    provider = (provider or EMBEDDING_PROVIDER).lower()
+    if provider in ("", "none"):
+        return None
+
+    embedder_class = EMBEDDERS.get(provider)
+    if not embedder_class:
+        logger.error(f"Unknown embedding provider {provider}; semantic search disabled")
+        return None
+
+    try:
+        embedder = embedder_class(model or EMBEDDING_MODEL)
+    except ImportError as e:
+        logger.error(f"Embedding provider {provider} is not installed ({e}); semantic search disabled")
+        return None
+
+    logger.info(f"Embedding transactions with {embedder.name}")
+    disk_cache = None
+    if os.getenv("EMBEDDING_DISK_CACHE", "true").lower() == "true":
+        disk_cache = EmbeddingDiskCache()
+    return EmbeddingService(embedder, disk_cache=disk_cache)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Health Probes for Elysia
+Probes Weaviate, the PostgreSQL pool and the LLM configuration, caching results so frequent health checks stay cheap
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from elysia.config import settings as elysia_settings
+
+from data_sync import ElysiaDataSync
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds a probe result is reused before the backend is asked again
+HEALTH_PROBE_TTL = float(os.getenv("HEALTH_PROBE_TTL", "5"))
+# Seconds each probe may take before the dependency counts as down
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+
+# Providers that need no API key (served locally or through another credential chain)
+KEYLESS_PROVIDERS = {"ollama", "vllm", "bedrock", "vertex_ai"}
+
+def package_version(name: str = "elysia-ai") -> str:
+    """Installed version of a distribution, or "unknown" """
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+def executor_queue_depth(executor: Optional[ThreadPoolExecutor]) -> Optional[int]:
+    """Work items waiting for a free thread in an executor"""
+    if executor is None:
+        return None
+    work_queue = getattr(executor, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else None
+
+def pool_stats(sync: Optional[ElysiaDataSync]) -> Optional[Dict[str, Any]]:
+    """In-use and idle connections of the asyncpg pool"""
+    pool = sync.db_pool if sync else None
+    if pool is None:
+        return None
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    max_size = pool.get_max_size()
+    return {
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        "min_size": pool.get_min_size(),
+        "max_size": max_size,
+        "utilization": round((size - idle) / max_size, 4) if max_size else 0.0,
+    }
+
+def llm_config_check() -> Dict[str, Any]:
+    """Whether models, providers and the providers' API keys are configured (no network call)"""
+    models = {
+        "base": (elysia_settings.BASE_MODEL, elysia_settings.BASE_PROVIDER),
+        "complex": (elysia_settings.COMPLEX_MODEL, elysia_settings.COMPLEX_PROVIDER),
+    }
+    details: Dict[str, Any] = {}
+    healthy = True
+    for role, (model, provider) in models.items():
+        configured = bool(model and provider)
+        key_present = configured and (
+            provider in KEYLESS_PROVIDERS
+            or provider.split("/")[0] in KEYLESS_PROVIDERS
+            or bool(elysia_settings.API_KEYS.get(f"{provider.split('/')[0]}_api_key"))
+        )
+        details[role] = {"model": model, "provider": provider, "api_key": key_present}
+        healthy = healthy and configured and key_present
+    return {"healthy": healthy, **details}
+
+class HealthProbes:
+    """Runs dependency probes at most once per `ttl` seconds
+
+    Results are cached and concurrent checks share one in-flight probe
+    round, so a load balancer polling every few hundred milliseconds
+    costs the backends one `is_ready` call and one `SELECT 1` per `ttl`.
+    The Weaviate probe runs on its own thread rather than the sync
+    service's Weaviate I/O executor, so a busy sync cannot starve it.
+    """
+
+    def __init__(
+        self,
+        get_sync: Callable[[], Optional[ElysiaDataSync]],
+        ttl: float = HEALTH_PROBE_TTL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+    ):
+        self.get_sync = get_sync
+        self.ttl = ttl
+        self.timeout = timeout
+        self.results: Optional[Dict[str, Any]] = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+        # Probe rounds are serialized by the lock, so one thread is enough
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-probe")
+
+        self.runs = 0
+        self.hits = 0
+
+    async def check(self) -> Dict[str, Any]:
+        """Cached probe results, re-probing once they are older than `ttl`"""
+        if self.results is not None and time.monotonic() - self.checked_at < self.ttl:
+            self.hits += 1
+            return self._with_age()
+
+        async with self._lock:
+            # Another caller may have probed while we waited
+            if self.results is None or time.monotonic() - self.checked_at >= self.ttl:
+                self.results = await self._probe_all()
+                self.checked_at = time.monotonic()
+                self.runs += 1
+            else:
+                self.hits += 1
+        return self._with_age()
+
+    def _with_age(self) -> Dict[str, Any]:
+        return {**self.results, "age_seconds": round(time.monotonic() - self.checked_at, 3)}
+
+    async def _probe_all(self) -> Dict[str, Any]:
+        sync = self.get_sync()
+        weaviate, postgres = await asyncio.gather(
+            self._timed(self._probe_weaviate, sync),
+            self._timed(self._probe_postgres, sync),
+        )
+        llm = llm_config_check()
+        return {
+            "weaviate": weaviate,
+            "postgres": postgres,
+            "llm": llm,
+            "healthy": weaviate["healthy"] and postgres["healthy"] and llm["healthy"],
+        }
+
+    async def _timed(self, probe: Callable[[ElysiaDataSync], Awaitable[None]], sync: Optional[ElysiaDataSync]) -> Dict[str, Any]:
+        """Run a probe with a timeout and report its latency or error"""
+        if sync is None or not sync.connected:
+            return {"healthy": False, "error": "not connected"}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(sync), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {"healthy": False, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            logger.warning(f"Health probe {probe.__name__} failed: {e}")
+            return {"healthy": False, "error": str(e)}
+        return {"healthy": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    async def _probe_weaviate(self, sync: ElysiaDataSync):
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(self._executor, sync.client.is_ready):
+            raise RuntimeError("Weaviate reports not ready")
+
+    async def _probe_postgres(self, sync: ElysiaDataSync):
+        async with sync.db_pool.acquire(timeout=self.timeout) as conn:
+            await conn.fetchval("SELECT 1", timeout=self.timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Probe counters"""
+        return {"ttl_seconds": self.ttl, "runs": self.runs, "cache_hits": self.hits}
+
+    def close(self):
+        """Stop the probe thread (a probe still stuck on Weaviate is abandoned)"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+"""
+Durable Job Queue for Elysia
+SQLite-backed background jobs with worker coroutines, exponential backoff retries, deduplication and batches
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sync_state import default_data_dir
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Worker coroutines pulling jobs; each user sync holds up to two pool
+# connections, so the default keeps well within DB_POOL_MAX_SIZE (10)
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", os.getenv("SYNC_BATCH_CONCURRENCY", "3")))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "5"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "600"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+
+# A running job's worker renews its lease every third of this; once it lapses
+# (the owning process died) any process sharing the database takes the job back
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# A handler receives the job (id, kind, payload, attempts, ...) and returns a JSON-serializable result
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+_JOB_COLUMNS = (
+    "id, kind, payload, dedup_key, status, attempts, max_attempts, run_at, progress, "
+    "created_at, started_at, finished_at, last_error, result, worker"
+)
+
+class JobQueue:
+    """Persistent queue of background jobs
+
+    Jobs survive restarts: a claimed job is leased to the claiming process,
+    which keeps renewing the lease while the job runs; a job whose lease has
+    lapsed (its process crashed or was killed) is picked up again, so several
+    processes can safely share one database. A failing job is retried with exponential
+    backoff (plus jitter) until `max_attempts` is reached. Enqueuing a job
+    identical to one still pending returns the pending job instead of
+    adding another. Jobs can be grouped into batches whose optional
+    finalizer job is enqueued once every member has finished.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        workers: int = JOB_QUEUE_WORKERS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        base_delay: float = JOB_RETRY_BASE_DELAY,
+        max_delay: float = JOB_RETRY_MAX_DELAY,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self.path = path or os.getenv("JOB_QUEUE_PATH", os.path.join(default_data_dir(), "jobs.db"))
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Identifies this process's leases (the pid alone is reused across containers)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        logger.info(f"Job queue ready at {self.path}")
+
+    def _create_tables(self):
+        """Create queue tables if they do not exist"""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    dedup_key TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    run_at REAL NOT NULL,
+                    progress REAL,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    last_error TEXT,
+                    result TEXT,
+                    worker TEXT,
+                    lease_expires REAL
+                )
+            """)
+            # Databases created before leases existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in (("worker", "TEXT"), ("lease_expires", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    finalizer_kind TEXT,
+                    finalizer_payload TEXT,
+                    finalizer_job_id TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_jobs (
+                    batch_id TEXT NOT NULL,
+                    job_id TEXT NOT NULL,
+                    PRIMARY KEY (batch_id, job_id)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS batch_jobs_job ON batch_jobs (job_id)")
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of a kind"""
+        self.handlers[kind] = handler
+
+    # Enqueueing
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        dedup_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        delay: float = 0,
+    ) -> Dict[str, Any]:
+        """Add a job, or return the identical job already pending
+
+        Jobs are identical when their `dedup_key` matches; it defaults to
+        the kind plus the canonical JSON payload. The returned job carries
+        `deduplicated: True` when an existing pending job was reused.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job_id, deduplicated = self._enqueue_locked(kind, payload, dedup_key, max_attempts, delay)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._notify()
+        return {**self.get(job_id), "deduplicated": deduplicated}
+
+    def enqueue_batch(
+        self,
+        kind: str,
+        payloads: Iterable[Dict[str, Any]],
+        finalizer: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Enqueue jobs as one batch; `finalizer` (kind, payload) runs once all of them finish
+
+        The finalizer's payload gains the batch id so it can read its members' results.
+        """
+        batch_id = str(uuid.uuid4())
+        finalizer_kind, finalizer_payload = finalizer or (None, None)
+        deduplicated = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    """
+                    INSERT INTO batches (id, created_at, finalizer_kind, finalizer_payload)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (
+                        batch_id,
+                        datetime.now().isoformat(),
+                        finalizer_kind,
+                        json.dumps(finalizer_payload) if finalizer_kind else None,
+                    ),
+                )
+                for payload in payloads:
+                    job_id, reused = self._enqueue_locked(kind, payload, None, None, 0)
+                    deduplicated += reused
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO batch_jobs (batch_id, job_id) VALUES (?, ?)",
+                        (batch_id, job_id),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._notify()
+        # An empty batch is already complete
+        self._finalize_batches_of(None, batch_ids=[batch_id])
+        return {"batch_id": batch_id, "deduplicated": deduplicated}
+
+    def _enqueue_locked(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        dedup_key: Optional[str],
+        max_attempts: Optional[int],
+        delay: float,
+    ) -> Tuple[str, bool]:
+        """Insert a job (caller holds the lock and a transaction); returns (job id, deduplicated)"""
+        payload_json = json.dumps(payload, sort_keys=True, default=str)
+        dedup_key = dedup_key or f"{kind}:{payload_json}"
+        existing = self._conn.execute(
+            "SELECT id FROM jobs WHERE dedup_key = ? AND status = 'pending' LIMIT 1",
+            (dedup_key,),
+        ).fetchone()
+        if existing:
+            return existing[0], True
+
+        job_id = str(uuid.uuid4())
+        self._conn.execute(
+            """
+            INSERT INTO jobs (id, kind, payload, dedup_key, status, max_attempts, run_at, created_at)
+            VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)
+            """,
+            (
+                job_id,
+                kind,
+                payload_json,
+                dedup_key,
+                max_attempts or self.max_attempts,
+                time.time() + delay,
+                datetime.now().isoformat(),
+            ),
+        )
+        return job_id, False
+
+    def _notify(self):
+        """Wake idle workers"""
+        if self._wakeup:
+            self._wakeup.set()
+
+    # Inspection and control
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a job by id"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered by status and kind"""
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """A batch with its member jobs and finalizer job"""
+        with self._lock:
+            batch = self._conn.execute(
+                "SELECT created_at, finalizer_kind, finalizer_job_id FROM batches WHERE id = ?",
+                (batch_id,),
+            ).fetchone()
+            if not batch:
+                return None
+            rows = self._conn.execute(
+                f"""
+                SELECT {', '.join(f'j.{column.strip()}' for column in _JOB_COLUMNS.split(','))}
+                FROM batch_jobs b JOIN jobs j ON j.id = b.job_id
+                WHERE b.batch_id = ?
+                ORDER BY j.created_at
+                """,
+                (batch_id,),
+            ).fetchall()
+        return {
+            "batch_id": batch_id,
+            "created_at": batch[0],
+            "finalizer_kind": batch[1],
+            "finalizer": self.get(batch[2]) if batch[2] else None,
+            "jobs": [self._row_to_job(row) for row in rows],
+        }
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Re-queue a failed or cancelled job with a fresh attempt budget"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'pending', attempts = 0, run_at = ?, finished_at = NULL
+                WHERE id = ? AND status IN ('failed', 'cancelled')
+                """,
+                (time.time(), job_id),
+            )
+        self._notify()
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a job that has not started yet"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'pending'",
+                (datetime.now().isoformat(), job_id),
+            )
+        self._finalize_batches_of(job_id)
+        return self.get(job_id)
+
+    def set_progress(self, job_id: str, progress: float):
+        """Record how far a running job has got (0.0 - 1.0)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ?",
+                (max(0.0, min(1.0, progress)), job_id),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status and worker state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {
+            "workers": self.workers,
+            "running": bool(self._tasks),
+            "jobs": dict(rows),
+        }
+
+    def prune(self, older_than_hours: float = JOB_RETENTION_HOURS) -> int:
+        """Delete finished jobs (and emptied batches) older than the retention window"""
+        cutoff = (datetime.now() - timedelta(hours=older_than_hours)).isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            deleted = self._conn.execute(
+                f"""
+                DELETE FROM jobs
+                WHERE status IN ({','.join('?' * len(TERMINAL_STATUSES))}) AND finished_at < ?
+                """,
+                (*TERMINAL_STATUSES, cutoff),
+            ).rowcount
+            self._conn.execute("DELETE FROM batch_jobs WHERE job_id NOT IN (SELECT id FROM jobs)")
+            self._conn.execute(
+                "DELETE FROM batches WHERE created_at < ? AND id NOT IN (SELECT batch_id FROM batch_jobs)",
+                (cutoff,),
+            )
+            self._conn.execute("COMMIT")
+        if deleted:
+            logger.info(f"Pruned {deleted} finished jobs")
+        return deleted
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        """Turn a jobs row into the API representation"""
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "payload": json.loads(row[2]),
+            "status": row[4],
+            "attempts": row[5],
+            "max_attempts": row[6],
+            "next_run_at": datetime.fromtimestamp(row[7]).isoformat() if row[4] == "pending" else None,
+            "progress": row[8],
+            "created_at": row[9],
+            "started_at": row[10],
+            "finished_at": row[11],
+            "last_error": row[12],
+            "result": json.loads(row[13]) if row[13] else None,
+            "worker": row[14],
+        }
+
+    # Workers
+
+    async def start(self):
+        """Recover interrupted jobs and start the worker coroutines"""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+        self._reclaim_expired()
+        self.prune()
+
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 30):
+        """Let running jobs finish (up to `timeout`), then cancel and re-queue the rest"""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._notify()
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Job queue stopped ({len(pending)} jobs interrupted and re-queued)")
+
+    def _reclaim_expired(self) -> int:
+        """Re-queue running jobs whose lease lapsed, i.e. whose process died mid-job"""
+        with self._lock:
+            expired = [
+                row[0] for row in self._conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE status = 'running' AND (lease_expires IS NULL OR lease_expires < ?)
+                    """,
+                    (time.time(),),
+                )
+            ]
+        reclaimed = sum(self._requeue(job_id, run_at=time.time()) for job_id in expired)
+        if reclaimed:
+            logger.info(f"Re-queued {reclaimed} interrupted jobs")
+        return reclaimed
+
+    async def _worker(self, number: int):
+        """Claim and run jobs until stopped"""
+        while not self._stopping:
+            # Clear before claiming so an enqueue racing the claim still wakes us
+            self._wakeup.clear()
+            job = self._claim()
+            if job is None:
+                self._reclaim_expired()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest due pending job"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                f"""
+                SELECT {_JOB_COLUMNS} FROM jobs
+                WHERE status = 'pending' AND run_at <= ?
+                ORDER BY run_at LIMIT 1
+                """,
+                (time.time(),),
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, progress = NULL,
+                        worker = ?, lease_expires = ?
+                    WHERE id = ?
+                    """,
+                    (datetime.now().isoformat(), self.worker_id, time.time() + self.lease_seconds, row[0]),
+                )
+            self._conn.execute("COMMIT")
+        if not row:
+            return None
+        job = self._row_to_job(row)
+        job["status"] = "running"
+        job["attempts"] += 1
+        job["worker"] = self.worker_id
+        return job
+
+    async def _execute(self, job: Dict[str, Any]):
+        """Run a claimed job and record its outcome"""
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self._finish(job["id"], "failed", error=f"No handler registered for job kind {job['kind']}")
+            return
+
+        started = time.perf_counter()
+        heartbeat = asyncio.create_task(self._keep_lease(job["id"]))
+        try:
+            result = await handler(job)
+        except asyncio.CancelledError:
+            # Shutting down: give the attempt back and run the job again next start
+            self._requeue(job["id"], run_at=time.time(), refund_attempt=True)
+            raise
+        except Exception as e:
+            if job["attempts"] >= job["max_attempts"]:
+                logger.error(f"Job {job['id']} ({job['kind']}) failed permanently after {job['attempts']} attempts: {e}")
+                self._finish(job["id"], "failed", error=str(e))
+            else:
+                delay = self._backoff(job["attempts"])
+                logger.warning(
+                    f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}: {e}; retrying in {delay:.1f}s"
+                )
+                self._requeue(job["id"], run_at=time.time() + delay, error=str(e))
+            return
+        finally:
+            heartbeat.cancel()
+
+        self._finish(job["id"], "succeeded", result=result)
+        logger.info(f"Job {job['id']} ({job['kind']}) succeeded in {time.perf_counter() - started:.2f}s")
+
+    async def _keep_lease(self, job_id: str):
+        """Renew this process's lease on a running job until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            with self._lock:
+                renewed = self._conn.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                    (time.time() + self.lease_seconds, job_id, self.worker_id),
+                ).rowcount
+            if not renewed:
+                logger.warning(f"Lost the lease on job {job_id}; another process may run it again")
+                return
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with full jitter on the upper half"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _requeue(
+        self,
+        job_id: str,
+        run_at: float,
+        error: Optional[str] = None,
+        refund_attempt: bool = False,
+    ) -> bool:
+        """Put a running job back in the pending state; returns whether it was re-queued
+
+        Only jobs leased to this process, or whose lease has lapsed, are
+        touched. If an identical job was enqueued meanwhile, it is folded
+        into this one (batch memberships move over) so the pair runs only once.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            owned = self._conn.execute(
+                """
+                SELECT 1 FROM jobs
+                WHERE id = ? AND status = 'running'
+                AND (worker = ? OR lease_expires IS NULL OR lease_expires < ?)
+                """,
+                (job_id, self.worker_id, time.time()),
+            ).fetchone()
+            if not owned:
+                self._conn.execute("COMMIT")
+                return False
+            twin = self._conn.execute(
+                """
+                SELECT id, run_at FROM jobs
+                WHERE status = 'pending' AND id != ?
+                AND dedup_key = (SELECT dedup_key FROM jobs WHERE id = ?)
+                """,
+                (job_id, job_id),
+            ).fetchone()
+            if twin:
+                run_at = min(run_at, twin[1])
+                self._conn.execute(
+                    "UPDATE OR IGNORE batch_jobs SET job_id = ? WHERE job_id = ?",
+                    (job_id, twin[0]),
+                )
+                self._conn.execute("DELETE FROM batch_jobs WHERE job_id = ?", (twin[0],))
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (twin[0],))
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'pending', run_at = ?, last_error = COALESCE(?, last_error),
+                    attempts = attempts - ?, worker = NULL, lease_expires = NULL
+                WHERE id = ?
+                """,
+                (run_at, error, 1 if refund_attempt else 0, job_id),
+            )
+            self._conn.execute("COMMIT")
+        return True
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Mark a job leased to this process terminal and finalize any batch it completes"""
+        with self._lock:
+            finished = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, finished_at = ?, result = ?, last_error = COALESCE(?, last_error),
+                    progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END,
+                    lease_expires = NULL
+                WHERE id = ? AND status = 'running' AND worker = ?
+                """,
+                (
+                    status,
+                    datetime.now().isoformat(),
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    status,
+                    job_id,
+                    self.worker_id,
+                ),
+            ).rowcount
+        if not finished:
+            logger.warning(f"Job {job_id} was taken over by another process; dropping this run's outcome")
+            return
+        self._finalize_batches_of(job_id)
+
+    def _finalize_batches_of(self, job_id: Optional[str], batch_ids: Optional[List[str]] = None):
+        """Enqueue the finalizer of every batch whose members have all finished"""
+        placeholders = ",".join("?" * len(TERMINAL_STATUSES))
+        with self._lock:
+            if batch_ids is None:
+                batch_ids = [
+                    row[0] for row in self._conn.execute(
+                        "SELECT batch_id FROM batch_jobs WHERE job_id = ?", (job_id,)
+                    )
+                ]
+            for batch_id in batch_ids:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    batch = self._conn.execute(
+                        """
+                        SELECT finalizer_kind, finalizer_payload FROM batches
+                        WHERE id = ? AND finalizer_kind IS NOT NULL AND finalizer_job_id IS NULL
+                        """,
+                        (batch_id,),
+                    ).fetchone()
+                    unfinished = self._conn.execute(
+                        f"""
+                        SELECT COUNT(*) FROM batch_jobs b JOIN jobs j ON j.id = b.job_id
+                        WHERE b.batch_id = ? AND j.status NOT IN ({placeholders})
+                        """,
+                        (batch_id, *TERMINAL_STATUSES),
+                    ).fetchone()[0]
+                    if batch and not unfinished:
+                        payload = {**json.loads(batch[1]), "batch_id": batch_id}
+                        finalizer_id, _ = self._enqueue_locked(batch[0], payload, None, None, 0)
+                        self._conn.execute(
+                            "UPDATE batches SET finalizer_job_id = ? WHERE id = ?",
+                            (finalizer_id, batch_id),
+                        )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        self._notify()
@@ -5,24 +5,39 @@ Provides advanced financial analysis using decision trees and Weaviate integrati
 """
 
 import os
+import json
+import time
 import asyncio
 import logging
-from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, AsyncExitStack
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # Import sync endpoints
-from sync_endpoints import router as sync_router
+import sync_endpoints
+from sync_endpoints import get_job_queue, router as sync_router
+from analysis_limiter import AnalysisLimiter, AnalysisSaturated
+from response_cache import AnalysisResponseCache, make_cache_key
+from tree_pool import TreePool
+from spending_analytics import TransactionColumns, analyze_spending, parse_timeframe
+from recurring_charges import detect_recurring_charges
+from collection_preprocessing import CollectionPreprocessor
+from collection_catalog import CollectionCatalog
+from job_queue import JobQueue
+from health import HealthProbes, executor_queue_depth, package_version, pool_stats
+from metrics import ANALYZE_PHASE_SECONDS, ANALYZE_REQUESTS, ANALYZE_SECONDS, DB_POOL_CONNECTIONS
 
 # Elysia imports
-from elysia import configure, Tree, tool, preprocess
-from elysia.preprocessing.collection import preprocessed_collection_exists
+from elysia import configure, Tree, tool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +66,7 @@ class AnalysisRequest(BaseModel):
     financial_data: Optional[Dict[str, Any]] = Field(None, description="User's financial data context")
     collection_names: Optional[List[str]] = Field(None, description="Weaviate collections to search")
     user_id: Optional[str] = Field(None, description="User identifier for personalization")
+    use_cache: bool = Field(True, description="Serve a cached answer when the user's data has not changed")
 
 class AnalysisResponse(BaseModel):
     response: str = Field(..., description="AI analysis response")
@@ -58,36 +74,136 @@ class AnalysisResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
 class HealthResponse(BaseModel):
-    status: str
+    status: str = Field(..., description="healthy, degraded (LLM not configured) or unhealthy (a backend is down)")
     elysia_version: str
     weaviate_connected: bool
+    postgres_connected: bool = False
+    version: Optional[str] = None
+    checks: Optional[Dict[str, Any]] = None
+    pool: Optional[Dict[str, Any]] = None
+    executors: Optional[Dict[str, Any]] = None
+
+# Pool of per-user Elysia trees
+tree_pool: Optional[TreePool] = None
+
+# Analysis concurrency settings
+ANALYZE_MAX_CONCURRENCY = int(os.getenv("ANALYZE_MAX_CONCURRENCY", "4"))
+ANALYZE_MAX_QUEUE = int(os.getenv("ANALYZE_MAX_QUEUE", "16"))
+ANALYZE_QUEUE_TIMEOUT = float(os.getenv("ANALYZE_QUEUE_TIMEOUT", "30"))
+ANALYZE_MAX_QUEUE_PER_USER = int(os.getenv("ANALYZE_MAX_QUEUE_PER_USER", "2"))
+ANALYZE_DRAIN_TIMEOUT = float(os.getenv("ANALYZE_DRAIN_TIMEOUT", "60"))
+
+# Cached /analyze responses, invalidated through the per-user sync data version
+response_cache = AnalysisResponseCache(
+    max_entries=int(os.getenv("ANALYZE_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("ANALYZE_CACHE_TTL", "300")),
+)
+
+# Application-scoped executor for Tree runs and its admission limiter
+analysis_executor: Optional[ThreadPoolExecutor] = None
+analysis_limiter: Optional[AnalysisLimiter] = None
+
+# Collection preprocessing on its own thread pool, driven by queued jobs
+collection_preprocessor: Optional[CollectionPreprocessor] = None
+
+# Cached view of the Weaviate collections served by /collections
+collection_catalog = CollectionCatalog(sync_endpoints.get_sync_service)
+
+# Event loop owning the sync service's connection pool, captured at startup
+app_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Set once startup completed, cleared when shutdown begins; /ready also needs the sync service
+app_ready = False
+sync_startup_task: Optional[asyncio.Task] = None
+app_started_at = time.monotonic()
+
+# Dependency probes shared by /health and /ready, cached for HEALTH_PROBE_TTL seconds
+health_probes = HealthProbes(lambda: sync_endpoints.sync_service)
+
+# Seconds a Tree tool waits for a sync-service query on the app loop
+TOOL_QUERY_TIMEOUT = float(os.getenv("TOOL_QUERY_TIMEOUT", "10"))
+
+# Seconds running background jobs get to finish on shutdown
+JOB_QUEUE_DRAIN_TIMEOUT = float(os.getenv("JOB_QUEUE_DRAIN_TIMEOUT", "30"))
 
-# Global Elysia tree instance
-tree: Optional[Tree] = None
+PREPROCESS_JOB = "preprocess"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global tree
+    global tree_pool, analysis_executor, analysis_limiter, app_loop, collection_preprocessor
+    global app_ready, sync_startup_task
     
     # Startup
     logger.info("Starting Elysia AI Backend...")
     
     # Configure Elysia
     configure_elysia()
+
+    # Tree tools run on executor threads; they reach the asyncpg pool through this loop
+    app_loop = asyncio.get_running_loop()
+
+    # Open and warm the Weaviate client and PostgreSQL pool while the rest starts;
+    # /ready stays 503 until this is done (it keeps retrying if a backend is down)
+    sync_startup_task = asyncio.create_task(sync_endpoints.start_sync_service())
     
-    # Initialize Tree
-    tree = Tree()
-    
-    # Setup financial analysis tools
-    setup_financial_tools(tree)
+    # Initialize the Tree pool and warm one Tree so configuration errors surface at startup
+    tree_pool = TreePool(
+        factory=create_tree,
+        max_trees=int(os.getenv("TREE_POOL_MAX_TREES", "64")),
+        idle_timeout=float(os.getenv("TREE_POOL_IDLE_TIMEOUT", "900")),
+        size_of=estimate_tree_size,
+        max_bytes=int(float(os.getenv("TREE_POOL_MAX_MB", "256")) * 1024 * 1024),
+    )
+    create_tree()
+
+    # Shared executor sized to the in-flight limit, so threads never outnumber admitted requests
+    analysis_executor = ThreadPoolExecutor(
+        max_workers=ANALYZE_MAX_CONCURRENCY,
+        thread_name_prefix="elysia-tree",
+    )
+    analysis_limiter = AnalysisLimiter(
+        max_in_flight=ANALYZE_MAX_CONCURRENCY,
+        max_queue=ANALYZE_MAX_QUEUE,
+        queue_timeout=ANALYZE_QUEUE_TIMEOUT,
+        max_queue_per_user=ANALYZE_MAX_QUEUE_PER_USER,
+    )
+
+    # Background jobs (batch syncs, preprocessing) run on the durable queue's workers
+    collection_preprocessor = CollectionPreprocessor()
+    job_queue = sync_endpoints.open_job_queue()
+    job_queue.register(PREPROCESS_JOB, preprocess_job)
+    await job_queue.start()
+    await collection_catalog.start()
     
+    app_ready = True
     logger.info("Elysia AI Backend started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Elysia AI Backend...")
+    app_ready = False
+    if not sync_startup_task.done():
+        sync_startup_task.cancel()
+
+    await collection_catalog.stop()
+
+    # Queue syncs for webhooks still inside their debounce window
+    sync_endpoints.webhook_coalescer.flush_all()
+
+    # Let running jobs finish; interrupted ones resume on the next start
+    await job_queue.stop(timeout=JOB_QUEUE_DRAIN_TIMEOUT)
+    collection_preprocessor.shutdown()
+
+    # Stop admitting analyses and let in-flight ones finish
+    await analysis_limiter.drain(timeout=ANALYZE_DRAIN_TIMEOUT)
+    analysis_executor.shutdown(wait=True)
+    tree_pool.clear()
+
+    # Nothing uses the connections any more
+    await sync_endpoints.stop_sync_service()
+    health_probes.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -130,8 +246,79 @@ def configure_elysia():
         logger.error(f"Failed to configure Elysia: {e}")
         raise
 
-def setup_financial_tools(tree: Tree):
-    """Setup custom financial analysis tools"""
+def create_tree(user_id: Optional[str] = None) -> Tree:
+    """Build a Tree with the financial analysis tools attached"""
+    tree = Tree()
+    setup_financial_tools(tree, user_id)
+    return tree
+
+def estimate_tree_size(tree: Tree) -> int:
+    """Approximate bytes held by a Tree: its serialized conversation and retrieved objects"""
+    history = tree.tree_data.conversation_history or []
+    retrieved = getattr(tree, "retrieved_objects", None) or []
+    return len(json.dumps(history, default=str)) + len(json.dumps(retrieved, default=str))
+
+def run_on_app_loop(coro):
+    """Await a sync-service coroutine on the app loop from a Tree executor thread"""
+    future = asyncio.run_coroutine_threadsafe(coro, app_loop)
+    return asyncio.wrap_future(future)
+
+def setup_financial_tools(tree: Tree, user_id: Optional[str] = None):
+    """Setup custom financial analysis tools
+
+    Tools that read precomputed data are bound to `user_id`, the owner of
+    the pooled Tree, so a conversation can only see its own aggregates.
+    """
+
+    @tool(tree=tree)
+    async def monthly_spending_summary(
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Look up the user's precomputed monthly spending, income and counts by category.
+
+        Months are YYYY-MM. Use this for questions like "how much did I spend
+        on dining in March?" instead of scanning individual transactions.
+        """
+        service = sync_endpoints.sync_service
+        if not user_id or not service or not app_loop:
+            return {"analysis": "Monthly aggregates are not available", "months": []}
+
+        try:
+            start = datetime.strptime(start_month, "%Y-%m").date() if start_month else None
+            end = datetime.strptime(end_month, "%Y-%m").date() if end_month else None
+        except ValueError:
+            return {"analysis": "Months must be formatted as YYYY-MM", "months": []}
+
+        rows = await asyncio.wait_for(
+            run_on_app_loop(service.get_monthly_aggregates(user_id, start, end, category)),
+            timeout=TOOL_QUERY_TIMEOUT,
+        )
+
+        months: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            month = months.setdefault(row["month"], {
+                "month": row["month"], "spending": 0.0, "income": 0.0, "count": 0, "by_category": {}
+            })
+            month["spending"] += row["spending"]
+            month["income"] += row["income"]
+            month["count"] += row["count"]
+            if row["spending"]:
+                month["by_category"][row["category"]] = round(row["spending"], 2)
+
+        summary = list(months.values())
+        for month in summary:
+            month["spending"] = round(month["spending"], 2)
+            month["income"] = round(month["income"], 2)
+
+        total_spending = sum(month["spending"] for month in summary)
+        return {
+            "analysis": f"Monthly spending summary for {len(summary)} months" + (f" in {category}" if category else ""),
+            "total_spending": format_currency(total_spending),
+            "average_monthly_spending": format_currency(total_spending / len(summary) if summary else 0),
+            "months": summary
+        }
     
     @tool(tree=tree)
     async def analyze_spending_patterns(
@@ -139,24 +326,83 @@ def setup_financial_tools(tree: Tree):
         timeframe: str = "30d"
     ) -> Dict[str, Any]:
         """Analyze spending patterns and provide insights"""
-        # Calculate sample spending amounts for demonstration
-        dining_spending = 850.75
-        subscription_spending = 127.99
-        total_spending = 4210.50
+        try:
+            days = parse_timeframe(timeframe)
+        except ValueError:
+            days = parse_timeframe("30d")
+
+        columns = TransactionColumns.from_records(transactions or [])
+        stats = analyze_spending(columns, timeframe_days=days)
+
+        if stats["transaction_count"] == 0:
+            return {
+                "analysis": f"No transactions to analyze for {timeframe}",
+                "total_spending": format_currency(0),
+                "insights": [],
+                "recommendations": []
+            }
+
+        insights = []
+        recommendations = []
+
+        by_category = stats["by_category"]
+        if by_category:
+            top_category, top_amount = next(iter(by_category.items()))
+            share = top_amount / stats["total_spending"] if stats["total_spending"] else 0
+            insights.append(
+                f"Highest spending category is {top_category}: {format_currency(top_amount)} ({share:.0%} of spending)"
+            )
+            if share > 0.3:
+                recommendations.append(
+                    f"Set a monthly cap for {top_category}; trimming it by 10% saves {format_currency(top_amount * 0.1)}"
+                )
+
+        if stats["month_over_month"]:
+            latest = stats["month_over_month"][-1]
+            direction = "up" if latest["delta"] > 0 else "down"
+            change = f" ({abs(latest['pct_change']):.0%})" if latest["pct_change"] is not None else ""
+            insights.append(
+                f"Spending in {latest['month']} is {direction} {format_currency(abs(latest['delta']))}{change} from the previous month"
+            )
+            if stats["monthly_spending"][-1] > stats["rolling_average"][-1] * 1.1:
+                recommendations.append(
+                    f"This month is running above your {format_currency(stats['rolling_average'][-1])} rolling average"
+                )
+
+        subscriptions = [charge for charge in detect_recurring_charges(columns) if charge["active"]]
+        if subscriptions:
+            monthly_total = sum(charge["monthly_cost"] for charge in subscriptions)
+            insights.append(
+                f"Recurring charges cost {format_currency(monthly_total)} monthly across {len(subscriptions)} merchants"
+            )
+            recommendations.append(
+                "Review recurring charges: " + ", ".join(
+                    f"{charge['merchant']} ({format_currency(charge['monthly_cost'])}/mo)" for charge in subscriptions[:3]
+                )
+            )
+
+        if stats["top_merchants"]:
+            merchant = stats["top_merchants"][0]
+            insights.append(
+                f"Top merchant is {merchant['merchant']}: {format_currency(merchant['total'])} across {merchant['count']} transactions"
+            )
+
+        net = stats["total_income"] - stats["total_spending"]
+        if stats["total_income"] > 0:
+            insights.append(f"Net cash flow for the period is {format_currency(net)}")
+            if net < 0:
+                recommendations.append(
+                    f"Spending exceeds income by {format_currency(-net)}; review discretionary categories"
+                )
 
         return {
             "analysis": f"Spending pattern analysis completed for {timeframe}",
-            "total_spending": format_currency(total_spending),
-            "insights": [
-                f"High spending on dining out detected: {format_currency(dining_spending)} this month",
-                f"Subscription services cost {format_currency(subscription_spending)} monthly",
-                "Good progress on savings goals"
-            ],
-            "recommendations": [
-                f"Consider meal planning to reduce dining expenses by {format_currency(200)}",
-                f"Review and cancel unused subscriptions to save {format_currency(50)} monthly",
-                f"Increase emergency fund contributions by {format_currency(300)}"
-            ]
+            "total_spending": format_currency(stats["total_spending"]),
+            "total_income": format_currency(stats["total_income"]),
+            "insights": insights,
+            "recommendations": recommendations,
+            "recurring_charges": subscriptions,
+            "statistics": stats
         }
     
     @tool(tree=tree)
@@ -218,37 +464,129 @@ def setup_financial_tools(tree: Tree):
             ]
         }
 
+def executor_stats() -> Dict[str, Any]:
+    """Queue depths of the executors and queues work waits in (autoscaling signals)"""
+    sync = sync_endpoints.sync_service
+    return {
+        "analysis": {
+            "queue_depth": executor_queue_depth(analysis_executor),
+            "in_flight": analysis_limiter.in_flight if analysis_limiter else None,
+            "waiting": analysis_limiter.waiting if analysis_limiter else None,
+        },
+        "weaviate_io": {"queue_depth": executor_queue_depth(sync._weaviate_executor) if sync else None},
+        "preprocess": {
+            "queue_depth": executor_queue_depth(collection_preprocessor.executor) if collection_preprocessor else None,
+        },
+        "jobs": sync_endpoints.job_queue.stats()["jobs"] if sync_endpoints.job_queue else None,
+    }
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is up and its event loop is responsive (no backend calls)"""
+    return {"status": "alive", "uptime_seconds": round(time.monotonic() - app_started_at, 1)}
+
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
+async def health_check(response: Response):
+    """Dependency health, pool utilization and executor queue depths"""
     try:
-        # Check Weaviate connection
-        weaviate_connected = True  # You could add actual Weaviate ping here
+        checks = await health_probes.check()
+        weaviate_connected = checks["weaviate"]["healthy"]
+        postgres_connected = checks["postgres"]["healthy"]
+
+        if not (weaviate_connected and postgres_connected):
+            status = "unhealthy"
+            response.status_code = 503
+        elif not checks["llm"]["healthy"]:
+            status = "degraded"
+        else:
+            status = "healthy"
         
         return HealthResponse(
-            status="healthy",
-            elysia_version="0.2.6",
-            weaviate_connected=weaviate_connected
+            status=status,
+            elysia_version=package_version("elysia-ai"),
+            weaviate_connected=weaviate_connected,
+            postgres_connected=postgres_connected,
+            version=app.version,
+            checks=checks,
+            pool=pool_stats(sync_endpoints.sync_service),
+            executors=executor_stats(),
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail="Service unhealthy")
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once startup finished and Weaviate and PostgreSQL are warm and answering probes"""
+    checks = None
+    ready = app_ready and sync_endpoints.sync_service_ready()
+    if ready:
+        checks = await health_probes.check()
+        ready = checks["weaviate"]["healthy"] and checks["postgres"]["healthy"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "startup_complete": app_ready,
+            "sync_service": sync_endpoints.warmup,
+            "checks": checks,
+            "pool": pool_stats(sync_endpoints.sync_service),
+        },
+    )
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: analysis phases, sync phases and throughput, batch errors and pool waits"""
+    pool = pool_stats(sync_endpoints.sync_service)
+    if pool:
+        DB_POOL_CONNECTIONS.labels(state="in_use").set(pool["in_use"])
+        DB_POOL_CONNECTIONS.labels(state="idle").set(pool["idle"])
+        DB_POOL_CONNECTIONS.labels(state="max").set(pool["max_size"])
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_financial_data(request: AnalysisRequest):
     """Main endpoint for financial analysis using Elysia"""
-    global tree
-
-    if not tree:
+    if not tree_pool or not analysis_executor:
         raise HTTPException(status_code=500, detail="Elysia not initialized")
 
+    started = time.perf_counter()
     try:
         logger.info(f"Processing analysis request: {request.query}")
 
-        # Use Elysia Tree for analysis in a thread pool to avoid event loop conflicts
-        import concurrent.futures
+        cache_key = make_cache_key(
+            request.query,
+            request.user_id,
+            request.collection_names,
+            await get_user_data_version(request.user_id),
+        )
+        # A cache hit skips the user's Tree, so the turn never enters their
+        # conversation; cached answers are only sound while there is none
+        if request.use_cache and tree_pool.conversation_turns(request.user_id) == 0:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                response, objects = cached
+                ANALYZE_REQUESTS.labels(endpoint="analyze", outcome="hit").inc()
+                ANALYZE_SECONDS.labels(endpoint="analyze", cache="hit").observe(time.perf_counter() - started)
+                return AnalysisResponse(
+                    response=response,
+                    objects=objects,
+                    metadata={
+                        "user_id": request.user_id,
+                        "timestamp": datetime.now().isoformat(),
+                        "model_used": "elysia-decision-tree",
+                        "cache": "hit"
+                    }
+                )
 
+        # Use Elysia Tree for analysis in a thread pool to avoid event loop conflicts
         def run_tree_query():
+            with tree_pool.checkout(request.user_id) as tree:
+                # Checked under the session lock: earlier queued turns may have run
+                fresh = tree_pool.conversation_turns(request.user_id) == 0
+                return query_tree(tree), fresh
+
+        def query_tree(tree: Tree):
             if request.collection_names:
                 result = tree(request.query, collection_names=request.collection_names)
                 # Check if result is tuple (response, objects)
@@ -265,81 +603,292 @@ async def analyze_financial_data(request: AnalysisRequest):
                     return result, None
 
         loop = asyncio.get_running_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = loop.run_in_executor(executor, run_tree_query)
-            result = await future
+        async with analysis_limiter.slot(request.user_id) as queue_wait:
+            ANALYZE_PHASE_SECONDS.labels(endpoint="analyze", phase="queue_wait").observe(queue_wait)
+            tree_started = time.perf_counter()
+            result = await loop.run_in_executor(analysis_executor, run_tree_query)
+            ANALYZE_PHASE_SECONDS.labels(endpoint="analyze", phase="tree").observe(time.perf_counter() - tree_started)
 
-        response, objects = result
+        serialize_started = time.perf_counter()
+        (response, objects), fresh = result
+        objects = normalize_objects(objects)
 
-        # Ensure objects is in the right format
-        if objects and isinstance(objects, list):
-            # If objects is a list of lists, flatten it
-            if objects and isinstance(objects[0], list):
-                objects = []  # Simplify for now
+        # Answers given mid-conversation depend on it and are not reusable
+        if fresh:
+            response_cache.put(cache_key, (response, objects))
 
-        return AnalysisResponse(
+        analysis = AnalysisResponse(
             response=response,
-            objects=objects if objects else [],
+            objects=objects,
             metadata={
                 "user_id": request.user_id,
                 "timestamp": datetime.now().isoformat(),
-                "model_used": "elysia-decision-tree"
+                "model_used": "elysia-decision-tree",
+                "queue_wait_ms": round(queue_wait * 1000, 2),
+                "cache": "miss"
             }
         )
-        
+        finished = time.perf_counter()
+        ANALYZE_PHASE_SECONDS.labels(endpoint="analyze", phase="serialize").observe(finished - serialize_started)
+        ANALYZE_SECONDS.labels(endpoint="analyze", cache="miss").observe(finished - started)
+        ANALYZE_REQUESTS.labels(endpoint="analyze", outcome="miss").inc()
+        return analysis
+
+    except AnalysisSaturated as e:
+        logger.warning(f"Analysis rejected: {e.reason}")
+        ANALYZE_REQUESTS.labels(endpoint="analyze", outcome="rejected").inc()
+        raise HTTPException(
+            status_code=429,
+            detail=f"Analysis capacity exceeded: {e.reason}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
+        ANALYZE_REQUESTS.labels(endpoint="analyze", outcome="error").inc()
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.post("/analyze/stream")
+async def analyze_financial_data_stream(request: AnalysisRequest):
+    """Streaming variant of /analyze emitting Tree progress as NDJSON events
+
+    Each line is a JSON object with a `type`: `start`, then the Tree's own
+    updates (`status`, `tree_update`, `result`, `text`, ...) as they happen,
+    and finally `final` (response text and objects) or `error`.
+    """
+    if not tree_pool or not analysis_executor:
+        raise HTTPException(status_code=500, detail="Elysia not initialized")
+
+    logger.info(f"Processing streaming analysis request: {request.query}")
+    started = time.perf_counter()
+
+    cache_key = make_cache_key(
+        request.query,
+        request.user_id,
+        request.collection_names,
+        await get_user_data_version(request.user_id),
+    )
+    cached = None
+    if request.use_cache and tree_pool.conversation_turns(request.user_id) == 0:
+        cached = response_cache.get(cache_key)
+
+    # Admit before the response starts so saturation can still be a 429
+    slot = AsyncExitStack()
+    queue_wait = 0.0
+    if cached is None:
+        try:
+            queue_wait = await slot.enter_async_context(analysis_limiter.slot(request.user_id))
+        except AnalysisSaturated as e:
+            logger.warning(f"Streaming analysis rejected: {e.reason}")
+            ANALYZE_REQUESTS.labels(endpoint="analyze_stream", outcome="rejected").inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Analysis capacity exceeded: {e.reason}",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        ANALYZE_PHASE_SECONDS.labels(endpoint="analyze_stream", phase="queue_wait").observe(queue_wait)
+
+    metadata = {
+        "user_id": request.user_id,
+        "model_used": "elysia-decision-tree",
+        "queue_wait_ms": round(queue_wait * 1000, 2),
+        "cache": "hit" if cached is not None else "miss",
+    }
+
+    def encode(event: Dict[str, Any]) -> bytes:
+        return (json.dumps(event, default=str) + "\n").encode()
+
+    future = None
+    stream_started = False
+
+    async def event_stream():
+        nonlocal future, stream_started
+        stream_started = True
+        try:
+            yield encode({"type": "start", "timestamp": datetime.now().isoformat(), **metadata})
+
+            if cached is not None:
+                response, objects = cached
+                yield encode({"type": "final", "response": response, "objects": objects, "metadata": metadata})
+                ANALYZE_REQUESTS.labels(endpoint="analyze_stream", outcome="hit").inc()
+                ANALYZE_SECONDS.labels(endpoint="analyze_stream", cache="hit").observe(time.perf_counter() - started)
+                return
+
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            done = object()
+
+            def run_tree_stream():
+                # Runs on the analysis executor with a private event loop,
+                # handing each Tree update back to the request's loop
+                with tree_pool.checkout(request.user_id) as tree:
+                    fresh = tree_pool.conversation_turns(request.user_id) == 0
+                    # The Tree is pooled: only collect objects for this request
+                    store_retrieved_objects = tree.store_retrieved_objects
+                    tree.store_retrieved_objects = True
+
+                    async def produce():
+                        async for result in tree.async_run(
+                            request.query, collection_names=request.collection_names or []
+                        ):
+                            if result is not None:
+                                loop.call_soon_threadsafe(queue.put_nowait, result)
+
+                    try:
+                        asyncio.run(produce())
+                    finally:
+                        tree.store_retrieved_objects = store_retrieved_objects
+                    return tree.tree_data.conversation_history[-1]["content"], tree.retrieved_objects, fresh
+
+            tree_started = time.perf_counter()
+            future = loop.run_in_executor(analysis_executor, run_tree_stream)
+            future.add_done_callback(lambda _: queue.put_nowait(done))
+
+            while True:
+                event = await queue.get()
+                if event is done:
+                    break
+                yield encode(event)
+
+            response, objects, fresh = future.result()
+            serialize_started = time.perf_counter()
+            ANALYZE_PHASE_SECONDS.labels(endpoint="analyze_stream", phase="tree").observe(serialize_started - tree_started)
+            objects = normalize_objects(objects)
+            if fresh:
+                response_cache.put(cache_key, (response, objects))
+            final = encode({
+                "type": "final",
+                "response": response,
+                "objects": objects,
+                "metadata": {**metadata, "timestamp": datetime.now().isoformat()},
+            })
+            finished = time.perf_counter()
+            ANALYZE_PHASE_SECONDS.labels(endpoint="analyze_stream", phase="serialize").observe(finished - serialize_started)
+            ANALYZE_SECONDS.labels(endpoint="analyze_stream", cache="miss").observe(finished - started)
+            ANALYZE_REQUESTS.labels(endpoint="analyze_stream", outcome="miss").inc()
+            yield final
+
+        except Exception as e:
+            logger.error(f"Streaming analysis failed: {e}")
+            ANALYZE_REQUESTS.labels(endpoint="analyze_stream", outcome="error").inc()
+            yield encode({"type": "error", "error": str(e)})
+        finally:
+            if future is not None and not future.done():
+                # Client went away mid-run: hold the slot until the Tree finishes
+                future.add_done_callback(lambda _: asyncio.ensure_future(slot.aclose()))
+            else:
+                await slot.aclose()
+
+    async def release_unstarted_slot():
+        # The generator's finally owns the slot once the stream starts (and
+        # holds it past a disconnect until the Tree finishes); this only
+        # covers a response that never started streaming
+        if not stream_started:
+            await slot.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(release_unstarted_slot),
+    )
+
+def normalize_objects(objects: Any) -> List[Any]:
+    """Ensure retrieved objects are a flat list the API can return"""
+    if objects and isinstance(objects, list):
+        # If objects is a list of lists, flatten it
+        if objects and isinstance(objects[0], list):
+            objects = []  # Simplify for now
+    return objects if objects else []
+
+@app.get("/analyze/stats")
+async def analysis_stats():
+    """Analysis concurrency, queueing and cache counters"""
+    if not analysis_limiter:
+        raise HTTPException(status_code=500, detail="Elysia not initialized")
+    return {
+        **analysis_limiter.stats(),
+        "cache": response_cache.stats(),
+        "tree_pool": tree_pool.stats() if tree_pool else None,
+    }
+
+async def get_user_data_version(user_id: Optional[str]) -> int:
+    """Data version of a user's synced data, bumped by ElysiaDataSync on every sync"""
+    if not user_id or not sync_endpoints.sync_service:
+        return 0
+    # A SQLite read that can wait on sync writers, so it stays off the event loop
+    return await asyncio.to_thread(sync_endpoints.sync_service.get_data_version, user_id)
+
 @app.post("/preprocess")
 async def preprocess_collections(
-    background_tasks: BackgroundTasks,
-    collection_names: List[str]
+    collection_names: List[str],
+    force: bool = False,
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
-    """Preprocess Weaviate collections for Elysia"""
+    """Queue preprocessing of Weaviate collections for Elysia
+
+    Collections that are already preprocessed and have not changed
+    materially since are skipped unless `force` is set.
+    """
     try:
-        # Run preprocessing in background
-        background_tasks.add_task(run_preprocessing, collection_names)
+        # An identical pending request is reused
+        job = job_queue.enqueue(
+            PREPROCESS_JOB, {"collection_names": sorted(set(collection_names)), "force": force}
+        )
         
         return {
-            "message": "Preprocessing started",
+            "message": "Preprocessing queued",
             "collections": collection_names,
-            "status": "in_progress"
+            "status": job["status"],
+            "job_id": job["id"],
+            "deduplicated": job["deduplicated"]
         }
     except Exception as e:
         logger.error(f"Preprocessing failed: {e}")
         raise HTTPException(status_code=500, detail=f"Preprocessing failed: {str(e)}")
 
-async def run_preprocessing(collection_names: List[str]):
-    """Run preprocessing in background"""
+@app.get("/preprocess/{job_id}")
+async def get_preprocess_status(job_id: str, job_queue: JobQueue = Depends(get_job_queue)):
+    """Progress of a preprocessing job, overall and per collection"""
+    job = job_queue.get(job_id)
+    if not job or job["kind"] != PREPROCESS_JOB:
+        raise HTTPException(status_code=404, detail=f"Preprocessing job {job_id} not found")
+
+    live = collection_preprocessor.progress.get(job_id) if collection_preprocessor else None
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "percent_complete": round((job["progress"] or 0.0) * 100, 1),
+        "attempts": job["attempts"],
+        "error": job["last_error"] if job["status"] != "succeeded" else None,
+        "collections": live or (job["result"] or {}).get("collections")
+            or {name: {"status": "pending"} for name in job["payload"]["collection_names"]},
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+async def preprocess_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job queue handler for /preprocess"""
+    sync = await sync_endpoints.get_sync_service()
     try:
-        for collection_name in collection_names:
-            if not preprocessed_collection_exists(collection_name):
-                logger.info(f"Preprocessing collection: {collection_name}")
-                preprocess(collection_name)
-                logger.info(f"Completed preprocessing: {collection_name}")
-            else:
-                logger.info(f"Collection already preprocessed: {collection_name}")
-    except Exception as e:
-        logger.error(f"Background preprocessing failed: {e}")
+        collections = await collection_preprocessor.run(
+            job["id"],
+            job["payload"]["collection_names"],
+            sync,
+            force=job["payload"].get("force", False),
+            on_progress=lambda progress: sync_endpoints.job_queue.set_progress(job["id"], progress),
+        )
+    finally:
+        # Preprocessed status may have changed even if some collections failed
+        collection_catalog.invalidate()
+    return {"collections": collections}
 
 @app.get("/collections")
-async def list_collections():
-    """List available Weaviate collections"""
+async def list_collections(refresh: bool = False):
+    """List Weaviate collections with object counts, property schemas and preprocessing status"""
     try:
-        # This would list actual collections from Weaviate
-        # For now, return placeholder
-        return {
-            "collections": [
-                "UserTransactions",
-                "UserAccounts", 
-                "FinancialGoals",
-                "InvestmentData"
-            ],
-            "preprocessed": [
-                "UserTransactions"
-            ]
-        }
+        if refresh:
+            collection_catalog.invalidate()
+        return await collection_catalog.get()
     except Exception as e:
         logger.error(f"Failed to list collections: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list collections: {str(e)}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics for Elysia
+Histograms and counters for /analyze phases, sync phases and throughput, Weaviate batch errors and pool waits
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Analysis phases span milliseconds (cache hits, queue waits) to minutes (Tree runs)
+ANALYZE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# Sync phases: a single page fetch to a full backfill flush
+SYNC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Pool acquires are normally near-instant; the tail is what matters
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+ANALYZE_PHASE_SECONDS = Histogram(
+    "elysia_analyze_phase_seconds",
+    "Time spent per /analyze phase (queue_wait, tree, serialize)",
+    ["endpoint", "phase"],
+    buckets=ANALYZE_BUCKETS,
+)
+ANALYZE_SECONDS = Histogram(
+    "elysia_analyze_seconds",
+    "End-to-end /analyze handling time by cache outcome",
+    ["endpoint", "cache"],
+    buckets=ANALYZE_BUCKETS,
+)
+ANALYZE_REQUESTS = Counter(
+    "elysia_analyze_requests_total",
+    "Analysis requests by outcome (hit, miss, rejected, error)",
+    ["endpoint", "outcome"],
+)
+
+SYNC_PHASE_SECONDS = Histogram(
+    "elysia_sync_phase_seconds",
+    "Time spent per sync phase (postgres_fetch, transform, hash_lookup, embed, weaviate_flush)",
+    ["collection", "phase"],
+    buckets=SYNC_BUCKETS,
+)
+SYNC_ROWS = Counter(
+    "elysia_sync_rows_total",
+    "Rows read from PostgreSQL by sync",
+    ["collection"],
+)
+SYNC_OBJECTS = Counter(
+    "elysia_sync_objects_total",
+    "Objects handled by sync upserts by outcome (inserted, updated, skipped, failed)",
+    ["collection", "outcome"],
+)
+SYNC_ROWS_PER_SECOND = Gauge(
+    "elysia_sync_rows_per_second",
+    "Rows per second of the most recent sync run",
+    ["collection"],
+)
+WEAVIATE_BATCH_ERRORS = Counter(
+    "elysia_weaviate_batch_errors_total",
+    "Objects rejected by Weaviate batch imports",
+    ["collection"],
+)
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "elysia_db_pool_acquire_seconds",
+    "Time spent waiting for an asyncpg pool connection",
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "elysia_db_pool_connections",
+    "asyncpg pool connections by state (in_use, idle, max)",
+    ["state"],
+)
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the duration of a block into a labelled histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
@@ -0,0 +1,17 @@
+-- Per-user monthly spending aggregates maintained by ElysiaDataSync
+-- One row per user x month x primary category
+
+CREATE TABLE IF NOT EXISTS elysia_monthly_spending (
+    user_id TEXT NOT NULL,
+    month DATE NOT NULL,
+    category TEXT NOT NULL,
+    total DOUBLE PRECISION NOT NULL,
+    income DOUBLE PRECISION NOT NULL,
+    spending DOUBLE PRECISION NOT NULL,
+    count INTEGER NOT NULL,
+    min_amount DOUBLE PRECISION NOT NULL,
+    max_amount DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT elysia_monthly_spending_pkey PRIMARY KEY (user_id, month, category)
+);
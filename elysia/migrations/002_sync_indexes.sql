@@ -0,0 +1,19 @@
+-- elysia:no-transaction
+-- Indexes backing the sync and profile queries run by ElysiaDataSync.
+-- "Transaction" and "Account" belong to the app, so they are built
+-- CONCURRENTLY to keep its writes flowing; the elysia_ prefix marks them
+-- as this service's, outside the Prisma schema. An INVALID index left by a
+-- failed build is dropped and rebuilt by the migration runner.
+
+-- Keyset pagination over (sync key, id) for incremental transaction syncs;
+-- the expression must match TRANSACTION_SYNC_KEY in data_sync.py
+CREATE INDEX CONCURRENTLY IF NOT EXISTS elysia_transaction_user_sync_key_idx
+    ON "Transaction" (user_id, (COALESCE(updated_at, created_at, date)), id);
+
+-- Date-bounded scans (full syncs, aggregate refreshes, analytics loads)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS elysia_transaction_user_date_idx
+    ON "Transaction" (user_id, date);
+
+-- Per-user account totals in the profile metrics query
+CREATE INDEX CONCURRENTLY IF NOT EXISTS elysia_account_user_idx
+    ON "Account" (user_id);
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Realtime Sync for Elysia
+Coalesces bursts of Plaid webhooks per user and queues one incremental sync once they settle
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# A user's sync is queued once no webhook has arrived for DEBOUNCE seconds,
+# or MAX_DELAY seconds after the first one when webhooks keep coming
+PLAID_WEBHOOK_DEBOUNCE = float(os.getenv("PLAID_WEBHOOK_DEBOUNCE_SECONDS", "10"))
+PLAID_WEBHOOK_MAX_DELAY = float(os.getenv("PLAID_WEBHOOK_MAX_DELAY_SECONDS", "60"))
+
+# Data types each Plaid webhook invalidates; new or modified transactions
+# also move balances, so those refresh accounts too
+PLAID_WEBHOOK_DATA_TYPES: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    ("TRANSACTIONS", "SYNC_UPDATES_AVAILABLE"): ("transactions", "accounts"),
+    ("TRANSACTIONS", "DEFAULT_UPDATE"): ("transactions", "accounts"),
+    ("TRANSACTIONS", "INITIAL_UPDATE"): ("transactions", "accounts"),
+    ("TRANSACTIONS", "HISTORICAL_UPDATE"): ("transactions",),
+    ("TRANSACTIONS", "TRANSACTIONS_REMOVED"): ("transactions",),
+}
+
+def webhook_data_types(webhook_type: Optional[str], webhook_code: Optional[str]) -> Tuple[str, ...]:
+    """Data types to re-sync for a Plaid webhook (empty for webhooks we ignore)"""
+    return PLAID_WEBHOOK_DATA_TYPES.get(((webhook_type or "").upper(), (webhook_code or "").upper()), ())
+
+class _PendingUser:
+    """Webhooks received for a user that have not been flushed yet"""
+
+    def __init__(self):
+        self.data_types: Set[str] = set()
+        self.first_seen = time.monotonic()
+        self.last_seen = self.first_seen
+        self.events = 0
+        self.task: Optional[asyncio.Task] = None
+
+class WebhookCoalescer:
+    """Debounces change notifications per user
+
+    Every notification for a user pushes its flush back by `debounce`
+    seconds, but never beyond `max_delay` after the first one, so a
+    steady stream of webhooks still syncs regularly. On flush the union of
+    notified data types is handed to `flush(user_id, data_types)` once.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[str, Set[str]], Any],
+        debounce: float = PLAID_WEBHOOK_DEBOUNCE,
+        max_delay: float = PLAID_WEBHOOK_MAX_DELAY,
+    ):
+        self.flush = flush
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.pending: Dict[str, _PendingUser] = {}
+
+        self.received = 0
+        self.flushes = 0
+
+    def submit(self, user_id: str, data_types: Iterable[str]) -> Dict[str, Any]:
+        """Record a notification; returns when the user's sync will be queued"""
+        entry = self.pending.get(user_id)
+        if entry is None:
+            entry = self.pending[user_id] = _PendingUser()
+            entry.task = asyncio.create_task(self._flush_when_settled(user_id, entry))
+        entry.data_types.update(data_types)
+        entry.last_seen = time.monotonic()
+        entry.events += 1
+        self.received += 1
+        return {
+            "coalesced_events": entry.events,
+            "data_types": sorted(entry.data_types),
+            "flush_in": round(self._deadline(entry) - time.monotonic(), 3),
+        }
+
+    def _deadline(self, entry: _PendingUser) -> float:
+        return min(entry.last_seen + self.debounce, entry.first_seen + self.max_delay)
+
+    async def _flush_when_settled(self, user_id: str, entry: _PendingUser):
+        """Sleep until the user's notifications settle, then flush them"""
+        while True:
+            delay = self._deadline(entry) - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._flush(user_id)
+
+    def _flush(self, user_id: str):
+        """Hand a user's accumulated data types to the flush callback"""
+        entry = self.pending.pop(user_id, None)
+        if entry is None:
+            return
+        self.flushes += 1
+        logger.info(
+            f"Coalesced {entry.events} change notifications for user {user_id} into one sync of "
+            f"{', '.join(sorted(entry.data_types))}"
+        )
+        try:
+            self.flush(user_id, entry.data_types)
+        except Exception as e:
+            logger.error(f"Failed to queue realtime sync for user {user_id}: {e}")
+
+    def flush_all(self):
+        """Flush every pending user now (on shutdown, so no notification is dropped)"""
+        for user_id, entry in list(self.pending.items()):
+            if entry.task:
+                entry.task.cancel()
+            self._flush(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Notification and flush counters"""
+        return {
+            "debounce_seconds": self.debounce,
+            "max_delay_seconds": self.max_delay,
+            "pending_users": len(self.pending),
+            "received": self.received,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Recurring Charge Detector for Elysia
+Finds weekly, monthly and annual charges (subscriptions, bills) in columnar transactions
+"""
+
+import logging
+from typing import Dict, Any, List
+
+import numpy as np
+
+from spending_analytics import TransactionColumns
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Recognized periods: (name, nominal days, min interval, max interval, min occurrences)
+PERIODS = [
+    ("weekly", 7.0, 5, 9, 3),
+    ("biweekly", 14.0, 12, 17, 3),
+    ("monthly", 30.44, 26, 35, 3),
+    ("quarterly", 91.31, 80, 100, 2),
+    ("annual", 365.25, 350, 380, 2),
+]
+
+def detect_recurring_charges(
+    columns: TransactionColumns,
+    min_regularity: float = 0.6,
+    amount_tolerance: float = 0.25,
+) -> List[Dict[str, Any]]:
+    """Detect periodic charges per merchant
+
+    Spending rows are sorted by (merchant, date) once; the gaps between
+    consecutive charges at the same merchant are binned into the known
+    periods and counted per merchant with a single bincount. A merchant is
+    recurring when at least `min_regularity` of its gaps fall in one period
+    (tolerating date jitter) and the coefficient of variation of its amounts
+    is within `amount_tolerance` (tolerating price drift). Runs in
+    O(n log n) for the sort and O(n) for everything else.
+    """
+    spend_mask = (columns.amounts < 0) & ~np.isnat(columns.dates)
+    if spend_mask.sum() < 2:
+        return []
+
+    merchants = columns.merchant_codes[spend_mask]
+    days = columns.dates[spend_mask].astype(np.int64)
+    amounts = -columns.amounts[spend_mask]
+
+    order = np.lexsort((days, merchants))
+    merchants, days, amounts = merchants[order], days[order], amounts[order]
+
+    # Per-merchant occurrence counts and amount moments
+    n_merchants = len(columns.merchants)
+    occurrences = np.bincount(merchants, minlength=n_merchants)
+    amount_sum = np.bincount(merchants, weights=amounts, minlength=n_merchants)
+    amount_sq = np.bincount(merchants, weights=amounts * amounts, minlength=n_merchants)
+
+    # Gaps between consecutive charges at the same merchant
+    same = merchants[1:] == merchants[:-1]
+    gap_merchant = merchants[1:][same]
+    gaps = (days[1:] - days[:-1])[same]
+    gap_count = np.bincount(gap_merchant, minlength=n_merchants)
+
+    # Histogram each gap into a period band (-1 when it fits none)
+    lows = np.array([p[2] for p in PERIODS])
+    highs = np.array([p[3] for p in PERIODS])
+    band = np.searchsorted(lows, gaps, side="right") - 1
+    in_band = (band >= 0) & (gaps <= highs[np.clip(band, 0, None)])
+    n_periods = len(PERIODS)
+    hist = np.bincount(
+        gap_merchant[in_band] * n_periods + band[in_band],
+        minlength=n_merchants * n_periods,
+    ).reshape(n_merchants, n_periods)
+
+    best_period = hist.argmax(axis=1)
+    best_hits = hist.max(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        regularity = np.where(gap_count > 0, best_hits / gap_count, 0.0)
+        mean = np.where(occurrences > 0, amount_sum / occurrences, 0.0)
+        variance = np.maximum(np.where(occurrences > 0, amount_sq / occurrences, 0.0) - mean * mean, 0.0)
+        cv = np.where(mean > 0, np.sqrt(variance) / mean, np.inf)
+
+    min_occurrences = np.array([p[4] for p in PERIODS])[best_period]
+    recurring = np.flatnonzero(
+        (best_hits > 0)
+        & (occurrences >= min_occurrences)
+        & (regularity >= min_regularity)
+        & (cv <= amount_tolerance)
+    )
+
+    # Last charge per merchant: the final row of each sorted group
+    last_index = np.flatnonzero(np.append(merchants[1:] != merchants[:-1], True))
+    last_of = np.full(n_merchants, -1)
+    last_of[merchants[last_index]] = last_index
+
+    latest_day = days.max()
+    charges = []
+    for m in recurring:
+        name, nominal_days = PERIODS[best_period[m]][0], PERIODS[best_period[m]][1]
+        last = last_of[m]
+        last_day = np.datetime64(int(days[last]), "D")
+        monthly_cost = mean[m] * 30.44 / nominal_days
+        charges.append({
+            "merchant": str(columns.merchants[m]),
+            "frequency": name,
+            "occurrences": int(occurrences[m]),
+            "average_amount": round(float(mean[m]), 2),
+            "last_amount": round(float(amounts[last]), 2),
+            "last_date": str(last_day),
+            "next_expected_date": str(last_day + np.timedelta64(int(round(nominal_days)), "D")),
+            "monthly_cost": round(float(monthly_cost), 2),
+            "annual_cost": round(float(monthly_cost * 12), 2),
+            "confidence": round(float(regularity[m] * (1 - min(cv[m], 1.0))), 3),
+            # Still active unless more than 1.5 periods have passed without a charge
+            "active": bool(latest_day - days[last] <= nominal_days * 1.5),
+        })
+
+    charges.sort(key=lambda c: c["monthly_cost"], reverse=True)
+    return charges
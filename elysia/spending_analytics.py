@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Spending Analytics Engine for Elysia
+Vectorized per-category/per-month spending statistics over columnar transaction arrays
+"""
+
+import re
+import logging
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_TIMEFRAME = re.compile(r"^\s*(\d+)\s*([dwmy])\s*$", re.IGNORECASE)
+_TIMEFRAME_DAYS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+def parse_timeframe(timeframe: Optional[str]) -> Optional[int]:
+    """Convert a timeframe like "30d", "12w", "6m" or "1y" to days (None for all)"""
+    if not timeframe or timeframe.strip().lower() == "all":
+        return None
+    match = _TIMEFRAME.match(timeframe)
+    if not match:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    return int(match.group(1)) * _TIMEFRAME_DAYS[match.group(2).lower()]
+
+class TransactionColumns:
+    """Columnar view of a user's transactions
+
+    Categories and merchants are dictionary-encoded: `category_codes` index
+    into `categories` and `merchant_codes` index into `merchants`. Amounts
+    follow the sync convention: negative amounts are spending, positive
+    amounts are income.
+    """
+
+    def __init__(
+        self,
+        amounts: np.ndarray,
+        dates: np.ndarray,
+        category_codes: np.ndarray,
+        categories: np.ndarray,
+        merchant_codes: np.ndarray,
+        merchants: np.ndarray,
+    ):
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.category_codes = np.asarray(category_codes, dtype=np.int64)
+        self.categories = np.asarray(categories, dtype=object)
+        self.merchant_codes = np.asarray(merchant_codes, dtype=np.int64)
+        self.merchants = np.asarray(merchants, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        amounts: Sequence[float],
+        dates: Sequence[Any],
+        categories: Sequence[str],
+        merchants: Sequence[str],
+    ) -> "TransactionColumns":
+        """Build columns from parallel sequences, dictionary-encoding the labels"""
+        # Hash-based factorize is several times faster than sorting with np.unique
+        category_codes, category_labels = pd.factorize(np.asarray(categories, dtype=object))
+        merchant_codes, merchant_labels = pd.factorize(np.asarray(merchants, dtype=object))
+        return cls(
+            amounts=np.asarray(amounts, dtype=np.float64),
+            dates=np.asarray(dates, dtype="datetime64[D]"),
+            category_codes=category_codes,
+            categories=np.asarray(category_labels, dtype=object),
+            merchant_codes=merchant_codes,
+            merchants=np.asarray(merchant_labels, dtype=object),
+        )
+
+    @classmethod
+    def from_records(cls, transactions: Sequence[Dict[str, Any]]) -> "TransactionColumns":
+        """Build columns from transaction dicts as stored in the Transaction collection"""
+        def primary_category(category: Any) -> str:
+            if isinstance(category, (list, tuple)):
+                return category[0] if category else "Uncategorized"
+            return category or "Uncategorized"
+
+        return cls.from_arrays(
+            amounts=[float(t.get("amount") or 0) for t in transactions],
+            dates=[str(t.get("date") or "")[:10] or "NaT" for t in transactions],
+            categories=[primary_category(t.get("category")) for t in transactions],
+            merchants=[t.get("merchant_name") or t.get("name") or "Unknown" for t in transactions],
+        )
+
+    def select(self, mask: np.ndarray) -> "TransactionColumns":
+        """Rows matching a boolean mask (label dictionaries are shared)"""
+        return TransactionColumns(
+            amounts=self.amounts[mask],
+            dates=self.dates[mask],
+            category_codes=self.category_codes[mask],
+            categories=self.categories,
+            merchant_codes=self.merchant_codes[mask],
+            merchants=self.merchants,
+        )
+
+def trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean; the first window-1 points average what is available"""
+    if len(values) == 0:
+        return values.astype(np.float64)
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+def analyze_spending(
+    columns: TransactionColumns,
+    timeframe_days: Optional[int] = None,
+    rolling_window: int = 3,
+    top_n: int = 5,
+) -> Dict[str, Any]:
+    """Compute spending statistics with vectorized group-bys
+
+    Returns totals, per-month and per-category spending, a per-category by
+    month matrix, trailing rolling averages, month-over-month deltas and the
+    top merchants by spend.
+    """
+    valid = ~np.isnat(columns.dates)
+    if timeframe_days is not None and valid.any():
+        cutoff = columns.dates[valid].max() - np.timedelta64(timeframe_days, "D")
+        valid &= columns.dates > cutoff
+    cols = columns.select(valid)
+
+    if len(cols) == 0:
+        return {
+            "transaction_count": 0,
+            "total_spending": 0.0,
+            "total_income": 0.0,
+            "months": [],
+            "monthly_spending": [],
+            "monthly_income": [],
+            "rolling_average": [],
+            "month_over_month": [],
+            "by_category": {},
+            "category_by_month": {},
+            "top_merchants": [],
+        }
+
+    spend = np.where(cols.amounts < 0, -cols.amounts, 0.0)
+    income = np.where(cols.amounts > 0, cols.amounts, 0.0)
+
+    # Month buckets relative to the first month present
+    months = cols.dates.astype("datetime64[M]").astype(np.int64)
+    first_month = months.min()
+    month_index = months - first_month
+    n_months = int(month_index.max()) + 1
+    n_categories = len(cols.categories)
+
+    # Category x month spending matrix in a single bincount
+    flat = cols.category_codes * n_months + month_index
+    matrix = np.bincount(flat, weights=spend, minlength=n_categories * n_months).reshape(n_categories, n_months)
+
+    monthly_spending = matrix.sum(axis=0)
+    monthly_income = np.bincount(month_index, weights=income, minlength=n_months)
+    category_totals = matrix.sum(axis=1)
+    rolling = trailing_mean(monthly_spending, rolling_window)
+
+    deltas = np.diff(monthly_spending)
+    previous = monthly_spending[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(previous > 0, deltas / previous, np.nan)
+
+    merchant_spend = np.bincount(cols.merchant_codes, weights=spend, minlength=len(cols.merchants))
+    merchant_counts = np.bincount(cols.merchant_codes[spend > 0], minlength=len(cols.merchants))
+    top = np.argsort(merchant_spend)[::-1][:top_n]
+    top = top[merchant_spend[top] > 0]
+
+    month_labels = [
+        str(np.datetime64(int(first_month + i), "M")) for i in range(n_months)
+    ]
+    spent_categories = np.flatnonzero(category_totals > 0)
+    spent_categories = spent_categories[np.argsort(category_totals[spent_categories])[::-1]]
+
+    return {
+        "transaction_count": int(len(cols)),
+        "total_spending": round(float(spend.sum()), 2),
+        "total_income": round(float(income.sum()), 2),
+        "months": month_labels,
+        "monthly_spending": np.round(monthly_spending, 2).tolist(),
+        "monthly_income": np.round(monthly_income, 2).tolist(),
+        "rolling_average": np.round(rolling, 2).tolist(),
+        "month_over_month": [
+            {
+                "month": month_labels[i + 1],
+                "delta": round(float(deltas[i]), 2),
+                "pct_change": None if np.isnan(pct[i]) else round(float(pct[i]), 4),
+            }
+            for i in range(len(deltas))
+        ],
+        "by_category": {
+            str(cols.categories[c]): round(float(category_totals[c]), 2) for c in spent_categories
+        },
+        "category_by_month": {
+            str(cols.categories[c]): np.round(matrix[c], 2).tolist() for c in spent_categories
+        },
+        "top_merchants": [
+            {
+                "merchant": str(cols.merchants[m]),
+                "total": round(float(merchant_spend[m]), 2),
+                "count": int(merchant_counts[m]),
+            }
+            for m in top
+        ],
+    }
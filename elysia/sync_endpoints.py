@@ -4,12 +4,19 @@ Sync API Endpoints for Elysia
 Provides endpoints to sync user data from main database to Weaviate
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Header, Query
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
+import os
+import hmac
+import time
+import asyncio
 import logging
 
 from data_sync import ElysiaDataSync
+from batch_sync import SYNC_TYPES, SYNC_USER_JOB, batch_status, register_sync_jobs, run_user_sync, start_batch
+from job_queue import JobQueue
+from realtime_sync import WebhookCoalescer, webhook_data_types
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,14 +24,38 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/sync", tags=["Data Synchronization"])
 
-# Global sync instance
-sync_service = None
+# Global sync instance, connected and warmed in the app lifespan
+sync_service: Optional[ElysiaDataSync] = None
+
+# Instance still trying to connect; built once so retries reuse its embedding
+# model, caches and executors instead of loading them on every attempt
+_connecting_service: Optional[ElysiaDataSync] = None
+
+# Serializes connecting so concurrent first callers share one service
+_sync_service_lock = asyncio.Lock()
+
+# Seconds between connection attempts while the backends are unavailable at startup
+SYNC_CONNECT_RETRY_DELAY = float(os.getenv("SYNC_CONNECT_RETRY_DELAY", "2"))
+SYNC_CONNECT_MAX_RETRY_DELAY = float(os.getenv("SYNC_CONNECT_MAX_RETRY_DELAY", "30"))
+
+# Shared secret a trusted forwarder sends (X-Webhook-Forwarder-Secret) to
+# name the user in a webhook directly; unset, webhooks must carry an item_id
+PLAID_WEBHOOK_FORWARDER_SECRET = os.getenv("PLAID_WEBHOOK_FORWARDER_SECRET")
+
+# Outcome of the startup warm-up, reported by /ready
+warmup: Dict[str, Any] = {"status": "pending"}
+
+# Durable queue running background syncs, opened and started in the app lifespan
+job_queue: Optional[JobQueue] = None
 
 # Request/Response models
 class SyncRequest(BaseModel):
     user_id: str = Field(..., description="User ID to sync")
-    sync_type: str = Field(default="all", description="Type of sync: all, transactions, accounts, profile")
-    limit: Optional[int] = Field(500, description="Limit for transaction sync")
+    sync_type: str = Field(default="all", description="Type of sync: all, transactions, backfill, accounts, profile")
+    limit: Optional[int] = Field(500, description="Limit for transaction sync (page size in incremental mode)")
+    incremental: bool = Field(True, description="Only sync transactions changed since the last sync")
+    chunk_size: Optional[int] = Field(None, description="Server-side cursor chunk size for backfill")
+    background: bool = Field(False, description="Queue the sync as a retried background job instead of waiting for it")
 
 class SyncResponse(BaseModel):
     status: str
@@ -38,108 +69,205 @@ class SyncStatusResponse(BaseModel):
 
 # Dependency to get sync service
 async def get_sync_service():
-    global sync_service
-    if not sync_service:
-        sync_service = ElysiaDataSync()
-        await sync_service.connect()
+    global sync_service, _connecting_service
+    if sync_service and sync_service.connected:
+        return sync_service
+
+    async with _sync_service_lock:
+        if not (sync_service and sync_service.connected):
+            if _connecting_service is None:
+                _connecting_service = ElysiaDataSync()
+            # connect() closes its partial connections on failure or cancellation
+            await _connecting_service.connect()
+            sync_service, _connecting_service = _connecting_service, None
     return sync_service
 
+def sync_service_ready() -> bool:
+    """Whether the sync service is connected and warmed up"""
+    return bool(sync_service and sync_service.connected and warmup["status"] == "ready")
+
+async def start_sync_service() -> ElysiaDataSync:
+    """Connect and warm the sync service, retrying with backoff until the backends are up"""
+    delay = SYNC_CONNECT_RETRY_DELAY
+    attempt = 0
+    while True:
+        attempt += 1
+        started = time.perf_counter()
+        try:
+            service = await get_sync_service()
+            timings = await service.warm_up()
+            warmup.update(
+                status="ready",
+                attempts=attempt,
+                seconds=round(time.perf_counter() - started, 4),
+                timings=timings,
+                error=None,
+            )
+            return service
+        except Exception as e:
+            warmup.update(status="retrying", attempts=attempt, error=str(e))
+            logger.warning(f"Sync service not available (attempt {attempt}): {e}; retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SYNC_CONNECT_MAX_RETRY_DELAY)
+
+async def stop_sync_service():
+    """Close the sync service's Weaviate client and PostgreSQL pool"""
+    global sync_service, _connecting_service
+    async with _sync_service_lock:
+        for service in (sync_service, _connecting_service):
+            if service:
+                await service.disconnect()
+        sync_service = _connecting_service = None
+    warmup.update(status="stopped")
+
+def open_job_queue() -> JobQueue:
+    """Open the job queue database and register the sync job handlers"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue()
+        register_sync_jobs(job_queue, get_sync_service)
+    return job_queue
+
+def get_job_queue() -> JobQueue:
+    """Dependency returning the job queue once the app has opened it"""
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not started")
+    return job_queue
+
+def queue_realtime_sync(user_id: str, data_types: Set[str]):
+    """Queue incremental syncs for the data types a user's webhooks touched"""
+    if "transactions" in data_types:
+        job_queue.enqueue(SYNC_USER_JOB, {"user_id": user_id, "sync_type": "transactions", "incremental": True})
+    if "accounts" in data_types:
+        job_queue.enqueue(SYNC_USER_JOB, {"user_id": user_id, "sync_type": "accounts"})
+
+# Bursts of webhooks for the same user become a single queued sync
+webhook_coalescer = WebhookCoalescer(queue_realtime_sync)
+
 @router.post("/user", response_model=SyncResponse)
 async def sync_user_data(
     request: SyncRequest,
     background_tasks: BackgroundTasks,
-    sync: ElysiaDataSync = Depends(get_sync_service)
+    sync: ElysiaDataSync = Depends(get_sync_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Sync user data to Weaviate"""
     try:
         logger.info(f"Starting sync for user {request.user_id}, type: {request.sync_type}")
 
-        if request.sync_type == "all":
-            result = await sync.sync_all_user_data(request.user_id)
-        elif request.sync_type == "transactions":
-            result = await sync.sync_user_transactions(request.user_id, limit=request.limit)
-        elif request.sync_type == "accounts":
-            result = await sync.sync_user_accounts(request.user_id)
-        elif request.sync_type == "profile":
-            result = await sync.sync_user_profile(request.user_id)
-        else:
+        if request.sync_type not in SYNC_TYPES:
             raise HTTPException(status_code=400, detail="Invalid sync type")
 
+        payload = request.model_dump(exclude={"background"})
+        if request.background:
+            job = job_queue.enqueue(SYNC_USER_JOB, payload)
+            return SyncResponse(
+                status="accepted",
+                message=f"Sync queued for user {request.user_id}",
+                details={"job_id": job["id"], "deduplicated": job["deduplicated"]}
+            )
+
+        result = await run_user_sync(sync, payload)
+
         return SyncResponse(
             status="success",
             message=f"Data sync completed for user {request.user_id}",
             details=result
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Sync failed for user {request.user_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
 @router.post("/batch", response_model=SyncResponse)
-async def sync_batch_users(
-    user_ids: List[str],
-    background_tasks: BackgroundTasks,
-    sync: ElysiaDataSync = Depends(get_sync_service)
-):
-    """Sync multiple users in background"""
+async def sync_batch_users(user_ids: List[str], job_queue: JobQueue = Depends(get_job_queue)):
+    """Queue a sync job per user (retried independently) and a bulk profile sync once they finish"""
     try:
-        # Add background task for batch sync
-        background_tasks.add_task(batch_sync_task, user_ids, sync)
+        batch = start_batch(job_queue, user_ids)
 
         return SyncResponse(
             status="accepted",
-            message=f"Batch sync started for {len(user_ids)} users",
-            details={"user_count": len(user_ids)}
+            message=f"Batch sync queued for {batch['user_count']} users",
+            details={
+                "job_id": batch["batch_id"],
+                "user_count": batch["user_count"],
+                "deduplicated": batch["deduplicated"],
+                "workers": job_queue.workers,
+            }
         )
 
     except Exception as e:
         logger.error(f"Batch sync failed: {e}")
         raise HTTPException(status_code=500, detail=f"Batch sync failed: {str(e)}")
 
+@router.get("/batch/{job_id}")
+async def get_batch_status(
+    job_id: str,
+    include_results: bool = True,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Get progress and per-user results for a batch sync job"""
+    status = batch_status(job_queue, job_id, include_results=include_results)
+    if not status:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return status
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="pending, running, succeeded, failed or cancelled"),
+    kind: Optional[str] = Query(None, description="Job kind, e.g. sync_user or preprocess"),
+    limit: int = Query(100, ge=1, le=1000),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """List recent background jobs and queue counters"""
+    return {"queue": job_queue.stats(), "jobs": job_queue.list_jobs(status=status, kind=kind, limit=limit)}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, job_queue: JobQueue = Depends(get_job_queue)):
+    """Get a background job's status, attempts, last error and result"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str, job_queue: JobQueue = Depends(get_job_queue)):
+    """Re-queue a failed or cancelled job"""
+    job = job_queue.retry(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, job_queue: JobQueue = Depends(get_job_queue)):
+    """Cancel a job that has not started yet"""
+    job = job_queue.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @router.get("/status/{user_id}", response_model=SyncStatusResponse)
 async def get_sync_status(
     user_id: str,
     sync: ElysiaDataSync = Depends(get_sync_service)
 ):
-    """Get sync status for a user"""
+    """Get object counts, last successful syncs and lag behind PostgreSQL for a user"""
     try:
-        # Query Weaviate for user data counts
-        transaction_collection = sync.client.collections.get("Transaction")
-        account_collection = sync.client.collections.get("Account")
-        profile_collection = sync.client.collections.get("UserProfile")
-
-        # Get counts
-        from weaviate.classes.query import Filter
-
-        transactions = transaction_collection.query.fetch_objects(
-            where=Filter.by_property("user_id").equal(user_id),
-            limit=1
-        )
-
-        accounts = account_collection.query.fetch_objects(
-            where=Filter.by_property("user_id").equal(user_id),
-            limit=1
-        )
-
-        profile = profile_collection.query.fetch_objects(
-            where=Filter.by_property("user_id").equal(user_id),
-            limit=1
-        )
+        status = await sync.get_sync_status(user_id)
+        counts = status["counts"]
 
         stats = {
-            "has_transactions": len(transactions.objects) > 0,
-            "has_accounts": len(accounts.objects) > 0,
-            "has_profile": len(profile.objects) > 0,
+            "has_transactions": counts["transactions"] > 0,
+            "has_accounts": counts["accounts"] > 0,
+            "has_profile": counts["profile"] > 0,
+            **{key: value for key, value in status.items() if key not in ("user_id", "last_sync")},
         }
 
-        # Get last sync time from profile if exists
-        last_sync = None
-        if profile.objects:
-            last_sync = profile.objects[0].properties.get("updated_at")
-
         return SyncStatusResponse(
             user_id=user_id,
-            last_sync=last_sync,
+            last_sync=status["last_sync"],
             sync_stats=stats
         )
 
@@ -147,32 +275,98 @@ async def get_sync_status(
         logger.error(f"Failed to get sync status: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
 
-@router.post("/realtime/{user_id}")
-async def enable_realtime_sync(
+@router.get("/recurring/{user_id}")
+async def get_recurring_charges(
     user_id: str,
-    background_tasks: BackgroundTasks,
     sync: ElysiaDataSync = Depends(get_sync_service)
 ):
-    """Enable real-time sync for a user (webhook-based)"""
-    # This would integrate with Plaid webhooks for real-time updates
-    return SyncResponse(
-        status="success",
-        message=f"Real-time sync enabled for user {user_id}",
-        details={"webhook_enabled": True}
-    )
+    """Get detected recurring charges (subscriptions, bills) for a user"""
+    try:
+        return await sync.get_recurring_charges(user_id)
+    except Exception as e:
+        logger.error(f"Failed to detect recurring charges: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to detect recurring charges: {str(e)}")
 
-# Background task for batch sync
-async def batch_sync_task(user_ids: List[str], sync: ElysiaDataSync):
-    """Background task to sync multiple users"""
-    results = []
-    for user_id in user_ids:
+@router.get("/search/{user_id}")
+async def search_user_transactions(
+    user_id: str,
+    q: str = Query(..., description="Free-text search, e.g. 'coffee shops' or 'car insurance'"),
+    limit: int = Query(10, ge=1, le=100),
+    sync: ElysiaDataSync = Depends(get_sync_service)
+):
+    """Search a user's transactions (hybrid vector + keyword search when embeddings are enabled)"""
+    results = await sync.search_transactions(user_id, q, limit=limit)
+    return {
+        "user_id": user_id,
+        "query": q,
+        "mode": "hybrid" if sync.embeddings else "bm25",
+        "results": results,
+        "embedding_cache": sync.embeddings.stats() if sync.embeddings else None,
+    }
+
+@router.get("/embeddings/stats")
+async def get_embedding_stats(sync: ElysiaDataSync = Depends(get_sync_service)):
+    """Embedding cache hit rates and bytes on disk"""
+    if not sync.embeddings:
+        return {"enabled": False}
+    return {"enabled": True, **sync.embeddings.stats()}
+
+@router.post("/webhooks/plaid")
+async def plaid_webhook(
+    webhook: Dict[str, Any],
+    sync: ElysiaDataSync = Depends(get_sync_service),
+    forwarder_secret: Optional[str] = Header(None, alias="X-Webhook-Forwarder-Secret")
+):
+    """Ingest a Plaid webhook and schedule a debounced incremental sync for its user
+
+    Always answers 200 for well-formed webhooks, including ones that are
+    ignored, so Plaid does not redeliver them. A `user_id` in the body is
+    only honoured from a forwarder presenting PLAID_WEBHOOK_FORWARDER_SECRET.
+    """
+    webhook_type = webhook.get("webhook_type")
+    webhook_code = webhook.get("webhook_code")
+    data_types = webhook_data_types(webhook_type, webhook_code)
+    if not data_types:
+        return {"status": "ignored", "reason": f"Unhandled webhook {webhook_type}/{webhook_code}"}
+
+    # Forwarded webhooks may carry the user directly; Plaid's own carry the item
+    user_id = webhook.get("user_id")
+    if user_id and not (
+        PLAID_WEBHOOK_FORWARDER_SECRET
+        and forwarder_secret
+        and hmac.compare_digest(forwarder_secret.encode(), PLAID_WEBHOOK_FORWARDER_SECRET.encode())
+    ):
+        raise HTTPException(status_code=403, detail="user_id is only accepted from a trusted forwarder")
+    if not user_id:
+        item_id = webhook.get("item_id")
+        if not item_id:
+            raise HTTPException(status_code=400, detail="Webhook has neither item_id nor user_id")
         try:
-            result = await sync.sync_all_user_data(user_id)
-            results.append({"user_id": user_id, "status": "success", "result": result})
-            logger.info(f"Synced user {user_id}")
+            user_id = await sync.get_user_for_item(item_id)
         except Exception as e:
-            results.append({"user_id": user_id, "status": "error", "error": str(e)})
-            logger.error(f"Failed to sync user {user_id}: {e}")
+            logger.error(f"Failed to resolve Plaid item {item_id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to resolve item: {str(e)}")
+        if not user_id:
+            logger.warning(f"Ignoring {webhook_type}/{webhook_code} webhook for unknown item {item_id}")
+            return {"status": "ignored", "reason": f"Unknown item {item_id}"}
+
+    scheduled = webhook_coalescer.submit(user_id, data_types)
+    return {"status": "accepted", "user_id": user_id, **scheduled}
+
+@router.post("/realtime/{user_id}")
+async def notify_user_changed(user_id: str):
+    """Signal that a user's data changed outside Plaid webhooks (e.g. a manual refresh)
+
+    Goes through the same debounce as webhooks and syncs transactions and accounts incrementally.
+    """
+    scheduled = webhook_coalescer.submit(user_id, ("transactions", "accounts"))
+    return SyncResponse(
+        status="accepted",
+        message=f"Incremental sync scheduled for user {user_id}",
+        details=scheduled
+    )
 
-    logger.info(f"Batch sync completed: {len(results)} users processed")
-    return results
\ No newline at end of file
+@router.get("/webhooks/stats")
+async def get_webhook_stats():
+    """Webhook coalescing counters"""
+    return webhook_coalescer.stats()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Local Sync State Store for Elysia
+Persists per-user sync watermarks, sync history, data versions, the objects already pushed to Weaviate, their months, content hashes and preprocessing runs
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_LOOKUP_CHUNK_SIZE = 500
+
+def default_data_dir() -> str:
+    """Resolve the directory used for local service state"""
+    # Use the mounted data volume inside Docker, a local folder otherwise
+    default_dir = "/app/data"
+    if not os.path.exists("/.dockerenv"):
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    return os.getenv("ELYSIA_DATA_DIR", default_dir)
+
+class SyncStateStore:
+    """SQLite-backed store for sync watermarks, synced object ids and content hashes"""
+
+    def __init__(self, path: str = None):
+        """Open (and create if needed) the state database"""
+        self.path = path or os.getenv("SYNC_STATE_PATH", os.path.join(default_data_dir(), "sync_state.db"))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        logger.info(f"Sync state store ready at {self.path}")
+
+    def _create_tables(self):
+        """Create state tables if they do not exist"""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_watermarks (
+                    user_id TEXT NOT NULL,
+                    data_type TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    last_id TEXT NOT NULL,
+                    last_sync TEXT NOT NULL,
+                    PRIMARY KEY (user_id, data_type)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_history (
+                    user_id TEXT NOT NULL,
+                    data_type TEXT NOT NULL,
+                    last_attempt TEXT NOT NULL,
+                    last_status TEXT NOT NULL,
+                    last_success TEXT,
+                    last_error TEXT,
+                    PRIMARY KEY (user_id, data_type)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    user_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS synced_objects (
+                    user_id TEXT NOT NULL,
+                    collection TEXT NOT NULL,
+                    object_id TEXT NOT NULL,
+                    PRIMARY KEY (user_id, collection, object_id)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS object_months (
+                    user_id TEXT NOT NULL,
+                    collection TEXT NOT NULL,
+                    object_id TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    PRIMARY KEY (user_id, collection, object_id)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS object_hashes (
+                    user_id TEXT NOT NULL,
+                    collection TEXT NOT NULL,
+                    uuid TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (user_id, collection, uuid)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS preprocess_runs (
+                    collection TEXT PRIMARY KEY,
+                    object_count INTEGER NOT NULL,
+                    schema_hash TEXT NOT NULL,
+                    preprocessed_at TEXT NOT NULL
+                )
+            """)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # Watermarks
+
+    def get_watermark(self, user_id: str, data_type: str) -> Optional[Tuple[datetime, str]]:
+        """Return the (updated_at, id) high-water mark for a user, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, last_id FROM sync_watermarks WHERE user_id = ? AND data_type = ?",
+                (user_id, data_type),
+            ).fetchone()
+
+        if not row:
+            return None
+        return datetime.fromisoformat(row[0]), row[1]
+
+    def set_watermark(self, user_id: str, data_type: str, updated_at: datetime, last_id: str):
+        """Advance the high-water mark for a user"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sync_watermarks (user_id, data_type, updated_at, last_id, last_sync)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, data_type) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    last_id = excluded.last_id,
+                    last_sync = excluded.last_sync
+                """,
+                (user_id, data_type, updated_at.isoformat(), last_id, datetime.now().isoformat()),
+            )
+
+    def clear_watermark(self, user_id: str, data_type: str):
+        """Forget the high-water mark so the next sync starts from scratch"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM sync_watermarks WHERE user_id = ? AND data_type = ?",
+                (user_id, data_type),
+            )
+
+    def clear_watermarks(self, data_type: str):
+        """Forget every user's high-water mark for a data type"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sync_watermarks WHERE data_type = ?", (data_type,))
+
+    # Sync history
+
+    def record_sync(self, user_id: str, data_type: str, status: str, error: Optional[str] = None):
+        """Record a sync attempt; successful ones also advance last_success (UTC)"""
+        now = datetime.now(timezone.utc).isoformat()
+        success = status in ("success", "no_data")
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sync_history (user_id, data_type, last_attempt, last_status, last_success, last_error)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, data_type) DO UPDATE SET
+                    last_attempt = excluded.last_attempt,
+                    last_status = excluded.last_status,
+                    last_success = COALESCE(excluded.last_success, sync_history.last_success),
+                    last_error = excluded.last_error
+                """,
+                (user_id, data_type, now, status, now if success else None, error),
+            )
+
+    def get_sync_history(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """Last attempt, status and last success per data type for a user"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT data_type, last_attempt, last_status, last_success, last_error
+                FROM sync_history WHERE user_id = ?
+                """,
+                (user_id,),
+            ).fetchall()
+        return {
+            row[0]: {
+                "last_attempt": row[1],
+                "last_status": row[2],
+                "last_success": row[3],
+                "last_error": row[4],
+            }
+            for row in rows
+        }
+
+    # Data versions
+
+    def get_data_version(self, user_id: str) -> int:
+        """Current data version for a user (0 if their data never changed)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM data_versions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump_data_version(self, user_id: str):
+        """Mark a user's synced data as changed, visible to every process sharing the store"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO data_versions (user_id, version, updated_at) VALUES (?, 1, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = data_versions.version + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (user_id, datetime.now(timezone.utc).isoformat()),
+            )
+
+    # Synced objects
+
+    def add_objects(self, user_id: str, collection: str, object_ids: Iterable[str]):
+        """Record objects that now exist in Weaviate"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO synced_objects (user_id, collection, object_id) VALUES (?, ?, ?)",
+                ((user_id, collection, object_id) for object_id in object_ids),
+            )
+            self._conn.execute("COMMIT")
+
+    def remove_objects(self, user_id: str, collection: str, object_ids: Iterable[str]):
+        """Forget objects that were deleted from Weaviate"""
+        keys = [(user_id, collection, object_id) for object_id in object_ids]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "DELETE FROM synced_objects WHERE user_id = ? AND collection = ? AND object_id = ?", keys
+            )
+            self._conn.executemany(
+                "DELETE FROM object_months WHERE user_id = ? AND collection = ? AND object_id = ?", keys
+            )
+            self._conn.execute("COMMIT")
+
+    def clear_objects(self, collection: str):
+        """Forget every object recorded in a collection (it was recreated empty)"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM synced_objects WHERE collection = ?", (collection,))
+            self._conn.execute("DELETE FROM object_months WHERE collection = ?", (collection,))
+            self._conn.execute("COMMIT")
+
+    def count_objects(self, user_id: str, collection: str) -> int:
+        """Count objects recorded for a user in a collection"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM synced_objects WHERE user_id = ? AND collection = ?",
+                (user_id, collection),
+            ).fetchone()
+        return row[0]
+
+    def list_object_ids(self, user_id: str, collection: str) -> List[str]:
+        """List object ids recorded for a user in a collection"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT object_id FROM synced_objects WHERE user_id = ? AND collection = ?",
+                (user_id, collection),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_object_months(self, user_id: str, collection: str, object_ids: List[str]) -> Dict[str, str]:
+        """Return the month (first-of-month ISO date) each known object was last synced in"""
+        months: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(object_ids), _LOOKUP_CHUNK_SIZE):
+                chunk = object_ids[i:i + _LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT object_id, month FROM object_months
+                    WHERE user_id = ? AND collection = ? AND object_id IN ({placeholders})
+                    """,
+                    (user_id, collection, *chunk),
+                ).fetchall()
+                months.update(rows)
+        return months
+
+    def set_object_months(self, user_id: str, collection: str, months: Dict[str, str]):
+        """Record the month each object is now synced in"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                """
+                INSERT INTO object_months (user_id, collection, object_id, month)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, collection, object_id) DO UPDATE SET
+                    month = excluded.month
+                """,
+                ((user_id, collection, object_id, month) for object_id, month in months.items()),
+            )
+            self._conn.execute("COMMIT")
+
+    # Content hashes
+
+    def get_hashes(self, user_id: str, collection: str, uuids: List[str]) -> Dict[str, str]:
+        """Return the last written content hash for each known uuid"""
+        hashes: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(uuids), _LOOKUP_CHUNK_SIZE):
+                chunk = uuids[i:i + _LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT uuid, content_hash FROM object_hashes
+                    WHERE user_id = ? AND collection = ? AND uuid IN ({placeholders})
+                    """,
+                    (user_id, collection, *chunk),
+                ).fetchall()
+                hashes.update(rows)
+        return hashes
+
+    def set_hashes(self, user_id: str, collection: str, hashes: Dict[str, str]):
+        """Record the content hashes now held by Weaviate"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                """
+                INSERT INTO object_hashes (user_id, collection, uuid, content_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, collection, uuid) DO UPDATE SET
+                    content_hash = excluded.content_hash
+                """,
+                ((user_id, collection, uuid, content_hash) for uuid, content_hash in hashes.items()),
+            )
+            self._conn.execute("COMMIT")
+
+    def remove_hashes(self, user_id: str, collection: str, uuids: Iterable[str]):
+        """Forget hashes of objects deleted from Weaviate"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "DELETE FROM object_hashes WHERE user_id = ? AND collection = ? AND uuid = ?",
+                ((user_id, collection, uuid) for uuid in uuids),
+            )
+            self._conn.execute("COMMIT")
+
+    def clear_hashes(self, collection: str, user_id: Optional[str] = None):
+        """Forget hashes for a collection (optionally one user) so objects are re-verified"""
+        with self._lock:
+            if user_id is None:
+                self._conn.execute("DELETE FROM object_hashes WHERE collection = ?", (collection,))
+            else:
+                self._conn.execute(
+                    "DELETE FROM object_hashes WHERE user_id = ? AND collection = ?",
+                    (user_id, collection),
+                )
+
+    # Preprocessing runs
+
+    def get_preprocess_run(self, collection: str) -> Optional[Dict[str, Any]]:
+        """Object count and schema hash a collection had when it was last preprocessed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT object_count, schema_hash, preprocessed_at FROM preprocess_runs WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+        if not row:
+            return None
+        return {"object_count": row[0], "schema_hash": row[1], "preprocessed_at": row[2]}
+
+    def set_preprocess_run(self, collection: str, object_count: int, schema_hash: str):
+        """Record the state a collection was preprocessed at"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO preprocess_runs (collection, object_count, schema_hash, preprocessed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (collection) DO UPDATE SET
+                    object_count = excluded.object_count,
+                    schema_hash = excluded.schema_hash,
+                    preprocessed_at = excluded.preprocessed_at
+                """,
+                (collection, object_count, schema_hash, datetime.now(timezone.utc).isoformat()),
+            )
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Weaviate Tenancy for Elysia
+Maps users to multi-tenant collections and tenants (one per user or per hash bucket)
+"""
+
+import os
+import re
+import hashlib
+import logging
+from typing import Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# off: shared collections filtered by user_id
+# user: one tenant per user
+# bucket: users hashed into WEAVIATE_TENANT_BUCKETS tenants
+MULTI_TENANCY_MODE = os.getenv("WEAVIATE_MULTI_TENANCY", "off").lower()
+TENANT_BUCKETS = int(os.getenv("WEAVIATE_TENANT_BUCKETS", "64"))
+
+TENANCY_MODES = ("off", "user", "bucket")
+
+# Multi-tenancy cannot be switched on for an existing collection, so
+# tenant-aware data lives in separately named collections
+MT_SUFFIX = "MT"
+
+# Tenant names allow letters, digits, '_' and '-', up to 64 characters
+_INVALID_TENANT_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+def resolve_mode(mode: Optional[str] = None) -> str:
+    """Validate a tenancy mode, defaulting to the configured one"""
+    mode = (mode or MULTI_TENANCY_MODE).lower()
+    if mode not in TENANCY_MODES:
+        raise ValueError(f"Invalid multi-tenancy mode {mode}; expected one of {', '.join(TENANCY_MODES)}")
+    return mode
+
+def collection_name(base_name: str, mode: str) -> str:
+    """Physical collection holding `base_name` objects in a tenancy mode"""
+    return base_name if mode == "off" else f"{base_name}{MT_SUFFIX}"
+
+def base_collection_name(name: str) -> str:
+    """Logical collection name of a physical (possibly multi-tenant) collection"""
+    return name[:-len(MT_SUFFIX)] if name.endswith(MT_SUFFIX) else name
+
+def tenant_for(user_id: str, mode: str, buckets: int = TENANT_BUCKETS) -> Optional[str]:
+    """Tenant holding a user's objects, or None when multi-tenancy is off"""
+    if mode == "off":
+        return None
+
+    if mode == "bucket":
+        bucket = int(hashlib.md5(user_id.encode()).hexdigest(), 16) % buckets
+        return f"bucket-{bucket:04d}"
+
+    tenant = f"user-{_INVALID_TENANT_CHARS.sub('_', user_id)}"
+    if len(tenant) > 64 or tenant != f"user-{user_id}":
+        # Ids that would be mangled or truncated get a stable hashed name instead
+        tenant = f"user-{hashlib.sha1(user_id.encode()).hexdigest()}"
+    return tenant
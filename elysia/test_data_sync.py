@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ElysiaDataSync helpers, run without Weaviate or PostgreSQL
+Run with: python -m pytest test_data_sync.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+import data_sync
+from data_sync import (
+    INVALID_INDEX_QUERY,
+    ITEM_OWNER_QUERY,
+    MIGRATIONS_LOCK_KEY,
+    ElysiaDataSync,
+    concurrent_index_name,
+    migration_statements,
+)
+
+class FakeConnection:
+    """Records executed SQL; `fetchval`/`fetch` answer from a query -> result map"""
+
+    def __init__(self, fetchval=None, fetch=None):
+        self.executed = []
+        self.fetchval_results = fetchval or {}
+        self.fetch_results = fetch or {}
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), args))
+
+    async def fetchval(self, sql, *args):
+        return self.fetchval_results.get((sql, args))
+
+    async def fetch(self, sql, *args):
+        return self.fetch_results.get(" ".join(sql.split()), [])
+
+    def transaction(self):
+        return FakeTransaction()
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+@pytest.fixture
+def sync(tmp_path):
+    service = ElysiaDataSync(state_path=str(tmp_path / "sync_state.db"), embeddings=None)
+    yield service
+    service.state.close()
+
+def test_migration_statements_drop_comments_before_splitting():
+    sql = """-- elysia:no-transaction
+-- a comment; with a semicolon
+CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON t (x);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS b_idx ON t (y);
+"""
+    assert migration_statements(sql) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON t (x)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS b_idx ON t (y)",
+    ]
+
+@pytest.mark.parametrize("statement, name", [
+    ("CREATE INDEX CONCURRENTLY IF NOT EXISTS elysia_a_idx\n    ON \"T\" (x)", "elysia_a_idx"),
+    ("create unique index concurrently if not exists u_idx on t (x)", "u_idx"),
+    ("CREATE INDEX IF NOT EXISTS plain_idx ON t (x)", None),
+    ("CREATE TABLE t (x int)", None),
+])
+def test_concurrent_index_name(statement, name):
+    assert concurrent_index_name(statement) == name
+
+def test_migrations_drop_invalid_index_before_rebuilding(sync, tmp_path, monkeypatch):
+    (tmp_path / "migrations").mkdir()
+    (tmp_path / "migrations" / "001_indexes.sql").write_text(
+        "-- elysia:no-transaction\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS broken_idx ON t (x);\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS fine_idx ON t (y);\n"
+    )
+    monkeypatch.setattr(data_sync, "MIGRATIONS_DIR", str(tmp_path / "migrations"))
+    conn = FakeConnection(fetchval={(INVALID_INDEX_QUERY, ("broken_idx",)): 1})
+    sync.db_pool = FakePool(conn)
+
+    asyncio.run(sync.apply_migrations())
+
+    statements = [sql for sql, _ in conn.executed]
+    drop = statements.index('DROP INDEX CONCURRENTLY IF EXISTS "broken_idx"')
+    assert statements[drop + 1] == "CREATE INDEX CONCURRENTLY IF NOT EXISTS broken_idx ON t (x)"
+    assert not any("fine_idx" in sql for sql in statements if sql.startswith("DROP"))
+    assert ("INSERT INTO elysia_schema_migrations (version) VALUES ($1)", ("001_indexes.sql",)) in conn.executed
+    assert conn.executed[-1] == ("SELECT pg_advisory_unlock($1)", (MIGRATIONS_LOCK_KEY,))
+
+def test_plaid_item_resolves_to_its_owner(sync):
+    # Plaid's item id lives in the Prisma columns, not in "Item".id
+    assert '"ITEM_ID" = $1' in ITEM_OWNER_QUERY and '"userId"' in ITEM_OWNER_QUERY
+    sync.db_pool = FakePool(FakeConnection(fetchval={(ITEM_OWNER_QUERY, ("plaid-item-1",)): "user-1"}))
+
+    assert asyncio.run(sync.get_user_for_item("plaid-item-1")) == "user-1"
+    assert asyncio.run(sync.get_user_for_item("app-item-uuid")) is None
+
+class FakeEmbeddings:
+    name = "fake"
+    disk_cache = None
+
+    def embed(self, texts):
+        return [[float(len(text))] for text in texts]
+
+def test_query_embedding_does_not_wait_for_weaviate_io(tmp_path):
+    sync = ElysiaDataSync(state_path=str(tmp_path / "sync_state.db"), embeddings=FakeEmbeddings())
+    release = threading.Event()
+
+    async def run():
+        # Every Weaviate I/O thread is busy, as during a large sync
+        busy = [asyncio.ensure_future(sync.run_weaviate(release.wait)) for _ in range(sync.weaviate_io_threads)]
+        try:
+            return await asyncio.wait_for(sync.embed_query("coffee"), timeout=1)
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+
+    assert asyncio.run(run()) == [6.0]
+    sync.state.close()
+
+class FakeWeaviateClient:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_cancelled_connect_closes_what_it_opened(sync, monkeypatch):
+    client = FakeWeaviateClient()
+    monkeypatch.setattr(data_sync.weaviate, "connect_to_local", lambda **kwargs: client)
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(data_sync.asyncpg, "create_pool", hang)
+
+    async def run():
+        task = asyncio.ensure_future(sync.connect())
+        while sync.client is None:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert client.closed
+    assert sync.client is None and not sync.connected
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the health probes
+Run with: python -m pytest test_health.py
+"""
+
+import asyncio
+import threading
+
+from data_sync import ElysiaDataSync
+from health import HealthProbes
+
+class ReadyClient:
+    def is_ready(self):
+        return True
+
+class IdlePool:
+    def acquire(self, timeout=None):
+        class Acquire:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def fetchval(self, sql, timeout=None):
+                return 1
+
+        return Acquire()
+
+def test_weaviate_probe_answers_while_weaviate_io_is_saturated(tmp_path):
+    sync = ElysiaDataSync(state_path=str(tmp_path / "sync_state.db"), embeddings=None)
+    sync.client = ReadyClient()
+    sync.db_pool = IdlePool()
+    sync.connected = True
+    probes = HealthProbes(lambda: sync, ttl=0, timeout=0.5)
+    release = threading.Event()
+
+    async def run():
+        # Every Weaviate I/O thread is held by a long batch write
+        busy = [asyncio.ensure_future(sync.run_weaviate(release.wait)) for _ in range(sync.weaviate_io_threads)]
+        try:
+            return await probes.check()
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+
+    try:
+        checks = asyncio.run(run())
+    finally:
+        probes.close()
+        sync.state.close()
+    assert checks["weaviate"]["healthy"] is True
+    assert checks["postgres"]["healthy"] is True
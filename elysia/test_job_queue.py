@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the durable job queue
+Run with: python -m pytest test_job_queue.py
+"""
+
+import time
+import asyncio
+import sqlite3
+
+import pytest
+
+from job_queue import JobQueue
+
+def make_queue(tmp_path, **kwargs):
+    options = {"workers": 1, "base_delay": 0.01, "max_delay": 0.02, "poll_interval": 0.01, **kwargs}
+    return JobQueue(path=str(tmp_path / "jobs.db"), **options)
+
+async def wait_for(queue, job_id, statuses=("succeeded", "failed"), timeout=5):
+    """Poll until a job reaches one of `statuses`"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job and job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} stuck in {queue.get(job_id)['status']}")
+
+def test_identical_pending_jobs_are_deduplicated(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.enqueue("sync", {"user_id": "u1", "type": "all"})
+    second = queue.enqueue("sync", {"type": "all", "user_id": "u1"})
+    other = queue.enqueue("sync", {"user_id": "u2", "type": "all"})
+    keyed = queue.enqueue("sync", {"user_id": "u3"}, dedup_key="user:u1")
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True and second["id"] == first["id"]
+    assert other["id"] != first["id"]
+    assert keyed["id"] != first["id"]
+    assert queue.stats()["jobs"] == {"pending": 3}
+
+def test_failing_job_is_retried_with_backoff_then_fails(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=3)
+    attempts = []
+
+    async def flaky(job):
+        attempts.append(job["attempts"])
+        raise RuntimeError(f"boom {job['attempts']}")
+
+    async def run():
+        queue.register("flaky", flaky)
+        job = queue.enqueue("flaky", {})
+        await queue.start()
+        try:
+            return await wait_for(queue, job["id"])
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert attempts == [1, 2, 3]
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert job["last_error"] == "boom 3"
+
+def test_job_succeeds_after_transient_failure(tmp_path):
+    queue = make_queue(tmp_path)
+
+    async def once_flaky(job):
+        if job["attempts"] == 1:
+            raise RuntimeError("transient")
+        return {"synced": job["payload"]["user_id"]}
+
+    async def run():
+        queue.register("sync", once_flaky)
+        job = queue.enqueue("sync", {"user_id": "u1"})
+        await queue.start()
+        try:
+            return await wait_for(queue, job["id"])
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert job["result"] == {"synced": "u1"}
+    assert job["progress"] == 1.0
+
+def test_backoff_grows_and_is_capped(tmp_path):
+    queue = make_queue(tmp_path, base_delay=1, max_delay=8)
+    for attempts, ceiling in ((1, 1), (2, 2), (3, 4), (4, 8), (10, 8)):
+        delay = queue._backoff(attempts)
+        assert ceiling / 2 <= delay <= ceiling
+
+def test_missing_handler_fails_the_job(tmp_path):
+    queue = make_queue(tmp_path)
+
+    async def run():
+        job = queue.enqueue("unknown", {})
+        await queue.start()
+        try:
+            return await wait_for(queue, job["id"])
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert "No handler" in job["last_error"]
+
+def test_requeue_folds_identical_pending_twin(tmp_path):
+    queue = make_queue(tmp_path)
+    job = queue.enqueue("sync", {"user_id": "u1"})
+    claimed = queue._claim()
+    assert claimed["id"] == job["id"]
+
+    # While the job runs an identical one is queued, inside a batch
+    batch = queue.enqueue_batch("sync", [{"user_id": "u1"}])
+    twin_id = queue.get_batch(batch["batch_id"])["jobs"][0]["id"]
+    assert twin_id != job["id"]
+
+    assert queue._requeue(job["id"], run_at=time.time() + 60, error="retry") is True
+
+    assert queue.get(twin_id) is None
+    requeued = queue.get(job["id"])
+    assert requeued["status"] == "pending"
+    assert requeued["last_error"] == "retry"
+    # The folded job took over the batch membership, and is due as soon as the twin was
+    assert [member["id"] for member in queue.get_batch(batch["batch_id"])["jobs"]] == [job["id"]]
+    assert queue._claim()["id"] == job["id"]
+
+def test_batch_finalizer_runs_once_all_members_finish(tmp_path):
+    queue = make_queue(tmp_path, workers=2, max_attempts=1)
+    finalized = []
+
+    async def member(job):
+        if job["payload"]["user_id"] == "bad":
+            raise RuntimeError("no")
+        return {"user_id": job["payload"]["user_id"]}
+
+    async def finalize(job):
+        batch = queue.get_batch(job["payload"]["batch_id"])
+        finalized.append(sorted((m["payload"]["user_id"], m["status"]) for m in batch["jobs"]))
+        return {"label": job["payload"]["label"]}
+
+    async def run():
+        queue.register("member", member)
+        queue.register("finalize", finalize)
+        batch = queue.enqueue_batch(
+            "member",
+            [{"user_id": "a"}, {"user_id": "b"}, {"user_id": "bad"}],
+            finalizer=("finalize", {"label": "profiles"}),
+        )
+        await queue.start()
+        try:
+            for _ in range(500):
+                finalizer = queue.get_batch(batch["batch_id"])["finalizer"]
+                if finalizer and finalizer["status"] == "succeeded":
+                    return finalizer
+                await asyncio.sleep(0.01)
+            raise AssertionError("finalizer never ran")
+        finally:
+            await queue.stop()
+
+    finalizer = asyncio.run(run())
+    assert finalizer["result"] == {"label": "profiles"}
+    assert finalized == [[("a", "succeeded"), ("b", "succeeded"), ("bad", "failed")]]
+
+def test_empty_batch_finalizes_immediately(tmp_path):
+    queue = make_queue(tmp_path)
+    batch = queue.enqueue_batch("member", [], finalizer=("finalize", {}))
+    finalizer = queue.get_batch(batch["batch_id"])["finalizer"]
+    assert finalizer["kind"] == "finalize"
+    assert finalizer["payload"] == {"batch_id": batch["batch_id"]}
+
+def test_cancel_retry_and_prune(tmp_path):
+    queue = make_queue(tmp_path)
+    job = queue.enqueue("sync", {"user_id": "u1"})
+
+    assert queue.cancel(job["id"])["status"] == "cancelled"
+    retried = queue.retry(job["id"])
+    assert retried["status"] == "pending" and retried["attempts"] == 0
+
+    # Running jobs cannot be cancelled
+    queue._claim()
+    assert queue.cancel(job["id"])["status"] == "running"
+
+    queue._finish(job["id"], "succeeded", result={"ok": True})
+    assert queue.prune(older_than_hours=1) == 0
+    assert queue.prune(older_than_hours=-1) == 1
+    assert queue.get(job["id"]) is None
+
+def test_lapsed_lease_is_reclaimed_but_live_one_is_not(tmp_path):
+    crashed = make_queue(tmp_path, lease_seconds=-1)
+    crashed.enqueue("sync", {"user_id": "u1"})
+    lost = crashed._claim()
+
+    alive = make_queue(tmp_path, lease_seconds=60)
+    alive.enqueue("sync", {"user_id": "u2"})
+    held = alive._claim()
+
+    other = make_queue(tmp_path)
+    assert other._reclaim_expired() == 1
+    assert other.get(lost["id"])["status"] == "pending"
+    assert other.get(held["id"])["status"] == "running"
+
+    # The crashed process can no longer record an outcome for the job it lost
+    crashed._finish(lost["id"], "succeeded")
+    assert other.get(lost["id"])["status"] == "pending"
+    assert other._requeue(held["id"], run_at=time.time()) is False
+
+def test_stop_requeues_interrupted_job_without_spending_an_attempt(tmp_path):
+    queue = make_queue(tmp_path)
+    started = asyncio.Event()
+
+    async def hang(job):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def run():
+        queue.register("hang", hang)
+        job = queue.enqueue("hang", {})
+        await queue.start()
+        await started.wait()
+        await queue.stop(timeout=0.05)
+        return queue.get(job["id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == "pending"
+    assert job["attempts"] == 0
+    assert job["worker"] is None
+
+def test_opens_database_created_before_leases(tmp_path):
+    path = tmp_path / "jobs.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, dedup_key TEXT,
+            status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,
+            run_at REAL NOT NULL, progress REAL, created_at TEXT NOT NULL, started_at TEXT,
+            finished_at TEXT, last_error TEXT, result TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO jobs (id, kind, payload, dedup_key, status, attempts, max_attempts, run_at, created_at)
+        VALUES ('old', 'sync', '{}', 'sync:{}', 'running', 1, 5, 0, '2024-01-01T00:00:00')
+    """)
+    conn.commit()
+    conn.close()
+
+    queue = make_queue(tmp_path)
+    assert queue._reclaim_expired() == 1
+    assert queue.get("old")["status"] == "pending"
+
+@pytest.mark.parametrize("progress, stored", [(0.5, 0.5), (-1, 0.0), (3, 1.0)])
+def test_set_progress_is_clamped(tmp_path, progress, stored):
+    queue = make_queue(tmp_path)
+    job = queue.enqueue("sync", {})
+    queue.set_progress(job["id"], progress)
+    assert queue.get(job["id"])["progress"] == stored
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for webhook coalescing
+Run with: python -m pytest test_realtime_sync.py
+"""
+
+import asyncio
+
+import pytest
+
+from realtime_sync import WebhookCoalescer, webhook_data_types
+
+@pytest.mark.parametrize("webhook_type, webhook_code, data_types", [
+    ("TRANSACTIONS", "SYNC_UPDATES_AVAILABLE", ("transactions", "accounts")),
+    ("transactions", "default_update", ("transactions", "accounts")),
+    ("TRANSACTIONS", "HISTORICAL_UPDATE", ("transactions",)),
+    ("TRANSACTIONS", "TRANSACTIONS_REMOVED", ("transactions",)),
+    ("ITEM", "ERROR", ()),
+    (None, None, ()),
+])
+def test_webhook_data_types(webhook_type, webhook_code, data_types):
+    assert webhook_data_types(webhook_type, webhook_code) == data_types
+
+def recorder():
+    flushed = []
+    return flushed, lambda user_id, data_types: flushed.append((user_id, sorted(data_types)))
+
+def test_burst_is_flushed_once_after_it_settles():
+    flushed, flush = recorder()
+
+    async def run():
+        coalescer = WebhookCoalescer(flush, debounce=0.05, max_delay=5)
+        for _ in range(5):
+            scheduled = coalescer.submit("u1", ("transactions",))
+            await asyncio.sleep(0.01)
+        coalescer.submit("u1", ("accounts",))
+        assert flushed == []
+        await asyncio.sleep(0.1)
+        return coalescer, scheduled
+
+    coalescer, scheduled = asyncio.run(run())
+    assert scheduled["coalesced_events"] == 5
+    assert 0 < scheduled["flush_in"] <= 0.05
+    assert flushed == [("u1", ["accounts", "transactions"])]
+    assert coalescer.stats()["received"] == 6
+    assert coalescer.stats()["flushes"] == 1
+    assert coalescer.stats()["pending_users"] == 0
+
+def test_steady_stream_still_flushes_at_max_delay():
+    flushed, flush = recorder()
+
+    async def run():
+        coalescer = WebhookCoalescer(flush, debounce=0.05, max_delay=0.12)
+        for _ in range(12):
+            coalescer.submit("u1", ("transactions",))
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    # 0.24s of webhooks 0.02s apart never settle, so only max_delay flushes them
+    assert len(flushed) >= 2
+    assert all(entry == ("u1", ["transactions"]) for entry in flushed)
+
+def test_users_are_debounced_independently():
+    flushed, flush = recorder()
+
+    async def run():
+        coalescer = WebhookCoalescer(flush, debounce=0.03, max_delay=1)
+        coalescer.submit("u1", ("transactions",))
+        coalescer.submit("u2", ("accounts",))
+        await asyncio.sleep(0.08)
+
+    asyncio.run(run())
+    assert sorted(flushed) == [("u1", ["transactions"]), ("u2", ["accounts"])]
+
+def test_flush_all_flushes_pending_users_immediately():
+    flushed, flush = recorder()
+
+    async def run():
+        coalescer = WebhookCoalescer(flush, debounce=60, max_delay=60)
+        coalescer.submit("u1", ("transactions",))
+        coalescer.submit("u2", ("accounts",))
+        coalescer.flush_all()
+        # The cancelled timers must not flush a second time
+        await asyncio.sleep(0.01)
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert sorted(flushed) == [("u1", ["transactions"]), ("u2", ["accounts"])]
+    assert coalescer.stats()["pending_users"] == 0
+    assert coalescer.stats()["flushes"] == 2
+
+def test_failing_flush_callback_does_not_break_the_coalescer():
+    calls = []
+
+    def flush(user_id, data_types):
+        calls.append(user_id)
+        raise RuntimeError("queue unavailable")
+
+    async def run():
+        coalescer = WebhookCoalescer(flush, debounce=0.01, max_delay=1)
+        coalescer.submit("u1", ("transactions",))
+        await asyncio.sleep(0.05)
+        coalescer.submit("u1", ("transactions",))
+        await asyncio.sleep(0.05)
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert calls == ["u1", "u1"]
+    assert coalescer.stats()["pending_users"] == 0
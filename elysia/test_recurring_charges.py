@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the recurring charge detector
+Run with: python -m pytest test_recurring_charges.py
+"""
+
+from datetime import date, timedelta
+
+from spending_analytics import TransactionColumns
+from recurring_charges import detect_recurring_charges
+
+def columns(rows):
+    """Columns from (amount, date, merchant) tuples"""
+    amounts, dates, merchants = zip(*rows)
+    return TransactionColumns.from_arrays(amounts, [d.isoformat() for d in dates], ["General"] * len(rows), merchants)
+
+def series(merchant, amount, start, every_days, count, jitter=(0,)):
+    """`count` charges of `amount` every `every_days` days, with cycling day jitter"""
+    return [
+        (-amount, start + timedelta(days=i * every_days + jitter[i % len(jitter)]), merchant)
+        for i in range(count)
+    ]
+
+def by_merchant(charges):
+    return {charge["merchant"]: charge for charge in charges}
+
+def test_detects_monthly_subscription_with_date_jitter():
+    rows = series("Streamly", 15.99, date(2024, 1, 3), 30, 6, jitter=(0, 2, -1))
+    charges = by_merchant(detect_recurring_charges(columns(rows)))
+
+    charge = charges["Streamly"]
+    assert charge["frequency"] == "monthly"
+    assert charge["occurrences"] == 6
+    assert charge["average_amount"] == 15.99
+    assert charge["annual_cost"] == round(charge["monthly_cost"] * 12, 2)
+    assert charge["active"] is True
+
+def test_detects_weekly_and_annual_periods():
+    rows = (
+        series("Gym", 10.0, date(2024, 1, 1), 7, 8)
+        + series("Insurance", 600.0, date(2022, 3, 1), 365, 3)
+    )
+    charges = by_merchant(detect_recurring_charges(columns(rows)))
+    assert charges["Gym"]["frequency"] == "weekly"
+    assert charges["Insurance"]["frequency"] == "annual"
+    assert charges["Insurance"]["monthly_cost"] == round(600.0 * 30.44 / 365.25, 2)
+
+def test_ignores_irregular_merchants_and_large_amount_swings():
+    rows = (
+        [(-20.0, date(2024, 1, d), "Grocer") for d in (2, 3, 11, 29)]
+        + [(-amount, date(2024, m, 5), "Utility") for m, amount in zip(range(1, 7), (10, 90, 15, 120, 8, 70))]
+    )
+    assert detect_recurring_charges(columns(rows)) == []
+
+def test_income_is_not_a_recurring_charge():
+    rows = [(2500.0, date(2024, m, 1), "Employer") for m in range(1, 7)]
+    assert detect_recurring_charges(columns(rows)) == []
+
+def test_lapsed_subscription_is_inactive():
+    rows = (
+        series("OldMusic", 9.99, date(2023, 1, 10), 30, 4)
+        + [(-5.0, date(2024, 6, 1), "Cafe")]
+    )
+    charge = by_merchant(detect_recurring_charges(columns(rows)))["OldMusic"]
+    assert charge["active"] is False
+    assert charge["next_expected_date"] == (date(2023, 1, 10) + timedelta(days=90 + 30)).isoformat()
+
+def test_sorted_by_monthly_cost():
+    rows = series("Cheap", 5.0, date(2024, 1, 1), 30, 4) + series("Pricey", 50.0, date(2024, 1, 2), 30, 4)
+    assert [c["merchant"] for c in detect_recurring_charges(columns(rows))] == ["Pricey", "Cheap"]
+
+def test_too_little_data():
+    assert detect_recurring_charges(columns([(-5.0, date(2024, 1, 1), "Once")])) == []
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the spending analytics engine
+Run with: python -m pytest test_spending_analytics.py
+"""
+
+import numpy as np
+import pytest
+
+from spending_analytics import TransactionColumns, analyze_spending, parse_timeframe, trailing_mean
+
+def columns(rows):
+    """Columns from (amount, date, category, merchant) tuples"""
+    amounts, dates, categories, merchants = zip(*rows)
+    return TransactionColumns.from_arrays(amounts, dates, categories, merchants)
+
+@pytest.mark.parametrize("timeframe, days", [
+    ("30d", 30), ("2w", 14), ("6m", 180), ("1y", 365), (" 3 M ", 90), (None, None), ("all", None),
+])
+def test_parse_timeframe(timeframe, days):
+    assert parse_timeframe(timeframe) == days
+
+def test_parse_timeframe_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_timeframe("last month")
+
+def test_trailing_mean_averages_what_is_available():
+    values = np.array([3.0, 6.0, 9.0, 12.0])
+    assert trailing_mean(values, 3).tolist() == [3.0, 4.5, 6.0, 9.0]
+    assert trailing_mean(np.array([]), 3).tolist() == []
+
+def test_from_records_uses_primary_category_and_merchant_fallbacks():
+    cols = TransactionColumns.from_records([
+        {"amount": -10, "date": "2024-01-05T00:00:00", "category": ["Food", "Coffee"], "merchant_name": "Cafe"},
+        {"amount": -5, "date": "2024-01-06", "category": None, "name": "Kiosk"},
+        {"amount": 100, "date": None, "category": "Income"},
+    ])
+    assert len(cols) == 3
+    assert list(cols.categories[cols.category_codes]) == ["Food", "Uncategorized", "Income"]
+    assert list(cols.merchants[cols.merchant_codes]) == ["Cafe", "Kiosk", "Unknown"]
+    assert np.isnat(cols.dates[2])
+
+def test_analyze_spending_groups_by_month_category_and_merchant():
+    result = analyze_spending(columns([
+        (-100.0, "2024-01-10", "Food", "Grocer"),
+        (-50.0, "2024-01-20", "Travel", "Airline"),
+        (2000.0, "2024-01-31", "Income", "Employer"),
+        (-150.0, "2024-02-10", "Food", "Grocer"),
+        (-30.0, "2024-03-01", "Food", "Cafe"),
+    ]))
+
+    assert result["transaction_count"] == 5
+    assert result["total_spending"] == 330.0
+    assert result["total_income"] == 2000.0
+    assert result["months"] == ["2024-01", "2024-02", "2024-03"]
+    assert result["monthly_spending"] == [150.0, 150.0, 30.0]
+    assert result["monthly_income"] == [2000.0, 0.0, 0.0]
+    assert result["by_category"] == {"Food": 280.0, "Travel": 50.0}
+    assert list(result["by_category"]) == ["Food", "Travel"]
+    assert result["category_by_month"]["Food"] == [100.0, 150.0, 30.0]
+    assert result["rolling_average"] == [150.0, 150.0, 110.0]
+    assert result["month_over_month"] == [
+        {"month": "2024-02", "delta": 0.0, "pct_change": 0.0},
+        {"month": "2024-03", "delta": -120.0, "pct_change": -0.8},
+    ]
+    assert result["top_merchants"][0] == {"merchant": "Grocer", "total": 250.0, "count": 2}
+    assert "Employer" not in [m["merchant"] for m in result["top_merchants"]]
+
+def test_analyze_spending_month_gaps_and_zero_previous_month():
+    result = analyze_spending(columns([
+        (-10.0, "2024-01-15", "Food", "A"),
+        (-20.0, "2024-03-15", "Food", "A"),
+    ]))
+    assert result["months"] == ["2024-01", "2024-02", "2024-03"]
+    assert result["monthly_spending"] == [10.0, 0.0, 20.0]
+    assert result["month_over_month"][1]["pct_change"] is None
+
+def test_analyze_spending_timeframe_is_relative_to_latest_transaction():
+    result = analyze_spending(columns([
+        (-10.0, "2023-01-01", "Food", "Old"),
+        (-20.0, "2024-06-01", "Food", "New"),
+        (-30.0, "2024-06-20", "Food", "New"),
+    ]), timeframe_days=30)
+    assert result["transaction_count"] == 2
+    assert result["total_spending"] == 50.0
+
+def test_analyze_spending_empty_input():
+    result = analyze_spending(TransactionColumns.from_records([]))
+    assert result["transaction_count"] == 0
+    assert result["months"] == []
+    assert result["top_merchants"] == []
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the sync endpoints (Plaid webhooks, sync service startup)
+Run with: python -m pytest test_sync_endpoints.py
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import sync_endpoints
+from data_sync import ITEM_OWNER_QUERY, ElysiaDataSync
+from test_data_sync import FakeConnection, FakePool
+
+class RecordingCoalescer:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, user_id, data_types):
+        self.submitted.append((user_id, tuple(data_types)))
+        return {"coalesced_events": 1, "data_types": sorted(data_types), "flush_in": 10.0}
+
+@pytest.fixture
+def coalescer(monkeypatch):
+    recording = RecordingCoalescer()
+    monkeypatch.setattr(sync_endpoints, "webhook_coalescer", recording)
+    return recording
+
+@pytest.fixture
+def client(tmp_path):
+    sync = ElysiaDataSync(state_path=str(tmp_path / "sync_state.db"), embeddings=None)
+    sync.db_pool = FakePool(FakeConnection(fetchval={(ITEM_OWNER_QUERY, ("plaid-item-1",)): "user-1"}))
+
+    app = FastAPI()
+    app.include_router(sync_endpoints.router)
+    app.dependency_overrides[sync_endpoints.get_sync_service] = lambda: sync
+    yield TestClient(app)
+    sync.state.close()
+
+def webhook(**fields):
+    return {"webhook_type": "TRANSACTIONS", "webhook_code": "SYNC_UPDATES_AVAILABLE", **fields}
+
+def test_plaid_item_webhook_queues_its_owners_sync(client, coalescer):
+    response = client.post("/sync/webhooks/plaid", json=webhook(item_id="plaid-item-1"))
+    assert response.status_code == 200
+    assert response.json()["status"] == "accepted"
+    assert response.json()["user_id"] == "user-1"
+    assert coalescer.submitted == [("user-1", ("transactions", "accounts"))]
+
+def test_unknown_item_is_ignored(client, coalescer):
+    response = client.post("/sync/webhooks/plaid", json=webhook(item_id="other-item"))
+    assert response.json()["status"] == "ignored"
+    assert coalescer.submitted == []
+
+def test_unhandled_webhook_is_ignored(client, coalescer):
+    response = client.post("/sync/webhooks/plaid", json={"webhook_type": "ITEM", "webhook_code": "ERROR"})
+    assert response.json()["status"] == "ignored"
+    assert coalescer.submitted == []
+
+@pytest.mark.parametrize("configured, sent", [(None, None), (None, "guess"), ("s3cret", None), ("s3cret", "wrong")])
+def test_user_id_needs_the_forwarder_secret(client, coalescer, monkeypatch, configured, sent):
+    monkeypatch.setattr(sync_endpoints, "PLAID_WEBHOOK_FORWARDER_SECRET", configured)
+    headers = {"X-Webhook-Forwarder-Secret": sent} if sent else {}
+    response = client.post("/sync/webhooks/plaid", json=webhook(user_id="victim"), headers=headers)
+    assert response.status_code == 403
+    assert coalescer.submitted == []
+
+def test_trusted_forwarder_can_name_the_user(client, coalescer, monkeypatch):
+    monkeypatch.setattr(sync_endpoints, "PLAID_WEBHOOK_FORWARDER_SECRET", "s3cret")
+    response = client.post(
+        "/sync/webhooks/plaid",
+        json=webhook(user_id="user-2"),
+        headers={"X-Webhook-Forwarder-Secret": "s3cret"},
+    )
+    assert response.status_code == 200
+    assert coalescer.submitted == [("user-2", ("transactions", "accounts"))]
+
+def test_connect_retries_reuse_one_service(monkeypatch):
+    built = []
+
+    class FlakyService:
+        connected = False
+
+        def __init__(self):
+            built.append(self)
+            self.attempts = 0
+
+        async def connect(self):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise ConnectionError("weaviate down")
+            self.connected = True
+
+    monkeypatch.setattr(sync_endpoints, "ElysiaDataSync", FlakyService)
+    monkeypatch.setattr(sync_endpoints, "sync_service", None)
+    monkeypatch.setattr(sync_endpoints, "_connecting_service", None)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await sync_endpoints.get_sync_service()
+        return await sync_endpoints.get_sync_service()
+
+    service = asyncio.run(run())
+    assert built == [service]
+    assert service.attempts == 3
+    assert sync_endpoints._connecting_service is None
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tree Session Pool for Elysia
+Keeps one warm Tree per user with LRU eviction, idle expiry and caps on pooled trees and their estimated size
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class _TreeSession:
+    """A pooled Tree plus the lock serializing requests against it"""
+
+    def __init__(self, tree: Any):
+        self.tree = tree
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        # Requests run against the Tree, i.e. turns in its conversation
+        self.turns = 0
+        # Estimated bytes held by the Tree, refreshed after every turn
+        self.size = 0
+
+class TreePool:
+    """Per-user Tree sessions shared across executor threads
+
+    Requests for the same user reuse (and serialize on) that user's Tree so
+    follow-up questions keep their conversation context; different users
+    never share a Tree. Anonymous requests get a throwaway Tree. The factory
+    receives the user id (None for anonymous) so tools can be bound to it.
+
+    Conversations grow with every turn, so besides `max_trees` the pool
+    bounds the total of `size_of(tree)` (an estimate in bytes, taken after
+    each turn) at `max_bytes`, evicting least recently used idle sessions.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Optional[str]], Any],
+        max_trees: int = 64,
+        idle_timeout: float = 900.0,
+        size_of: Optional[Callable[[Any], int]] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.factory = factory
+        self.max_trees = max_trees
+        self.idle_timeout = idle_timeout
+        self.size_of = size_of
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, _TreeSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.anonymous = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @contextmanager
+    def checkout(self, user_id: Optional[str]):
+        """Borrow the Tree for a user for the duration of one request"""
+        if not user_id:
+            with self._lock:
+                self.anonymous += 1
+            yield self.factory(None)
+            return
+
+        session = self._acquire_session(user_id)
+        try:
+            with session.lock:
+                try:
+                    yield session.tree
+                finally:
+                    session.turns += 1
+                    session.size = self._measure(session.tree)
+        finally:
+            with self._lock:
+                session.in_use -= 1
+                session.last_used = time.monotonic()
+                self._evict()
+
+    def conversation_turns(self, user_id: Optional[str]) -> int:
+        """Turns in the user's pooled conversation (0 for anonymous users or no session)"""
+        if not user_id:
+            return 0
+        with self._lock:
+            session = self._sessions.get(user_id)
+            return session.turns if session else 0
+
+    def _acquire_session(self, user_id: str) -> _TreeSession:
+        """Find or create the session for a user and mark it in use"""
+        with self._lock:
+            self._expire_idle()
+            session = self._sessions.get(user_id)
+            if session:
+                self.hits += 1
+                session.in_use += 1
+                self._sessions.move_to_end(user_id)
+                return session
+            self.misses += 1
+
+        # Build outside the lock; Tree construction is comparatively slow
+        tree = self.factory(user_id)
+
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if not session:
+                session = _TreeSession(tree)
+                self._sessions[user_id] = session
+            session.in_use += 1
+            self._sessions.move_to_end(user_id)
+            self._evict()
+            return session
+
+    def _measure(self, tree: Any) -> int:
+        """Estimated size of a Tree, 0 when no estimator is configured or it fails"""
+        if not self.size_of:
+            return 0
+        try:
+            return self.size_of(tree)
+        except Exception as e:
+            logger.warning(f"Could not estimate Tree size: {e}")
+            return 0
+
+    def _over_budget(self) -> bool:
+        """Whether the pool exceeds its tree count or size cap (lock held)"""
+        if len(self._sessions) > self.max_trees:
+            return True
+        return bool(self.max_bytes) and sum(s.size for s in self._sessions.values()) > self.max_bytes
+
+    def _evict(self):
+        """Drop least recently used idle sessions until both caps hold (lock held)"""
+        for user_id in list(self._sessions):
+            if not self._over_budget():
+                break
+            if self._sessions[user_id].in_use == 0:
+                del self._sessions[user_id]
+                self.evictions += 1
+
+    def _expire_idle(self):
+        """Drop sessions idle for longer than the timeout (lock held)"""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [
+            user_id for user_id, session in self._sessions.items()
+            if session.in_use == 0 and session.last_used < cutoff
+        ]
+        for user_id in expired:
+            del self._sessions[user_id]
+        self.expirations += len(expired)
+
+    def clear(self):
+        """Drop every pooled session"""
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current pool counters"""
+        with self._lock:
+            in_use = sum(1 for session in self._sessions.values() if session.in_use)
+            size = len(self._sessions)
+            estimated_bytes = sum(session.size for session in self._sessions.values())
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "in_use": in_use,
+            "max_trees": self.max_trees,
+            "estimated_bytes": estimated_bytes,
+            "max_bytes": self.max_bytes,
+            "idle_timeout_seconds": self.idle_timeout,
+            "hits": self.hits,
+            "misses": self.misses,
+            "anonymous": self.anonymous,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "reuse_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }